@@ -0,0 +1,90 @@
+import binascii
+import io
+
+from exceptions import DecryptionError
+from profiling import span
+
+# Opakowanie base64 ("armor") nakładane na surowy szyfrogram w trakcie zapisu lub odczytu strumienia
+
+_WHITESPACE = b' \t\r\n\v\f'
+
+
+class ArmorWriter:
+    """Strumień zapisu kodujący dane do base64 w locie; close() dopisuje końcówkę z dopełnieniem"""
+
+    def __init__(self, dst):
+        self._dst = dst
+        self._text = isinstance(dst, io.TextIOBase)
+        self._pending = b''
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        buffer = self._pending + bytes(data) if self._pending else bytes(data)
+        # Tylko pełne trójki bajtów - wtedy kolejne kawałki base64 można po prostu skleić
+        cut = len(buffer) - len(buffer) % 3
+        self._pending = buffer[cut:]
+        if cut:
+            with span('base64', size=cut):
+                encoded = binascii.b2a_base64(buffer[:cut], newline=False)
+            self._emit(encoded)
+        return len(data)
+
+    def _emit(self, encoded: bytes) -> None:
+        self._dst.write(encoded.decode('ascii') if self._text else encoded)
+
+    def flush(self) -> None:
+        self._dst.flush()
+
+    def close(self) -> None:
+        """Zapisuje pozostałe bajty; nie zamyka strumienia docelowego"""
+        if not self.closed:
+            if self._pending:
+                self._emit(binascii.b2a_base64(self._pending, newline=False))
+                self._pending = b''
+            self.closed = True
+
+    def __enter__(self) -> 'ArmorWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ArmorReader:
+    """Strumień odczytu dekodujący base64 w locie; białe znaki (np. podziały linii) są pomijane"""
+
+    def __init__(self, src):
+        self._src = src
+        self._pending = b''
+        self._eof = False
+
+    def read(self, size: int = -1) -> bytes:
+        # size bajtów wyniku to około size / 3 * 4 znaków base64
+        encoded_size = -1 if size is None or size < 0 else max(4, size // 3 * 4)
+        decoded = b''
+        while not decoded and not self._eof:
+            chunk = self._src.read(encoded_size)
+            if isinstance(chunk, str):
+                chunk = chunk.encode('ascii')
+            if not chunk:
+                self._eof = True
+                buffer = self._pending
+                self._pending = b''
+            else:
+                buffer = self._pending + chunk.translate(None, _WHITESPACE)
+                cut = len(buffer) - len(buffer) % 4
+                self._pending = buffer[cut:]
+                buffer = buffer[:cut]
+            if buffer:
+                try:
+                    with span('base64', size=len(buffer)):
+                        decoded = binascii.a2b_base64(buffer)
+                except binascii.Error as e:
+                    raise DecryptionError(f"Niepoprawne dane base64: {e}")
+        return decoded
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
@@ -0,0 +1,392 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+from cipher import CIPHERS
+from exceptions import CipherError
+
+CORPORA = ('ascii', 'polish', 'binary', 'messages')
+DIRECTIONS = ('encrypt', 'decrypt')
+DEFAULT_SIZES = [1 << 10, 1 << 20, 16 << 20]
+MESSAGE_SIZE = 64
+
+_ASCII_WORDS = "Ala ma kota a kot ma Ale lorem ipsum dolor sit amet 2024 log INFO request done".split()
+_POLISH_WORDS = "zażółć gęślą jaźń źdźbło żółw łódź pchnąć w tę łódź jeża lub ośm skrzyń fig".split()
+
+
+def parse_size(value: str) -> int:
+    """Zamienia rozmiar w postaci 512, 64K, 16M lub 1G na liczbę bajtów"""
+    units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    value = value.strip().upper()
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+def make_corpus(kind: str, size: int, seed: int = 0) -> Union[str, bytes, List[str]]:
+    """Tworzy powtarzalne dane testowe o rozmiarze size (w znakach lub bajtach)"""
+    rng = random.Random(seed)
+    if kind == 'binary':
+        return rng.randbytes(size)
+    if kind in ('ascii', 'polish', 'messages'):
+        words = _POLISH_WORDS + _ASCII_WORDS if kind == 'polish' else _ASCII_WORDS
+        # Losowy fragment jest powielany - generowanie setek MB słowo po słowie trwałoby zbyt długo
+        block = ' '.join(rng.choice(words) for _ in range(2000)) + '\n'
+        text = (block * (size // len(block) + 1))[:size]
+        if kind == 'messages':
+            return [text[start:start + MESSAGE_SIZE] for start in range(0, size, MESSAGE_SIZE)]
+        return text
+    raise ValueError(f"Nieznany rodzaj danych: {kind}")
+
+
+def measure(func: Callable[[], object], repeats: int = 5, warmup: int = 1) -> Dict[str, float]:
+    """Mierzy czas wywołania func: najpierw przebiegi rozgrzewkowe, potem repeats pomiarów"""
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {
+        'mean': statistics.fmean(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'min': min(times),
+        'max': max(times),
+        'repeats': repeats,
+    }
+
+
+def _operations(cipher, corpus_kind: str, data):
+    """Zwraca (szyfrowanie, deszyfrowanie, ścieżka) właściwe dla rodzaju danych.
+
+    Gdy szyfr nie obsługuje danych w trybie tekstowym, używa ścieżki surowej (encrypt_raw), a bez niej
+    zgłasza CipherError z przyczyną.
+    """
+    if corpus_kind == 'binary':
+        encrypted = cipher.encrypt_bytes(data)
+        return lambda: cipher.encrypt_bytes(data), lambda: cipher.decrypt_bytes(encrypted), 'bytes'
+    if corpus_kind == 'messages':
+        encrypted = cipher.encrypt_many(data)
+        return lambda: cipher.encrypt_many(data), lambda: cipher.decrypt_many(encrypted), 'many'
+    try:
+        encrypted = cipher.encrypt(data)
+    except CipherError:
+        # Np. XOR w trybie tekstowym nie obsługuje znaków spoza Latin-1 - tekst jako UTF-8 na bajtach
+        if not hasattr(cipher, 'encrypt_raw'):
+            raise
+        encrypted = cipher.encrypt_raw(data)
+        return lambda: cipher.encrypt_raw(data), lambda: cipher.decrypt_raw(encrypted), 'raw'
+    return lambda: cipher.encrypt(data), lambda: cipher.decrypt(encrypted), 'text'
+
+
+def run_benchmarks(cipher_names: List[str], corpora: List[str], sizes: List[int], directions: List[str],
+                   repeats: int = 5, warmup: int = 1, key: str = "secret", verbose: bool = True) -> List[Dict]:
+    """Uruchamia wszystkie kombinacje szyfrów, danych, rozmiarów i kierunków"""
+    results = []
+    for corpus_kind in corpora:
+        for size in sizes:
+            data = make_corpus(corpus_kind, size)
+            for cipher_name in cipher_names:
+                cipher = CIPHERS[cipher_name](key, collect_stats=False)
+                try:
+                    encrypt, decrypt, path = _operations(cipher, corpus_kind, data)
+                except CipherError as e:
+                    if verbose:
+                        print(f"{cipher_name}/{corpus_kind}/{size}: pominięto ({e})")
+                    continue
+                for direction in directions:
+                    result = measure(encrypt if direction == 'encrypt' else decrypt, repeats, warmup)
+                    result.update({
+                        'name': f"{cipher_name}/{direction}/{corpus_kind}/{size}",
+                        'cipher': cipher_name,
+                        'direction': direction,
+                        'corpus': corpus_kind,
+                        'size': size,
+                        'path': path,
+                        'mb_per_s': size / result['mean'] / 1e6 if result['mean'] else 0.0,
+                    })
+                    results.append(result)
+                    if verbose:
+                        print(format_result(result))
+    return results
+
+
+def run_service_benchmark(cipher_name: str = 'xor', size: int = 4096, concurrency: int = 32,
+                          requests: int = 2000, key: str = "secret") -> Dict:
+    """Mierzy opóźnienia serwera szyfrującego (localhost) przy równoległym obciążeniu"""
+    import asyncio
+    from service import CipherServer, CipherClient
+    from stats import PerformanceStats
+
+    async def scenario():
+        server = CipherServer()
+        host, port = await server.start_tcp()
+        latencies = PerformanceStats(recent_size=0)
+        data = make_corpus('binary', size)
+
+        async def worker(count):
+            client = await CipherClient.connect_tcp(host, port)
+            try:
+                for _ in range(count):
+                    start = time.perf_counter_ns()
+                    await client.encrypt(cipher_name, key, data)
+                    latencies.record(time.perf_counter_ns() - start, size)
+            finally:
+                await client.close()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        await server.close()
+        return latencies, elapsed
+
+    latencies, elapsed = asyncio.run(scenario())
+    summary = latencies.summary()
+    return {
+        'name': f"service/{cipher_name}/{size}/c{concurrency}",
+        'cipher': cipher_name,
+        'size': size,
+        'concurrency': concurrency,
+        'requests': latencies.count,
+        'mean': summary['avg'],
+        'p50': summary['p50'],
+        'p95': summary['p95'],
+        'p99': summary['p99'],
+        'requests_per_s': latencies.count / elapsed,
+        'mb_per_s': latencies.total_size / elapsed / 1e6,
+    }
+
+
+def run_cracker_benchmarks(sizes: List[int], key: str = "tajny_klucz", repeats: int = 3,
+                           verbose: bool = True) -> List[Dict]:
+    """Mierzy czas odzyskania klucza XOR w zależności od rozmiaru szyfrogramu (z próbkowaniem i bez)"""
+    from cryptanalysis import crack_xor
+    cipher = CIPHERS['xor'](key, collect_stats=False)
+    results = []
+    for size in sizes:
+        encrypted = cipher.encrypt_bytes(make_corpus('ascii', size).encode('ascii'))
+        for mode, sample_size in (('sampled', 1 << 20), ('full', None)):
+            recovered = crack_xor(encrypted, sample_size=sample_size) == key.encode('utf-8')
+            result = measure(lambda: crack_xor(encrypted, sample_size=sample_size), repeats, 0)
+            result.update({
+                'name': f"crack/xor/{mode}/{size}",
+                'cipher': 'xor',
+                'size': size,
+                'recovered': recovered,
+                'mb_per_s': size / result['mean'] / 1e6 if result['mean'] else 0.0,
+            })
+            results.append(result)
+            if verbose:
+                print(format_result(result) + ("" if recovered else "  (klucz NIE odzyskany)"))
+    return results
+
+
+def run_compression_benchmarks(cipher_names: List[str], specs: List[str], size: int = 16 << 20,
+                               corpus_kind: str = 'ascii', repeats: int = 3, key: str = "secret",
+                               verbose: bool = True) -> List[Dict]:
+    """Porównuje szyfrowanie strumienia bez kompresji i z kompresją przed szyfrowaniem.
+
+    Dla każdego kodeka podaje rozmiar zapisanych danych, czas procesora (szyfrowanie do pamięci,
+    bez dysku) oraz prędkość dysku, poniżej której kompresja się opłaca: zaoszczędzone bajty
+    podzielone przez dodatkowy czas procesora.
+    """
+    import io
+    from compression import parse_spec
+    data = make_corpus(corpus_kind, size)
+    data = data.encode('utf-8') if isinstance(data, str) else data
+    results = []
+    for cipher_name in cipher_names:
+        cipher = CIPHERS[cipher_name](key, collect_stats=False)
+        baseline = None
+        for spec in ['none'] + list(specs):
+            codec, level = (None, None) if spec == 'none' else parse_spec(spec)
+            output = io.BytesIO()
+
+            def encrypt():
+                output.seek(0)
+                output.truncate()
+                cipher.encrypt_stream(io.BytesIO(data), output, compression=codec, level=level)
+
+            result = measure(encrypt, repeats, 1)
+            stored = len(output.getvalue())
+            restored = io.BytesIO()
+            cipher.decrypt_stream(io.BytesIO(output.getvalue()), restored)
+            decrypt = measure(lambda: cipher.decrypt_stream(io.BytesIO(output.getvalue()), io.BytesIO()), repeats, 0)
+            baseline = baseline or (result['mean'], stored)
+            extra_cpu = result['mean'] - baseline[0]
+            saved = baseline[1] - stored
+            result.update({
+                'name': f"compress/{cipher_name}/{spec}/{size}",
+                'cipher': cipher_name,
+                'compression': spec,
+                'size': size,
+                'stored_size': stored,
+                'ratio': size / stored if stored else 0.0,
+                'decrypt_mean': decrypt['mean'],
+                'roundtrip_ok': restored.getvalue() == data,
+                # Kompresja skraca całkowity czas, gdy dysk jest wolniejszy niż ta wartość
+                'break_even_mb_per_s': saved / extra_cpu / 1e6 if extra_cpu > 0 and saved > 0 else None,
+                'mb_per_s': size / result['mean'] / 1e6 if result['mean'] else 0.0,
+            })
+            results.append(result)
+            if verbose:
+                break_even = result['break_even_mb_per_s']
+                print(format_result(result) + f"  {stored:>10} B  x{result['ratio']:.1f}"
+                      + (f"  opłaca się poniżej {break_even:.0f} MB/s dysku" if break_even else ""))
+    return results
+
+
+def free_threaded() -> bool:
+    """Czy interpreter działa bez GIL (kompilacja free-threaded, np. python3.13t)"""
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def run_thread_benchmarks(cipher_names: List[str], thread_counts: List[int], size: int = 16 << 20,
+                          chunk_size: int = 1 << 20, repeats: int = 3, key: str = "secret",
+                          verbose: bool = True) -> List[Dict]:
+    """Mierzy przepustowość jednej współdzielonej instancji szyfru w puli wątków o różnej liczebności.
+
+    Kawałki danych są szyfrowane równolegle przez tę samą instancję (ze zbieraniem statystyk),
+    więc wynik pokazuje, na ile operacje zwalniają GIL (albo jak skalują się bez GIL).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    data = make_corpus('binary', size)
+    chunks = [data[start:start + chunk_size] for start in range(0, size, chunk_size)]
+    results = []
+    for cipher_name in cipher_names:
+        cipher = CIPHERS[cipher_name](key)
+        baseline = None
+        for threads in thread_counts:
+            with ThreadPoolExecutor(threads) as executor:
+                result = measure(lambda: list(executor.map(cipher.encrypt_bytes, chunks)), repeats, 1)
+            baseline = baseline or result['mean']
+            result.update({
+                'name': f"threads/{cipher_name}/{size}/t{threads}",
+                'cipher': cipher_name,
+                'size': size,
+                'threads': threads,
+                'free_threaded': free_threaded(),
+                'speedup': baseline / result['mean'] if result['mean'] else 0.0,
+                'mb_per_s': size / result['mean'] / 1e6 if result['mean'] else 0.0,
+            })
+            results.append(result)
+            if verbose:
+                print(format_result(result) + f"  x{result['speedup']:.2f}")
+    return results
+
+
+def format_result(result: Dict) -> str:
+    path = " (UTF-8 na bajtach)" if result.get('path') == 'raw' else ""
+    return (f"{result['name']:<40} {result['mean'] * 1e3:10.3f} ms ± {result['stdev'] * 1e3:8.3f} ms"
+            f" {result['mb_per_s']:10.1f} MB/s{path}")
+
+
+def metadata() -> Dict[str, object]:
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'free_threaded': free_threaded(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def save_results(filename: str, results: List[Dict]) -> None:
+    with open(filename, 'w', encoding='utf-8') as file:
+        json.dump({'meta': metadata(), 'results': results}, file, indent=2)
+
+
+def load_results(filename: str) -> List[Dict]:
+    with open(filename, 'r', encoding='utf-8') as file:
+        return json.load(file)['results']
+
+
+def compare_results(results: List[Dict], baseline: List[Dict], threshold: float = 0.1) -> List[Dict]:
+    """Zwraca przypadki, których średni czas wzrósł względem wyników bazowych o więcej niż threshold"""
+    baseline_by_name = {entry['name']: entry for entry in baseline}
+    regressions = []
+    for result in results:
+        reference = baseline_by_name.get(result['name'])
+        if reference is None or not reference['mean']:
+            continue
+        ratio = result['mean'] / reference['mean']
+        if ratio > 1 + threshold:
+            regressions.append({'name': result['name'], 'baseline': reference['mean'],
+                                'current': result['mean'], 'ratio': ratio})
+    return regressions
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Testy wydajnościowe szyfrów")
+    parser.add_argument('--ciphers', default=','.join(CIPHERS), help="Lista szyfrów oddzielona przecinkami")
+    parser.add_argument('--corpora', default=','.join(CORPORA), help="Rodzaje danych oddzielone przecinkami")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="Rozmiary danych, np. 1K,1M,256M")
+    parser.add_argument('--directions', default=','.join(DIRECTIONS))
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--service', action='store_true',
+                        help="Dodatkowo zmierz opóźnienia serwera szyfrującego pod obciążeniem")
+    parser.add_argument('--concurrency', type=int, default=32, help="Liczba równoległych klientów serwera")
+    parser.add_argument('--cracker', action='store_true',
+                        help="Dodatkowo zmierz czas łamania klucza XOR dla podanych rozmiarów")
+    parser.add_argument('--threads',
+                        help="Liczby wątków oddzielone przecinkami (np. 1,2,4,8) - test skalowania wątków")
+    parser.add_argument('--compression',
+                        help="Kodeki kompresji oddzielone przecinkami (np. zlib:1,zlib:6,bz2,lzma) - "
+                             "porównanie kompresji przed szyfrowaniem z szyfrowaniem bez niej")
+    parser.add_argument('--output', help="Plik JSON z wynikami")
+    parser.add_argument('--baseline', help="Plik JSON z wynikami bazowymi do porównania")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="Dopuszczalny względny wzrost czasu przed zgłoszeniem regresji")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    results = run_benchmarks(args.ciphers.split(','), args.corpora.split(','),
+                             [parse_size(size) for size in args.sizes.split(',')],
+                             args.directions.split(','), args.repeats, args.warmup)
+    if args.service:
+        for cipher_name in args.ciphers.split(','):
+            result = run_service_benchmark(cipher_name, concurrency=args.concurrency)
+            results.append(result)
+            print(f"{result['name']:<40} p50 {result['p50'] * 1e3:.3f} ms  p95 {result['p95'] * 1e3:.3f} ms"
+                  f"  p99 {result['p99'] * 1e3:.3f} ms  {result['requests_per_s']:.0f} req/s")
+    if args.cracker:
+        results.extend(run_cracker_benchmarks([parse_size(size) for size in args.sizes.split(',')],
+                                              repeats=args.repeats))
+    if args.threads:
+        results.extend(run_thread_benchmarks(args.ciphers.split(','),
+                                             [int(threads) for threads in args.threads.split(',')],
+                                             repeats=args.repeats))
+    if args.compression:
+        for size in args.sizes.split(','):
+            results.extend(run_compression_benchmarks(args.ciphers.split(','), args.compression.split(','),
+                                                      parse_size(size), repeats=args.repeats))
+    if args.output:
+        save_results(args.output, results)
+        print(f"Wyniki zapisano do {args.output}")
+    if args.baseline:
+        regressions = compare_results(results, load_results(args.baseline), args.threshold)
+        for regression in regressions:
+            print(f"REGRESJA {regression['name']}: {regression['baseline'] * 1e3:.3f} ms -> "
+                  f"{regression['current'] * 1e3:.3f} ms ({regression['ratio']:.2f}x)")
+        if regressions:
+            return 1
+        print("Brak regresji względem wyników bazowych")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from cipher import Cipher, CIPHERS
+from exceptions import CipherError
+
+DEFAULT_CACHE_SIZE = 256
+
+
+class CipherCache:
+    """Cache LRU przygotowanych szyfrów o ograniczonym rozmiarze, bezpieczny dla wątków"""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        if maxsize < 1:
+            raise ValueError("Rozmiar cache musi być dodatni")
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[Tuple[str, str], Cipher]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, kind: str, key: str) -> Cipher:
+        """Zwraca szyfr danego rodzaju dla klucza, tworząc go tylko przy pierwszym użyciu"""
+        cache_key = (kind, key)
+        with self._lock:
+            cipher = self._entries.get(cache_key)
+            if cipher is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return cipher
+        if kind not in CIPHERS:
+            raise CipherError(f"Nieznany szyfr: {kind}")
+
+        # Tworzenie szyfru odbywa się poza blokadą, żeby nie wstrzymywać innych wątków
+        cipher = CIPHERS[kind](key, collect_stats=False)
+        with self._lock:
+            self.misses += 1
+            existing = self._entries.get(cache_key)
+            if existing is not None:
+                self._entries.move_to_end(cache_key)
+                return existing
+            self._entries[cache_key] = cipher
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return cipher
+
+    def stats(self) -> Dict[str, int]:
+        """Zwraca liczniki trafień, chybień i usunięć"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+_default_cache = CipherCache()
+
+
+def get_cipher(kind: str, key: str) -> Cipher:
+    """Zwraca współdzielony, przygotowany szyfr (bez zbierania statystyk) z domyślnego cache"""
+    return _default_cache.get(kind, key)
+
+
+def cache_stats() -> Dict[str, int]:
+    return _default_cache.stats()
@@ -1,26 +1,310 @@
+import io
 import os
+import mmap
+import threading
 import base64
-import time
-import matplotlib.pyplot as plt
-from typing import Callable, List, Dict
-from functools import reduce
+import binascii
+import codecs
+from time import perf_counter_ns
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Dict, Tuple, Iterator, Iterable, Union
+from functools import lru_cache
+from bisect import bisect_right
 from exceptions import *
+from stats import PerformanceStats, byte_size
+from armor import ArmorReader, ArmorWriter
+from transforms import compile_map, compile_filter
+import compression as _compression
+import profiling as _profiling
+from profiling import span
+
+
+class _CaesarTable(dict):
+    """Tablica translacji dla str.translate - znaki spoza ASCII liczone leniwie"""
+
+    def __init__(self, shift: int):
+        super().__init__()
+        self.shift = shift
+        for code in range(128):
+            self[code] = self._shift_code(code)
+
+    def _shift_code(self, code: int) -> int:
+        char = chr(code)
+        if not char.isalpha():
+            return code
+        base = ord('a') if char.islower() else ord('A')
+        return ((code - base + self.shift) % 26) + base
+
+    def __missing__(self, code: int) -> int:
+        # Zachowuje dotychczasową semantykę także dla liter spoza ASCII (np. polskich)
+        value = self._shift_code(code)
+        self[code] = value
+        return value
+
+
+@lru_cache(maxsize=None)
+def _caesar_tables(shift: int) -> Tuple[_CaesarTable, bytes]:
+    """Zwraca tablice translacji (tekstową i bajtową) dla danego przesunięcia"""
+    lower = 'abcdefghijklmnopqrstuvwxyz'
+    upper = lower.upper()
+    shifted = lower[shift:] + lower[:shift]
+    bytes_table = bytes.maketrans((lower + upper).encode('ascii'),
+                                  (shifted + shifted.upper()).encode('ascii'))
+    return _CaesarTable(shift), bytes_table
+
+
+_XOR_BLOCK_SIZE = 1 << 16
+
+# NumPy jest opcjonalny: gdy jest zainstalowany, XOR buforów od tego rozmiaru wykonuje ufunc,
+# który zwalnia GIL - wątki współdzielące jeden szyfr pracują wtedy równolegle
+NUMPY_THRESHOLD = 1 << 16
+_numpy_module = None
+
+
+def _numpy():
+    """Zwraca moduł numpy albo None, gdy nie jest zainstalowany (import przy pierwszym użyciu)"""
+    global _numpy_module
+    if _numpy_module is None:
+        try:
+            import numpy as module
+        except ImportError:
+            module = False
+        _numpy_module = module
+    return _numpy_module or None
+
+
+class _XorKeyStream:
+    """Powielony klucz XOR przygotowany do operacji na całych blokach danych"""
+
+    def __init__(self, key: bytes, block_size: int = _XOR_BLOCK_SIZE):
+        self.key = key
+        # Rozmiar bloku jest wielokrotnością długości klucza, więc każdy blok zaczyna się w tej samej fazie
+        self.block_size = max(len(key), block_size - block_size % len(key))
+        self._blocks = {}
+        self._arrays = {}
+
+    def _key_block(self, phase: int) -> int:
+        block = self._blocks.get(phase)
+        if block is None:
+            if len(self._blocks) >= 16:
+                self._blocks.clear()
+            rotated = self.key[phase:] + self.key[:phase]
+            block = int.from_bytes(rotated * (self.block_size // len(self.key)), 'little')
+            self._blocks[phase] = block
+        return block
+
+    def xor(self, data, offset: int = 0) -> bytes:
+        """XORuje dowolny bufor z kluczem, zaczynając od pozycji klucza offset"""
+        view = memoryview(data).cast('B')
+        size = len(view)
+        if size >= NUMPY_THRESHOLD:
+            numpy = _numpy()
+            if numpy is not None:
+                return self._xor_numpy(numpy, view, offset % len(self.key))
+        return self._xor_int(view, offset % len(self.key))
+
+    def _xor_int(self, view: memoryview, phase: int) -> bytes:
+        size = len(view)
+        key_block = self._key_block(phase)
+        block_size = self.block_size
+        if size == block_size:
+            return (int.from_bytes(view, 'little') ^ key_block).to_bytes(size, 'little')
+
+        parts = []
+        for start in range(0, size, block_size):
+            chunk = view[start:start + block_size]
+            chunk_size = len(chunk)
+            key_part = key_block if chunk_size == block_size else key_block & ((1 << (8 * chunk_size)) - 1)
+            parts.append((int.from_bytes(chunk, 'little') ^ key_part).to_bytes(chunk_size, 'little'))
+        return parts[0] if len(parts) == 1 else b''.join(parts)
+
+    def _xor_numpy(self, numpy, view: memoryview, phase: int) -> bytes:
+        key_array = self._arrays.get(phase)
+        if key_array is None:
+            if len(self._arrays) >= 16:
+                self._arrays.clear()
+            rotated = self.key[phase:] + self.key[:phase]
+            key_array = numpy.frombuffer(rotated * (self.block_size // len(self.key)), dtype=numpy.uint8)
+            self._arrays[phase] = key_array
+        data = numpy.frombuffer(view, dtype=numpy.uint8)
+        result = numpy.empty(len(data), dtype=numpy.uint8)
+        block_size = self.block_size
+        for start in range(0, len(data), block_size):
+            end = min(len(data), start + block_size)
+            numpy.bitwise_xor(data[start:end], key_array[:end - start], out=result[start:end])
+        return result.tobytes()
+
+
+# Plany wyboru implementacji według rozmiaru danych: {(klasa szyfru, 'text'/'bytes'): (progi, silniki)},
+# gdzie silnik None oznacza domyślną metodę klasy. Wczytywane przy pierwszym użyciu z zapisanej kalibracji
+# (engines.py --calibrate) lub planów domyślnych - bez kosztownych pomiarów.
+_engine_plans = None
+_engine_plans_lock = threading.Lock()
+
+
+def _load_engine_plans() -> dict:
+    global _engine_plans
+    with _engine_plans_lock:
+        # Plany są wczytywane raz, nawet gdy pierwsze wywołania przychodzą z wielu wątków
+        if _engine_plans is None:
+            import engines
+            _engine_plans = engines.load_plans()
+    return _engine_plans
+
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+def _read_chunks(src, chunk_size: int, granularity: int = 1,
+                 skip_whitespace: bool = False) -> Iterator[Union[str, bytes]]:
+    """Czyta strumień kawałkami; długość każdego kawałka poza ostatnim jest wielokrotnością granularity.
+
+    skip_whitespace=True usuwa białe znaki z kawałków tekstu przed podziałem (np. base64 łamane na linie).
+    """
+    chunk_size = max(granularity, chunk_size - chunk_size % granularity)
+    pending = None
+    while True:
+        with span('read'):
+            chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        if skip_whitespace and isinstance(chunk, str):
+            chunk = ''.join(chunk.split())
+        if pending:
+            chunk = pending + chunk
+            pending = None
+        cut = len(chunk) - len(chunk) % granularity
+        if cut < len(chunk):
+            pending = chunk[cut:]
+            chunk = chunk[:cut]
+        if chunk:
+            yield chunk
+    if pending:
+        yield pending
+
+
+def _read_exactly(src, size: int) -> Union[str, bytes]:
+    """Czyta size znaków lub bajtów (mniej tylko na końcu strumienia) - read() może zwracać mniej"""
+    data = src.read(size)
+    while data and len(data) < size:
+        more = src.read(size - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+
+class _PrefixedReader:
+    """Strumień, na którego początek wracają dane odczytane przy rozpoznawaniu nagłówka"""
+
+    def __init__(self, prefix: bytes, src):
+        self._prefix = prefix
+        self._src = src
+
+    def read(self, size: int = -1) -> bytes:
+        if not self._prefix:
+            return self._src.read(size)
+        if size is None or size < 0:
+            data = self._prefix + self._src.read()
+            self._prefix = b''
+            return data
+        data, self._prefix = self._prefix[:size], self._prefix[size:]
+        return data
+
+
+def _read_backwards(buffer, chunk_size: int, begin: int = 0, utf8: bool = False) -> Iterator[Union[str, bytes]]:
+    """Czyta bufor binarny od końca do pozycji begin, zwracając kolejne bloki"""
+    if utf8:
+        chunk_size = max(chunk_size, 4)
+    pos = buffer.seek(0, io.SEEK_END)
+    while pos > begin:
+        start = max(begin, pos - chunk_size)
+        buffer.seek(start)
+        block = buffer.read(pos - start)
+        if utf8 and start > begin:
+            # Bajty kontynuacji na początku bloku należą do znaku z poprzedniego bloku
+            skip = 0
+            while skip < len(block) and 0x80 <= block[skip] < 0xC0:
+                skip += 1
+            block = block[skip:]
+            start += skip
+        pos = start
+        yield block.decode('utf-8') if utf8 else block
+
+
+def _release_pages(mapped: mmap.mmap, start: int, end: int) -> None:
+    """Zwalnia z pamięci procesu przetworzone strony odwzorowania pliku (jeśli system na to pozwala)"""
+    if not hasattr(mmap, 'MADV_DONTNEED'):
+        return
+    page = mmap.PAGESIZE
+    start = -(-start // page) * page
+    end = end // page * page
+    if end > start:
+        mapped.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+
+# Szyfr używany przez procesy robocze trybu równoległego
+_worker_cipher = None
+
+
+def _init_worker(cipher: 'Cipher') -> None:
+    global _worker_cipher
+    _worker_cipher = cipher
+
+
+def _parallel_chunk(cipher: 'Cipher', data: bytes, offset: int, encrypt: bool) -> bytes:
+    cipher = cipher or _worker_cipher
+    transform = cipher._encrypt_chunk if encrypt else cipher._decrypt_chunk
+    return transform(data, offset)
+
+
+def _parallel_file_chunk(cipher: 'Cipher', src_filename: str, dst_filename: str,
+                         start: int, end: int, size: int, encrypt: bool) -> None:
+    cipher = cipher or _worker_cipher
+    with open(src_filename, 'rb') as src:
+        src.seek(start)
+        data = src.read(end - start)
+    result = _parallel_chunk(cipher, data, start, encrypt)
+    target_start, _ = cipher._window_target(start, end, size)
+    with open(dst_filename, 'r+b') as dst:
+        dst.seek(target_start)
+        dst.write(result)
 
 
 class Cipher:
-    def __init__(self, key: str):
+    def __init__(self, key: str, collect_stats: bool = True):
         if not key or not isinstance(key, str):
             raise InvalidKeyError("Klucz musi być niepustym ciągiem znaków")
         self.key = key
-        self.encryption_times = []
-        self.decryption_times = []
+        self.encryption_stats = PerformanceStats(enabled=collect_stats)
+        self.decryption_stats = PerformanceStats(enabled=collect_stats)
+
+    @property
+    def encryption_times(self) -> List[float]:
+        """Ostatnie czasy szyfrowania w sekundach"""
+        return self.encryption_stats.recent_times
+
+    @property
+    def decryption_times(self) -> List[float]:
+        """Ostatnie czasy deszyfrowania w sekundach"""
+        return self.decryption_stats.recent_times
+
+    def set_stats_enabled(self, enabled: bool) -> None:
+        """Włącza lub całkowicie wyłącza zbieranie statystyk wydajności"""
+        self.encryption_stats.enabled = enabled
+        self.decryption_stats.enabled = enabled
 
     def encrypt(self, text: str) -> str:
         """Szyfruje tekst przy użyciu klucza"""
-        start_time = time.time()
-        result = self._encrypt(text)
-        end_time = time.time()
-        self.encryption_times.append(end_time - start_time)
+        stats = self.encryption_stats
+        if _profiling.active:
+            return self._traced('encrypt', True, text, stats)
+        if not stats.enabled:
+            return self._run('text', True, text)
+        start_time = perf_counter_ns()
+        result = self._run('text', True, text)
+        stats.record(perf_counter_ns() - start_time, byte_size(text))
         return result
 
     def _encrypt(self, text: str) -> str:
@@ -28,19 +312,438 @@ class Cipher:
 
     def decrypt(self, encrypted_text: str) -> str:
         """Deszyfruje tekst przy użyciu klucza"""
-        start_time = time.time()
-        result = self._decrypt(encrypted_text)
-        end_time = time.time()
-        self.decryption_times.append(end_time - start_time)
+        stats = self.decryption_stats
+        if _profiling.active:
+            return self._traced('decrypt', False, encrypted_text, stats)
+        if not stats.enabled:
+            return self._run('text', False, encrypted_text)
+        start_time = perf_counter_ns()
+        result = self._run('text', False, encrypted_text)
+        stats.record(perf_counter_ns() - start_time, byte_size(encrypted_text))
         return result
 
     def _decrypt(self, encrypted_text: str) -> str:
         raise NotImplementedError("Metoda _decrypt musi być zaimplementowana w klasie pochodnej")
 
+    def _run(self, kind: str, encrypt: bool, data):
+        """Wykonuje operację implementacją wybraną według rodzaju i rozmiaru danych (engines.py)"""
+        plans = _engine_plans if _engine_plans is not None else _load_engine_plans()
+        plan = plans.get((type(self), kind))
+        if plan is not None:
+            limits, engines = plan
+            engine = engines[bisect_right(limits, len(data))]
+            if engine is not None:
+                return engine(self, data, encrypt)
+        if kind == 'text':
+            return self._encrypt(data) if encrypt else self._decrypt(data)
+        return self._encrypt_bytes(data) if encrypt else self._decrypt_bytes(data)
+
+    def _traced(self, name: str, encrypt: bool, text: str, stats: PerformanceStats) -> str:
+        """Operacja na tekście mierzona także jako faza name (gdy podłączony jest odbiorca pomiarów)"""
+        start_time = perf_counter_ns()
+        size = byte_size(text)
+        with span(name, size=size):
+            result = self._run('text', encrypt, text)
+        stats.record(perf_counter_ns() - start_time, size)
+        return result
+
+    def encrypt_bytes(self, data: bytes) -> bytes:
+        """Szyfruje dane binarne bez dekodowania ich do tekstu"""
+        stats = self.encryption_stats
+        if not stats.enabled:
+            return self._run('bytes', True, data)
+        start_time = perf_counter_ns()
+        result = self._run('bytes', True, data)
+        stats.record(perf_counter_ns() - start_time, len(data))
+        return result
+
+    def _encrypt_bytes(self, data: bytes) -> bytes:
+        raise NotImplementedError(f"Szyfr {self.__class__.__name__} nie obsługuje trybu binarnego")
+
+    def decrypt_bytes(self, data: bytes) -> bytes:
+        """Deszyfruje dane binarne bez dekodowania ich do tekstu"""
+        stats = self.decryption_stats
+        if not stats.enabled:
+            return self._run('bytes', False, data)
+        start_time = perf_counter_ns()
+        result = self._run('bytes', False, data)
+        stats.record(perf_counter_ns() - start_time, len(data))
+        return result
+
+    def _decrypt_bytes(self, data: bytes) -> bytes:
+        raise NotImplementedError(f"Szyfr {self.__class__.__name__} nie obsługuje trybu binarnego")
+
+    def encrypt_many(self, messages: Iterable[Union[str, bytes]]) -> List[Union[str, bytes]]:
+        """Szyfruje wiele wiadomości naraz; cała partia daje jeden pomiar czasu"""
+        messages = list(messages)
+        stats = self.encryption_stats
+        if not stats.enabled:
+            return self._encrypt_many(messages)
+        start_time = perf_counter_ns()
+        result = self._encrypt_many(messages)
+        stats.record(perf_counter_ns() - start_time, sum(map(byte_size, messages)))
+        return result
+
+    def _encrypt_many(self, messages: List[Union[str, bytes]]) -> List[Union[str, bytes]]:
+        encrypt_chunk = self._encrypt_chunk
+        return [encrypt_chunk(message, 0) for message in messages]
+
+    def decrypt_many(self, messages: Iterable[Union[str, bytes]]) -> List[Union[str, bytes]]:
+        """Deszyfruje wiele wiadomości naraz; cała partia daje jeden pomiar czasu"""
+        messages = list(messages)
+        stats = self.decryption_stats
+        if not stats.enabled:
+            return self._decrypt_many(messages)
+        start_time = perf_counter_ns()
+        result = self._decrypt_many(messages)
+        stats.record(perf_counter_ns() - start_time, sum(map(byte_size, messages)))
+        return result
+
+    def _decrypt_many(self, messages: List[Union[str, bytes]]) -> List[Union[str, bytes]]:
+        decrypt_chunk = self._decrypt_chunk
+        return [decrypt_chunk(message, 0) for message in messages]
+
+    def _encrypt_chunk(self, chunk: Union[str, bytes], offset: int) -> Union[str, bytes]:
+        """Szyfruje kawałek strumienia; offset to pozycja kawałka w tekście jawnym"""
+        if isinstance(chunk, str):
+            return self._encrypt(chunk)
+        return self._encrypt_bytes(chunk)
+
+    def _decrypt_chunk(self, chunk: Union[str, bytes], offset: int) -> Union[str, bytes]:
+        """Deszyfruje kawałek strumienia; offset to pozycja kawałka w tekście jawnym"""
+        if isinstance(chunk, str):
+            return self._decrypt(chunk)
+        return self._decrypt_bytes(chunk)
+
+    # Wielokrotność długości kawałków, przy której kawałki można przetwarzać niezależnie
+    _encrypt_granularity = 1
+    _decrypt_granularity = 1
+    # Czy białe znaki w szyfrogramie tekstowym są bez znaczenia (base64) i nie liczą się do granularity
+    _decrypt_skips_whitespace = False
+
+    def encrypt_stream(self, src, dst, chunk_size: int = DEFAULT_CHUNK_SIZE, compression: str = None,
+                       level: int = None) -> int:
+        """Szyfruje strumień (tekstowy lub binarny) kawałkami; zwraca liczbę zapisanych bajtów (tekst w UTF-8).
+
+        compression ('zlib', 'bz2' lub 'lzma') kompresuje dane przed szyfrowaniem - wynik jest
+        wtedy binarny, z nagłówkiem rozpoznawanym automatycznie przy deszyfrowaniu.
+        """
+        start_time = perf_counter_ns()
+        try:
+            if compression:
+                written = self._encrypt_compressed(src, dst, chunk_size, compression, level)
+            else:
+                written = self._encrypt_stream(src, dst, chunk_size)
+        except (IOError, OSError) as e:
+            raise FileOperationError(f"Błąd podczas szyfrowania strumienia: {e}")
+        self.encryption_stats.record(perf_counter_ns() - start_time, written)
+        return written
+
+    def _encrypt_stream(self, src, dst, chunk_size: int) -> int:
+        written = 0
+        offset = 0
+        for chunk in _read_chunks(src, chunk_size, self._encrypt_granularity):
+            with span('encrypt', size=byte_size(chunk)):
+                result = self._encrypt_chunk(chunk, offset)
+            offset += len(chunk)
+            size = byte_size(result)
+            with span('write', size=size):
+                dst.write(result)
+            written += size
+        return written
+
+    def decrypt_stream(self, src, dst, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """Deszyfruje strumień (tekstowy lub binarny) kawałkami; zwraca liczbę zapisanych bajtów (tekst w UTF-8).
+
+        Strumień binarny zaczynający się nagłówkiem kompresji jest po odszyfrowaniu rozpakowywany.
+        """
+        start_time = perf_counter_ns()
+        try:
+            codec = None
+            if not isinstance(src, io.TextIOBase):
+                prefix = _read_exactly(src, _compression.HEADER_SIZE)
+                codec = _compression.read_header(prefix) if isinstance(prefix, bytes) else None
+                if codec is None and prefix:
+                    if getattr(src, 'seekable', None) and src.seekable():
+                        src.seek(-len(prefix), io.SEEK_CUR)
+                    else:
+                        src = _PrefixedReader(prefix, src)
+            if codec:
+                written = self._decrypt_compressed(src, dst, chunk_size, codec)
+            else:
+                written = self._decrypt_stream(src, dst, chunk_size)
+        except (IOError, OSError) as e:
+            raise FileOperationError(f"Błąd podczas deszyfrowania strumienia: {e}")
+        self.decryption_stats.record(perf_counter_ns() - start_time, written)
+        return written
+
+    def _decrypt_stream(self, src, dst, chunk_size: int) -> int:
+        written = offset = 0
+        for chunk in _read_chunks(src, chunk_size, self._decrypt_granularity, self._decrypt_skips_whitespace):
+            with span('decrypt', size=byte_size(chunk)):
+                result = self._decrypt_chunk(chunk, offset)
+            offset += len(result)
+            size = byte_size(result)
+            with span('write', size=size):
+                dst.write(result)
+            written += size
+        return written
+
+    def _encrypt_compressed(self, src, dst, chunk_size: int, codec: str, level: int) -> int:
+        header = _compression.header(codec)
+        dst.write(header)
+        written = len(header)
+        offset = 0
+        blocks = _compression.compress_chunks(_compression.compressor(codec, level), _read_chunks(src, chunk_size),
+                                             chunk_size)
+        for block in blocks:
+            # Skompresowane dane są szyfrowane jak jeden ciągły strumień binarny
+            stored = self._encrypt_chunk(block, offset)
+            offset += len(block)
+            dst.write(_compression.FRAME.pack(len(stored)))
+            dst.write(stored)
+            written += _compression.FRAME.size + len(stored)
+        return written
+
+    def _decrypt_compressed(self, src, dst, chunk_size: int, codec: str) -> int:
+        decompressor = _compression.decompressor(codec)
+        # Do strumienia tekstowego trafia tekst dekodowany przyrostowo (znaki mogą być podzielone między bloki)
+        decoder = codecs.getincrementaldecoder('utf-8')() if isinstance(dst, io.TextIOBase) else None
+        written = 0
+        offset = 0
+        while True:
+            frame = _read_exactly(src, _compression.FRAME.size)
+            if not frame:
+                break
+            if len(frame) < _compression.FRAME.size:
+                raise DecryptionError("Strumień skompresowany jest ucięty")
+            (length,) = _compression.FRAME.unpack(frame)
+            stored = _read_exactly(src, length)
+            if len(stored) < length:
+                raise DecryptionError("Strumień skompresowany jest ucięty")
+            block = self._decrypt_chunk(stored, offset)
+            offset += len(block)
+            for data in _compression.decompress_block(decompressor, block, chunk_size):
+                written += self._write_decompressed(dst, decoder, data)
+        written += self._write_decompressed(dst, decoder, _compression.finish(decompressor))
+        if decoder:
+            try:
+                decoder.decode(b'', final=True)
+            except UnicodeDecodeError as e:
+                raise DecryptionError(f"Rozpakowane dane nie są poprawnym tekstem UTF-8: {e}")
+        return written
+
+    @staticmethod
+    def _write_decompressed(dst, decoder, data: bytes) -> int:
+        if decoder:
+            try:
+                data = decoder.decode(data)
+            except UnicodeDecodeError as e:
+                raise DecryptionError(f"Rozpakowane dane nie są poprawnym tekstem UTF-8: {e}")
+        if data:
+            dst.write(data)
+        return len(data)
+
+    def encrypt_file(self, src_filename: str, dst_filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     compression: str = None, level: int = None) -> int:
+        """Szyfruje plik tekstowy do innego pliku bez wczytywania go w całości; z compression wynik jest binarny"""
+        if not compression:
+            return self._transform_file(src_filename, dst_filename, chunk_size, encrypt=True)
+        try:
+            with open(src_filename, 'r', encoding='utf-8', newline='') as src, open(dst_filename, 'wb') as dst:
+                return self.encrypt_stream(src, dst, chunk_size, compression, level)
+        except (IOError, OSError) as e:
+            raise FileOperationError(f"Błąd podczas przetwarzania pliku: {e}")
+
+    def decrypt_file(self, src_filename: str, dst_filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """Deszyfruje plik tekstowy do innego pliku bez wczytywania go w całości (także skompresowany)"""
+        try:
+            compressed = _compression.is_compressed(src_filename)
+        except (IOError, OSError) as e:
+            raise FileOperationError(f"Błąd podczas przetwarzania pliku: {e}")
+        if not compressed:
+            return self._transform_file(src_filename, dst_filename, chunk_size, encrypt=False)
+        try:
+            with open(src_filename, 'rb') as src, open(dst_filename, 'w', encoding='utf-8', newline='') as dst:
+                return self.decrypt_stream(src, dst, chunk_size)
+        except (IOError, OSError) as e:
+            raise FileOperationError(f"Błąd podczas przetwarzania pliku: {e}")
+
+    def encrypt_binary_file(self, src_filename: str, dst_filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                            armor: bool = False, compression: str = None, level: int = None) -> int:
+        """Szyfruje plik bajt po bajcie (bez dekodowania tekstu); armor=True zapisuje wynik w base64,
+        compression ('zlib', 'bz2', 'lzma') kompresuje dane przed szyfrowaniem"""
+        try:
+            with open(src_filename, 'rb') as src, open(dst_filename, 'wb') as dst:
+                if not armor:
+                    return self.encrypt_stream(src, dst, chunk_size, compression, level)
+                with ArmorWriter(dst) as armored:
+                    return self.encrypt_stream(src, armored, chunk_size, compression, level)
+        except (IOError, OSError) as e:
+            raise FileOperationError(f"Błąd podczas przetwarzania pliku: {e}")
+
+    def decrypt_binary_file(self, src_filename: str, dst_filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                            armor: bool = False) -> int:
+        """Deszyfruje plik bajt po bajcie; armor=True oznacza szyfrogram zapisany w base64"""
+        try:
+            with open(src_filename, 'rb') as src, open(dst_filename, 'wb') as dst:
+                return self.decrypt_stream(ArmorReader(src) if armor else src, dst, chunk_size)
+        except (IOError, OSError) as e:
+            raise FileOperationError(f"Błąd podczas przetwarzania pliku: {e}")
+
+    def _transform_file(self, src_filename: str, dst_filename: str, chunk_size: int, encrypt: bool) -> int:
+        stream_method = self.encrypt_stream if encrypt else self.decrypt_stream
+        try:
+            with open(src_filename, 'r', encoding='utf-8', newline='') as src, \
+                    open(dst_filename, 'w', encoding='utf-8', newline='') as dst:
+                return stream_method(src, dst, chunk_size)
+        except (IOError, OSError) as e:
+            raise FileOperationError(f"Błąd podczas przetwarzania pliku: {e}")
+
+    def encrypt_mmap(self, src_filename: str, dst_filename: str = None,
+                     window_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """Szyfruje plik binarnie przez mmap - w miejscu albo do nowego pliku; zwraca rozmiar"""
+        return self._transform_mmap(src_filename, dst_filename, window_size, encrypt=True)
+
+    def decrypt_mmap(self, src_filename: str, dst_filename: str = None,
+                     window_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """Deszyfruje plik binarnie przez mmap - w miejscu albo do nowego pliku; zwraca rozmiar"""
+        return self._transform_mmap(src_filename, dst_filename, window_size, encrypt=False)
+
+    def _window_target(self, start: int, end: int, size: int) -> Tuple[int, int]:
+        """Zwraca zakres wyniku odpowiadający zakresowi [start, end) danych wejściowych"""
+        return start, end
+
+    def _transform_mmap(self, src_filename: str, dst_filename: str, window_size: int, encrypt: bool) -> int:
+        transform = self._encrypt_chunk if encrypt else self._decrypt_chunk
+        window_size = max(mmap.PAGESIZE, window_size - window_size % mmap.PAGESIZE)
+        start_time = perf_counter_ns()
+        try:
+            if dst_filename is None:
+                with open(src_filename, 'r+b') as file:
+                    size = os.fstat(file.fileno()).st_size
+                    if size:
+                        with mmap.mmap(file.fileno(), size) as mapped:
+                            self._mmap_in_place(mapped, size, window_size, transform)
+            else:
+                with open(src_filename, 'rb') as src, open(dst_filename, 'w+b') as dst:
+                    size = os.fstat(src.fileno()).st_size
+                    dst.truncate(size)
+                    if size:
+                        with mmap.mmap(src.fileno(), size, access=mmap.ACCESS_READ) as source, \
+                                mmap.mmap(dst.fileno(), size) as target:
+                            self._mmap_copy(source, target, size, window_size, transform)
+        except (IOError, OSError, ValueError) as e:
+            raise FileOperationError(f"Błąd podczas przetwarzania pliku przez mmap: {e}")
+        stats = self.encryption_stats if encrypt else self.decryption_stats
+        stats.record(perf_counter_ns() - start_time, size)
+        return size
+
+    def _mmap_copy(self, source: mmap.mmap, target: mmap.mmap, size: int, window_size: int, transform) -> None:
+        with memoryview(source) as view:
+            for start in range(0, size, window_size):
+                end = min(size, start + window_size)
+                target_start, target_end = self._window_target(start, end, size)
+                target[target_start:target_end] = transform(view[start:end], start)
+                _release_pages(source, start, end)
+                _release_pages(target, target_start, target_end)
+
+    def _mmap_in_place(self, mapped: mmap.mmap, size: int, window_size: int, transform) -> None:
+        with memoryview(mapped) as view:
+            for start in range(0, size, window_size):
+                end = min(size, start + window_size)
+                mapped[start:end] = transform(view[start:end], start)
+                _release_pages(mapped, start, end)
+
+    def _chunk_alignment(self) -> int:
+        """Długość, do której wielokrotności wyrównywane są kawałki w trybie równoległym"""
+        return 1
+
+    def _parallel_executor(self, workers: int, use_threads: bool):
+        if use_threads:
+            return ThreadPoolExecutor(workers), self
+        # Szyfr trafia do każdego procesu raz, a nie z każdym kawałkiem
+        return ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self,)), None
+
+    def _parallel_chunks(self, size: int, workers: int, chunk_size: int = None) -> List[Tuple[int, int]]:
+        if chunk_size is None:
+            chunk_size = max(DEFAULT_CHUNK_SIZE, -(-size // (workers * 4)))
+        alignment = self._chunk_alignment()
+        chunk_size = max(alignment, chunk_size - chunk_size % alignment)
+        return [(start, min(size, start + chunk_size)) for start in range(0, size, chunk_size)]
+
+    def encrypt_parallel(self, data: bytes, workers: int = None, chunk_size: int = None,
+                         use_threads: bool = False) -> bytes:
+        """Szyfruje dane binarne na wielu rdzeniach; wynik jest identyczny z encrypt_bytes"""
+        return self._transform_parallel(data, workers, chunk_size, use_threads, encrypt=True)
+
+    def decrypt_parallel(self, data: bytes, workers: int = None, chunk_size: int = None,
+                         use_threads: bool = False) -> bytes:
+        """Deszyfruje dane binarne na wielu rdzeniach; wynik jest identyczny z decrypt_bytes"""
+        return self._transform_parallel(data, workers, chunk_size, use_threads, encrypt=False)
+
+    def _transform_parallel(self, data: bytes, workers: int, chunk_size: int, use_threads: bool,
+                            encrypt: bool) -> bytes:
+        start_time = perf_counter_ns()
+        result = self._parallel_result(data, workers, chunk_size, use_threads, encrypt)
+        stats = self.encryption_stats if encrypt else self.decryption_stats
+        stats.record(perf_counter_ns() - start_time, len(data))
+        return result
+
+    def _parallel_result(self, data: bytes, workers: int, chunk_size: int, use_threads: bool,
+                         encrypt: bool) -> bytes:
+        workers = workers or os.cpu_count() or 1
+        size = len(data)
+        chunks = self._parallel_chunks(size, workers, chunk_size)
+        if workers == 1 or len(chunks) <= 1:
+            return _parallel_chunk(self, data, 0, encrypt)
+        executor, cipher = self._parallel_executor(workers, use_threads)
+        with executor:
+            futures = [(self._window_target(start, end, size)[0],
+                        executor.submit(_parallel_chunk, cipher, data[start:end], start, encrypt))
+                       for start, end in chunks]
+            # Kawałki są sklejane w kolejności pozycji w wyniku - jedna kopia danych
+            futures.sort(key=lambda item: item[0])
+            return b''.join(future.result() for _, future in futures)
+
+    def encrypt_file_parallel(self, src_filename: str, dst_filename: str, workers: int = None,
+                              chunk_size: int = None, use_threads: bool = False) -> int:
+        """Szyfruje plik binarnie na wielu rdzeniach; zwraca rozmiar pliku"""
+        return self._transform_file_parallel(src_filename, dst_filename, workers, chunk_size, use_threads,
+                                             encrypt=True)
+
+    def decrypt_file_parallel(self, src_filename: str, dst_filename: str, workers: int = None,
+                              chunk_size: int = None, use_threads: bool = False) -> int:
+        """Deszyfruje plik binarnie na wielu rdzeniach; zwraca rozmiar pliku"""
+        return self._transform_file_parallel(src_filename, dst_filename, workers, chunk_size, use_threads,
+                                             encrypt=False)
+
+    def _transform_file_parallel(self, src_filename: str, dst_filename: str, workers: int, chunk_size: int,
+                                 use_threads: bool, encrypt: bool) -> int:
+        workers = workers or os.cpu_count() or 1
+        start_time = perf_counter_ns()
+        try:
+            size = os.path.getsize(src_filename)
+            # Plik wynikowy jest alokowany z góry, procesy zapisują swoje zakresy bezpośrednio
+            with open(dst_filename, 'wb') as dst:
+                dst.truncate(size)
+            executor, cipher = self._parallel_executor(workers, use_threads)
+            with executor:
+                futures = [executor.submit(_parallel_file_chunk, cipher, src_filename, dst_filename,
+                                           start, end, size, encrypt)
+                           for start, end in self._parallel_chunks(size, workers, chunk_size)]
+                for future in futures:
+                    future.result()
+        except (IOError, OSError) as e:
+            raise FileOperationError(f"Błąd podczas równoległego przetwarzania pliku: {e}")
+        stats = self.encryption_stats if encrypt else self.decryption_stats
+        stats.record(perf_counter_ns() - start_time, size)
+        return size
+
     def save_to_file(self, filename: str, text: str) -> None:
         """Zapisuje tekst do pliku"""
         try:
-            with open(filename, 'w', encoding='utf-8') as file:
+            with span('write', size=byte_size(text)), open(filename, 'w', encoding='utf-8') as file:
                 file.write(text)
         except (IOError, OSError) as e:
             raise FileOperationError(f"Błąd podczas zapisu do pliku: {e}")
@@ -48,10 +751,16 @@ class Cipher:
     def read_from_file(self, filename: str) -> str:
         """Odczytuje tekst z pliku"""
         try:
-            with open(filename, 'r', encoding='utf-8') as file:
-                return file.read()
+            with span('read'), open(filename, 'rb') as file:
+                data = file.read()
         except (IOError, OSError) as e:
             raise FileOperationError(f"Błąd podczas odczytu z pliku: {e}")
+        # Dekodowanie osobno od odczytu, z takim samym ujednoliceniem końców linii jak w trybie tekstowym
+        with span('decode', size=len(data)):
+            text = data.decode('utf-8')
+            if '\r' in text:
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
 
     @staticmethod
     def apply_lambda_operation(text: str, operation: Callable[[str], str]) -> str:
@@ -60,112 +769,360 @@ class Cipher:
 
     @staticmethod
     def filter_text(text: str, condition: Callable[[str], bool]) -> str:
-        """Filtruje tekst używając funkcji filter"""
+        """Filtruje tekst używając funkcji filter (znane predykaty i Transform - przez str.translate)"""
+        compiled = compile_filter(condition)
+        if compiled is not None:
+            return compiled(text)
         return ''.join(filter(condition, text))
 
     @staticmethod
     def map_text(text: str, transformation: Callable[[str], str]) -> str:
-        """Transformuje tekst używając funkcji map"""
+        """Transformuje tekst używając funkcji map (znane funkcje i Transform - przez str.translate)"""
+        compiled = compile_map(transformation)
+        if compiled is not None:
+            return compiled(text)
         return ''.join(map(transformation, text))
 
     def get_performance_stats(self) -> Dict[str, float]:
         """Zwraca statystyki czasu wykonania"""
-        if not self.encryption_times or not self.decryption_times:
+        if not self.encryption_stats.count or not self.decryption_stats.count:
             return {}
 
-        stats = {
-            'avg_encrypt': reduce(lambda x, y: x + y, self.encryption_times) / len(self.encryption_times),
-            'avg_decrypt': reduce(lambda x, y: x + y, self.decryption_times) / len(self.decryption_times),
-            'max_encrypt': max(self.encryption_times),
-            'min_encrypt': min(self.encryption_times),
-            'max_decrypt': max(self.decryption_times),
-            'min_decrypt': min(self.decryption_times)
-        }
+        stats = {}
+        for operation, collector in (('encrypt', self.encryption_stats), ('decrypt', self.decryption_stats)):
+            summary = collector.summary()
+            for name in ('avg', 'max', 'min', 'p50', 'p95', 'p99', 'count', 'throughput'):
+                stats[f'{name}_{operation}'] = summary[name]
         return stats
 
     def plot_performance(self, save_path: str = None) -> None:
         """Generuje wykres wydajności szyfrowania i deszyfrowania"""
-        if not self.encryption_times or not self.decryption_times:
-            raise ValueError("Brak danych do wygenerowania wykresu")
-
-        plt.figure(figsize=(10, 5))
-        plt.plot(self.encryption_times, label='Szyfrowanie', marker='o')
-        plt.plot(self.decryption_times, label='Deszyfrowanie', marker='x')
-        plt.title(f'Wydajność algorytmu {self.__class__.__name__}')
-        plt.xlabel('Numer operacji')
-        plt.ylabel('Czas wykonania (s)')
-        plt.legend()
-        plt.grid(True)
-
-        if save_path:
-            plt.savefig(save_path)
-            print(f"Wykres zapisano do {save_path}")
-        else:
-            plt.show()
+        from reporting import plot_performance
+        plot_performance(self, save_path)
 
 
 class CaesarCipher(Cipher):
-    def __init__(self, key: str):
-        super().__init__(key)
+    def __init__(self, key: str, collect_stats: bool = True):
+        super().__init__(key, collect_stats)
         self.shift = sum(ord(char) for char in key) % 26
+        self._encrypt_table, self._encrypt_bytes_table = _caesar_tables(self.shift)
+        self._decrypt_table, self._decrypt_bytes_table = _caesar_tables(-self.shift % 26)
+
+    @classmethod
+    def from_shift(cls, shift: int, collect_stats: bool = True) -> 'CaesarCipher':
+        """Tworzy szyfr o zadanym przesunięciu (klucz to jedna wielka litera o kodzie przystającym do shift)"""
+        return cls(chr(ord('A') + (shift - ord('A')) % 26), collect_stats)
 
     def _encrypt(self, text: str) -> str:
         """Szyfr Cezara - przesunięcie każdej litery o wartość klucza"""
         try:
-            result = []
-            for char in text:
-                if char.isalpha():
-                    shift_amount = self.shift
-                    if char.islower():
-                        new_char = chr(((ord(char) - ord('a') + shift_amount) % 26) + ord('a'))
-                    else:
-                        new_char = chr(((ord(char) - ord('A') + shift_amount) % 26) + ord('A'))
-                    result.append(new_char)
-                else:
-                    result.append(char)
-            return ''.join(result)
+            return text.translate(self._encrypt_table)
         except Exception as e:
             raise EncryptionError(f"Błąd podczas szyfrowania: {e}")
 
     def _decrypt(self, encrypted_text: str) -> str:
         """Odwrócenie szyfru Cezara"""
         try:
+            return encrypted_text.translate(self._decrypt_table)
+        except Exception as e:
+            raise DecryptionError(f"Błąd podczas deszyfrowania: {e}")
+
+    def _encrypt_many(self, messages: List[Union[str, bytes]]) -> List[Union[str, bytes]]:
+        try:
+            return self._translate_many(messages, self._encrypt_table, self._encrypt_bytes_table)
+        except Exception as e:
+            raise EncryptionError(f"Błąd podczas szyfrowania: {e}")
+
+    def _decrypt_many(self, messages: List[Union[str, bytes]]) -> List[Union[str, bytes]]:
+        try:
+            return self._translate_many(messages, self._decrypt_table, self._decrypt_bytes_table)
+        except Exception as e:
+            raise DecryptionError(f"Błąd podczas deszyfrowania: {e}")
+
+    @staticmethod
+    def _translate_many(messages: List[Union[str, bytes]], table: _CaesarTable, bytes_table: bytes) -> List:
+        if all(isinstance(message, str) for message in messages):
+            # Jedno wywołanie translate dla całej partii, potem podział według długości wiadomości
+            translated = ''.join(messages).translate(table)
             result = []
-            for char in encrypted_text:
-                if char.isalpha():
-                    shift_amount = self.shift
-                    if char.islower():
-                        new_char = chr(((ord(char) - ord('a') - shift_amount) % 26) + ord('a'))
-                    else:
-                        new_char = chr(((ord(char) - ord('A') - shift_amount) % 26) + ord('A'))
-                    result.append(new_char)
-                else:
-                    result.append(char)
-            return ''.join(result)
+            start = 0
+            for message in messages:
+                end = start + len(message)
+                result.append(translated[start:end])
+                start = end
+            return result
+        return [message.translate(table) if isinstance(message, str) else bytes(message).translate(bytes_table)
+                for message in messages]
+
+    def _encrypt_bytes(self, data: bytes) -> bytes:
+        """Szyfr Cezara na bajtach - przesuwane są tylko litery ASCII"""
+        try:
+            return bytes(data).translate(self._encrypt_bytes_table)
+        except Exception as e:
+            raise EncryptionError(f"Błąd podczas szyfrowania: {e}")
+
+    def _decrypt_bytes(self, data: bytes) -> bytes:
+        """Odwrócenie szyfru Cezara na bajtach"""
+        try:
+            return bytes(data).translate(self._decrypt_bytes_table)
         except Exception as e:
             raise DecryptionError(f"Błąd podczas deszyfrowania: {e}")
 
 
-class XORCipher(Cipher):
+# Kolumny (znaki jednej pozycji klucza) krótsze niż tyle znaków nie opłacają osobnego translate
+_MIN_COLUMN = 16
+
+
+class VigenereCipher(Cipher):
+    def __init__(self, key: str, collect_stats: bool = True):
+        super().__init__(key, collect_stats)
+        # Litera ASCII klucza to przesunięcie (a/A = 0, b/B = 1, ...), każdy inny znak - jego kod modulo 26
+        self.shifts = tuple(ord(char.lower()) - ord('a') if char.isascii() and char.isalpha() else ord(char) % 26
+                            for char in key)
+        # Tablice Cezara dla każdej pozycji klucza; litery spoza ASCII jak w CaesarCipher
+        self._encrypt_tables = [_caesar_tables(shift) for shift in self.shifts]
+        self._decrypt_tables = [_caesar_tables(-shift % 26) for shift in self.shifts]
+        self._arrays = {}
+
+    def _chunk_alignment(self) -> int:
+        return len(self.shifts)
+
     def _encrypt(self, text: str) -> str:
-        """Szyfrowanie XOR - każdy znak tekstu jest XORowany z odpowiednim znakiem klucza"""
+        """Szyfr Vigenère'a - każdy znak przesuwany o wartość kolejnej pozycji klucza"""
+        return self._encrypt_chunk(text, 0)
+
+    def _decrypt(self, encrypted_text: str) -> str:
+        """Odwrócenie szyfru Vigenère'a"""
+        return self._decrypt_chunk(encrypted_text, 0)
+
+    def _encrypt_bytes(self, data: bytes) -> bytes:
+        """Szyfr Vigenère'a na bajtach - przesuwane są tylko litery ASCII, pozycja klucza rośnie z każdym bajtem"""
+        return self._encrypt_chunk(data, 0)
+
+    def _decrypt_bytes(self, data: bytes) -> bytes:
+        return self._decrypt_chunk(data, 0)
+
+    def _encrypt_chunk(self, chunk: Union[str, bytes], offset: int) -> Union[str, bytes]:
+        try:
+            if isinstance(chunk, str):
+                return self._shift_text(chunk, offset, True)
+            return self._shift_bytes(chunk, offset, True)
+        except Exception as e:
+            raise EncryptionError(f"Błąd podczas szyfrowania: {e}")
+
+    def _decrypt_chunk(self, chunk: Union[str, bytes], offset: int) -> Union[str, bytes]:
         try:
-            key_repeated = (self.key * (len(text) // len(self.key) + 1))[:len(text)]
-            encrypted_bytes = [ord(t) ^ ord(k) for t, k in zip(text, key_repeated)]
-            encrypted_text = base64.b64encode(bytes(encrypted_bytes)).decode('utf-8')
-            return encrypted_text
+            if isinstance(chunk, str):
+                return self._shift_text(chunk, offset, False)
+            return self._shift_bytes(chunk, offset, False)
         except Exception as e:
+            raise DecryptionError(f"Błąd podczas deszyfrowania: {e}")
+
+    def _shift_text(self, text: str, offset: int, encrypt: bool) -> str:
+        if text.isascii():
+            # Dla ASCII przesunięcie tekstu i bajtów jest takie samo, a ścieżka bajtowa jest szybsza
+            return self._shift_bytes(text.encode('ascii'), offset, encrypt).decode('ascii')
+        tables = self._encrypt_tables if encrypt else self._decrypt_tables
+        period = len(tables)
+        phase = offset % period
+        if len(text) < _MIN_COLUMN * period:
+            return ''.join([chr(tables[(phase + index) % period][0][ord(char)]) for index, char in enumerate(text)])
+        result = list(text)
+        # Znaki tej samej pozycji klucza (co period-ty znak) jednym wywołaniem translate
+        for index in range(period):
+            result[index::period] = text[index::period].translate(tables[(phase + index) % period][0])
+        return ''.join(result)
+
+    def _shift_bytes(self, data, offset: int, encrypt: bool) -> bytes:
+        data = bytes(data)
+        period = len(self.shifts)
+        phase = offset % period
+        if period == 1:
+            return self._shift_translate(data, phase, encrypt)
+        columns = len(data) >= _MIN_COLUMN * period
+        if len(data) >= NUMPY_THRESHOLD or (not columns and len(data) >= 1024):
+            numpy = _numpy()
+            if numpy is not None:
+                return self._shift_numpy(numpy, data, phase, encrypt)
+        if columns:
+            return self._shift_translate(data, phase, encrypt)
+        tables = self._encrypt_tables if encrypt else self._decrypt_tables
+        return bytes([tables[(phase + index) % period][1][byte] for index, byte in enumerate(data)])
+
+    def _shift_translate(self, data: bytes, phase: int, encrypt: bool) -> bytes:
+        tables = self._encrypt_tables if encrypt else self._decrypt_tables
+        period = len(tables)
+        if period == 1:
+            return data.translate(tables[0][1])
+        result = bytearray(len(data))
+        for index in range(min(period, len(data))):
+            result[index::period] = data[index::period].translate(tables[(phase + index) % period][1])
+        return bytes(result)
+
+    def _shift_numpy(self, numpy, data: bytes, phase: int, encrypt: bool) -> bytes:
+        """Jedno pobranie z tablicy wszystkich pozycji klucza: indeks = pozycja klucza * 256 + bajt"""
+        table, positions = self._numpy_arrays(numpy, phase, encrypt)
+        codes = numpy.frombuffer(data, dtype=numpy.uint8)
+        result = numpy.empty_like(codes)
+        block_size = len(positions)
+        for start in range(0, len(codes), block_size):
+            block = codes[start:start + block_size]
+            numpy.take(table, positions[:len(block)] + block, out=result[start:start + len(block)])
+        return result.tobytes()
+
+    def _numpy_arrays(self, numpy, phase: int, encrypt: bool):
+        arrays = self._arrays
+        table = arrays.get((phase, encrypt))
+        if table is None:
+            if len(arrays) >= 16:
+                arrays.clear()
+            tables = self._encrypt_tables if encrypt else self._decrypt_tables
+            rotated = tables[phase:] + tables[:phase]
+            table = numpy.frombuffer(b''.join(bytes_table for _, bytes_table in rotated), dtype=numpy.uint8)
+            arrays[(phase, encrypt)] = table
+        positions = arrays.get('positions')
+        if positions is None:
+            # Blok jest wielokrotnością długości klucza, więc każdy zaczyna się od tej samej pozycji klucza
+            period = len(self.shifts)
+            block_size = max(period, _XOR_BLOCK_SIZE - _XOR_BLOCK_SIZE % period)
+            positions = numpy.tile(numpy.arange(period, dtype=numpy.intp) * 256, block_size // period)
+            arrays['positions'] = positions
+        return table, positions
+
+
+class XORCipher(Cipher):
+    def __init__(self, key: str, collect_stats: bool = True):
+        super().__init__(key, collect_stats)
+        self._key_stream = _XorKeyStream(key.encode('utf-8'))
+        # Tryb tekstowy XORuje kody znaków (0-255) z kodami znaków klucza
+        if key.isascii():
+            self._text_key_stream = self._key_stream
+        else:
+            try:
+                self._text_key_stream = _XorKeyStream(key.encode('latin-1'))
+            except UnicodeEncodeError:
+                self._text_key_stream = None
+
+    def _chunk_alignment(self) -> int:
+        return len(self._key_stream.key)
+
+    def encrypt_raw(self, text: str) -> bytes:
+        """Szyfruje dowolny tekst (także polski) jako UTF-8 do surowych bajtów, bez base64"""
+        try:
+            data = text.encode('utf-8')
+        except UnicodeEncodeError as e:
             raise EncryptionError(f"Błąd podczas szyfrowania XOR: {e}")
+        return self.encrypt_bytes(data)
+
+    def decrypt_raw(self, data: bytes) -> str:
+        """Deszyfruje surowe bajty z encrypt_raw z powrotem do tekstu"""
+        try:
+            return self.decrypt_bytes(data).decode('utf-8')
+        except UnicodeDecodeError as e:
+            raise DecryptionError(f"Błąd podczas deszyfrowania XOR: {e}")
+
+    def _text_stream(self) -> _XorKeyStream:
+        if self._text_key_stream is None:
+            raise ValueError("klucz zawiera znaki spoza zakresu 0-255")
+        return self._text_key_stream
+
+    # Kawałki tekstu jawnego (3 bajty) i base64 (4 znaki) kodują się niezależnie
+    _encrypt_granularity = 3
+    _decrypt_granularity = 4
+    # Tak jak b64decode dla całego tekstu: podziały linii w base64 są pomijane
+    _decrypt_skips_whitespace = True
+
+    def _encrypt(self, text: str) -> str:
+        """Szyfrowanie XOR - każdy znak tekstu jest XORowany z odpowiednim znakiem klucza"""
+        return self._encrypt_chunk(text, 0)
 
     def _decrypt(self, encrypted_text: str) -> str:
         """Deszyfrowanie XOR - odwrócenie operacji XOR"""
+        return self._decrypt_chunk(encrypted_text, 0)
+
+    def _encrypt_bytes(self, data: bytes) -> bytes:
+        """XOR na surowych bajtach z kluczem zakodowanym w UTF-8"""
+        return self._encrypt_chunk(data, 0)
+
+    def _decrypt_bytes(self, data: bytes) -> bytes:
+        """Deszyfrowanie XOR na surowych bajtach"""
+        return self._decrypt_chunk(data, 0)
+
+    def _encrypt_many(self, messages: List[Union[str, bytes]]) -> List[Union[str, bytes]]:
+        try:
+            if all(isinstance(message, str) for message in messages):
+                encoded = [message.encode('latin-1') for message in messages]
+                return [binascii.b2a_base64(data, newline=False).decode('ascii')
+                        for data in self._xor_many(encoded, self._text_stream())]
+            if not any(isinstance(message, str) for message in messages):
+                return self._xor_many(messages, self._key_stream)
+        except Exception as e:
+            raise EncryptionError(f"Błąd podczas szyfrowania XOR: {e}")
+        return super()._encrypt_many(messages)
+
+    def _decrypt_many(self, messages: List[Union[str, bytes]]) -> List[Union[str, bytes]]:
         try:
-            key_repeated = (self.key * (len(encrypted_text) // len(self.key) + 1))[:len(encrypted_text)]
-            encrypted_bytes = base64.b64decode(encrypted_text.encode('utf-8'))
-            decrypted_text = ''.join([chr(b ^ ord(k)) for b, k in zip(encrypted_bytes, key_repeated)])
-            return decrypted_text
+            if all(isinstance(message, str) for message in messages):
+                b64decode = base64.b64decode
+                decoded = [b64decode(message.encode('utf-8')) for message in messages]
+                return [data.decode('latin-1') for data in self._xor_many(decoded, self._text_stream())]
+            if not any(isinstance(message, str) for message in messages):
+                return self._xor_many(messages, self._key_stream)
         except Exception as e:
             raise DecryptionError(f"Błąd podczas deszyfrowania XOR: {e}")
+        return super()._decrypt_many(messages)
+
+    @staticmethod
+    def _xor_many(messages: List[bytes], key_stream: _XorKeyStream) -> List[bytes]:
+        """XORuje wiele wiadomości jedną operacją na buforze, w którym każda zaczyna się od początku klucza"""
+        key_length = len(key_stream.key)
+        padded = [message.ljust(len(message) + -len(message) % key_length, b'\0') for message in messages]
+        result = key_stream.xor(b''.join(padded))
+        parts = []
+        start = 0
+        for message, padded_message in zip(messages, padded):
+            parts.append(result[start:start + len(message)])
+            start += len(padded_message)
+        return parts
+
+    def _encrypt_chunk(self, chunk: Union[str, bytes], offset: int) -> Union[str, bytes]:
+        try:
+            if isinstance(chunk, str):
+                if _profiling.active:
+                    return self._encrypt_text_phases(chunk, offset)
+                encrypted_bytes = self._text_stream().xor(chunk.encode('latin-1'), offset)
+                return base64.b64encode(encrypted_bytes).decode('ascii')
+            return self._key_stream.xor(chunk, offset)
+        except Exception as e:
+            raise EncryptionError(f"Błąd podczas szyfrowania XOR: {e}")
+
+    def _decrypt_chunk(self, chunk: Union[str, bytes], offset: int) -> Union[str, bytes]:
+        try:
+            if isinstance(chunk, str):
+                if _profiling.active:
+                    return self._decrypt_text_phases(chunk, offset)
+                encrypted_bytes = base64.b64decode(chunk.encode('utf-8'))
+                return self._text_stream().xor(encrypted_bytes, offset).decode('latin-1')
+            return self._key_stream.xor(chunk, offset)
+        except Exception as e:
+            raise DecryptionError(f"Błąd podczas deszyfrowania XOR: {e}")
+
+    # Te same kroki co wyżej, mierzone osobno - tylko gdy podłączony jest odbiorca pomiarów
+    def _encrypt_text_phases(self, chunk: str, offset: int) -> str:
+        with span('encode', size=byte_size(chunk)):
+            data = chunk.encode('latin-1')
+        with span('xor', size=len(data)):
+            data = self._text_stream().xor(data, offset)
+        with span('base64', size=len(data)):
+            return base64.b64encode(data).decode('ascii')
+
+    def _decrypt_text_phases(self, chunk: str, offset: int) -> str:
+        with span('base64', size=len(chunk)):
+            data = base64.b64decode(chunk.encode('utf-8'))
+        with span('xor', size=len(data)):
+            data = self._text_stream().xor(data, offset)
+        with span('decode', size=len(data)):
+            return data.decode('latin-1')
 
 
 class ReverseCipher(Cipher):
@@ -175,4 +1132,95 @@ class ReverseCipher(Cipher):
 
     def _decrypt(self, encrypted_text: str) -> str:
         """Odwrócenie kolejności znaków w tekście (deszyfrowanie to to samo co szyfrowanie)"""
-        return encrypted_text[::-1]
\ No newline at end of file
+        return encrypted_text[::-1]
+
+    def _encrypt_many(self, messages: List[Union[str, bytes]]) -> List[Union[str, bytes]]:
+        return [message[::-1] if isinstance(message, str) else bytes(message)[::-1] for message in messages]
+
+    def _decrypt_many(self, messages: List[Union[str, bytes]]) -> List[Union[str, bytes]]:
+        return self._encrypt_many(messages)
+
+    def _encrypt_bytes(self, data: bytes) -> bytes:
+        """Odwrócenie kolejności bajtów"""
+        return bytes(data)[::-1]
+
+    def _decrypt_bytes(self, data: bytes) -> bytes:
+        """Odwrócenie kolejności bajtów (deszyfrowanie to to samo co szyfrowanie)"""
+        return bytes(data)[::-1]
+
+    def _encrypt_stream(self, src, dst, chunk_size: int) -> int:
+        return self._reverse_stream(src, dst, chunk_size)
+
+    def _decrypt_stream(self, src, dst, chunk_size: int) -> int:
+        return self._reverse_stream(src, dst, chunk_size)
+
+    def _reverse_stream(self, src, dst, chunk_size: int) -> int:
+        """Odwraca strumień, czytając go od końca albo przez plik tymczasowy"""
+        written = 0
+        if isinstance(src, (io.RawIOBase, io.BufferedIOBase)) and src.seekable():
+            for block in _read_backwards(src, chunk_size, src.tell()):
+                dst.write(block[::-1])
+                written += len(block)
+            return written
+
+        # Strumień bez możliwości przewijania: odwrócone kawałki trafiają na dysk,
+        # a potem są odczytywane w odwrotnej kolejności
+        text_mode = None
+        segments = []
+        with tempfile.TemporaryFile() as spool:
+            for chunk in _read_chunks(src, chunk_size):
+                text_mode = isinstance(chunk, str)
+                data = chunk[::-1].encode('utf-8') if text_mode else chunk[::-1]
+                spool.write(data)
+                segments.append(len(data))
+            position = spool.tell()
+            for length in reversed(segments):
+                position -= length
+                spool.seek(position)
+                data = spool.read(length)
+                block = data.decode('utf-8') if text_mode else data
+                dst.write(block)
+                written += len(data)
+        return written
+
+    def _window_target(self, start: int, end: int, size: int) -> Tuple[int, int]:
+        return size - end, size - start
+
+    def _mmap_in_place(self, mapped: mmap.mmap, size: int, window_size: int, transform) -> None:
+        # Zamiana miejscami odwróconych okien z początku i końca pliku
+        low, high = 0, size
+        while high - low > 1:
+            width = min(window_size, (high - low) // 2)
+            head = mapped[low:low + width]
+            tail = mapped[high - width:high]
+            mapped[low:low + width] = tail[::-1]
+            mapped[high - width:high] = head[::-1]
+            _release_pages(mapped, low, low + width)
+            _release_pages(mapped, high - width, high)
+            low += width
+            high -= width
+
+    def _transform_file(self, src_filename: str, dst_filename: str, chunk_size: int, encrypt: bool) -> int:
+        # Plik UTF-8 można czytać od końca, pilnując granic znaków wielobajtowych
+        start_time = perf_counter_ns()
+        written = 0
+        try:
+            with open(src_filename, 'rb') as src, open(dst_filename, 'w', encoding='utf-8', newline='') as dst:
+                for block in _read_backwards(src, chunk_size, utf8=True):
+                    dst.write(block[::-1])
+                    written += byte_size(block)
+        except (IOError, OSError) as e:
+            raise FileOperationError(f"Błąd podczas przetwarzania pliku: {e}")
+        except UnicodeDecodeError as e:
+            raise FileOperationError(f"Plik nie jest poprawnym tekstem UTF-8: {e}")
+        stats = self.encryption_stats if encrypt else self.decryption_stats
+        stats.record(perf_counter_ns() - start_time, written)
+        return written
+
+# Nazwy szyfrów używane w trybie wsadowym i w formatach plików
+CIPHERS = {
+    'caesar': CaesarCipher,
+    'xor': XORCipher,
+    'reverse': ReverseCipher,
+    'vigenere': VigenereCipher,
+}
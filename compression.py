@@ -0,0 +1,136 @@
+import importlib
+import struct
+import zlib
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+from exceptions import DecryptionError
+
+# Kompresja przed szyfrowaniem. Układ strumienia:
+#   nagłówek:  MAGIC, identyfikator kodeka (1 bajt)
+#   ramki:     długość (4 bajty) i zaszyfrowany kawałek skompresowanych danych
+# Nagłówek i długości ramek nie są szyfrowane - odczyt rozpoznaje tryb po MAGIC.
+MAGIC = b'SZYFRZIP'
+_HEADER = struct.Struct('>8sB')
+HEADER_SIZE = _HEADER.size
+FRAME = struct.Struct('>I')
+
+# Kodeki z biblioteki standardowej; bz2 i lzma są importowane dopiero przy użyciu
+CODECS = {'zlib': 1, 'bz2': 2, 'lzma': 3}
+_CODEC_NAMES = {number: name for name, number in CODECS.items()}
+# Dopuszczalne poziomy kompresji (włącznie)
+LEVELS = {'zlib': (-1, 9), 'bz2': (1, 9), 'lzma': (0, 9)}
+
+
+def _check_codec(codec: str) -> None:
+    if codec not in CODECS:
+        raise ValueError(f"Nieznany kodek kompresji: {codec} (dostępne: {', '.join(CODECS)})")
+
+
+def check_level(codec: str, level: Optional[int]) -> None:
+    """Sprawdza kodek i poziom - błędny poziom zgłaszany jest od razu, a nie przez kodek w trakcie pracy"""
+    _check_codec(codec)
+    if level is None:
+        return
+    low, high = LEVELS[codec]
+    if isinstance(level, bool) or not isinstance(level, int) or not low <= level <= high:
+        raise ValueError(f"Niepoprawny poziom kompresji {codec}: {level} (dozwolone {low}..{high})")
+
+
+def parse_spec(spec: str) -> Tuple[str, Optional[int]]:
+    """Zamienia opis 'kodek' lub 'kodek:poziom' (np. 'zlib:6') na parę (kodek, poziom)"""
+    codec, _, level = spec.partition(':')
+    _check_codec(codec)
+    if not level:
+        return codec, None
+    try:
+        number = int(level)
+    except ValueError:
+        raise ValueError(f"Poziom kompresji musi być liczbą całkowitą: {level}")
+    check_level(codec, number)
+    return codec, number
+
+
+def compressor(codec: str, level: Optional[int] = None):
+    """Zwraca obiekt kompresji kodeka; level None oznacza poziom domyślny kodeka"""
+    check_level(codec, level)
+    if codec == 'zlib':
+        return zlib.compressobj(-1 if level is None else level)
+    if codec == 'bz2':
+        return importlib.import_module('bz2').BZ2Compressor(9 if level is None else level)
+    return importlib.import_module('lzma').LZMACompressor(preset=level)
+
+
+def decompressor(codec: str):
+    _check_codec(codec)
+    if codec == 'zlib':
+        return zlib.decompressobj()
+    if codec == 'bz2':
+        return importlib.import_module('bz2').BZ2Decompressor()
+    return importlib.import_module('lzma').LZMADecompressor()
+
+
+def header(codec: str) -> bytes:
+    _check_codec(codec)
+    return _HEADER.pack(MAGIC, CODECS[codec])
+
+
+def read_header(prefix: bytes) -> Optional[str]:
+    """Zwraca nazwę kodeka, jeśli prefix jest nagłówkiem strumienia skompresowanego, w przeciwnym razie None"""
+    if len(prefix) != HEADER_SIZE or not prefix.startswith(MAGIC):
+        return None
+    codec = _CODEC_NAMES.get(prefix[-1])
+    if codec is None:
+        raise DecryptionError(f"Nieznany identyfikator kodeka kompresji: {prefix[-1]}")
+    return codec
+
+
+def is_compressed(filename: str) -> bool:
+    with open(filename, 'rb') as file:
+        try:
+            return read_header(file.read(HEADER_SIZE)) is not None
+        except DecryptionError:
+            return False
+
+
+def compress_chunks(compressor, chunks: Iterable[Union[str, bytes]], frame_size: int) -> Iterator[bytes]:
+    """Kompresuje kolejne kawałki (tekst jako UTF-8); zwraca bloki długości około frame_size"""
+    pending = bytearray()
+    for chunk in chunks:
+        pending += compressor.compress(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+        if len(pending) >= frame_size:
+            yield bytes(pending)
+            pending.clear()
+    pending += compressor.flush()
+    if pending:
+        yield bytes(pending)
+
+
+def decompress_block(decompressor, data: bytes, limit: int) -> Iterator[bytes]:
+    """Rozpakowuje blok danych porcjami po co najwyżej limit bajtów (pamięć nie rośnie z kompresją)"""
+    try:
+        if hasattr(decompressor, 'unconsumed_tail'):
+            while data:
+                result = decompressor.decompress(data, limit)
+                data = decompressor.unconsumed_tail
+                yield result
+            return
+        yield decompressor.decompress(data, limit)
+        while not decompressor.eof and not decompressor.needs_input:
+            yield decompressor.decompress(b'', limit)
+    except Exception as e:
+        raise DecryptionError(f"Uszkodzone dane skompresowane: {e}")
+
+
+def finish(decompressor) -> bytes:
+    """Zwraca resztę danych po ostatnim bloku i sprawdza, czy strumień skompresowany jest kompletny"""
+    if hasattr(decompressor, 'unconsumed_tail'):
+        try:
+            rest = decompressor.flush()
+        except zlib.error as e:
+            raise DecryptionError(f"Uszkodzone dane skompresowane: {e}")
+        if not decompressor.eof:
+            raise DecryptionError("Strumień skompresowany jest niekompletny")
+        return rest
+    if not decompressor.eof:
+        raise DecryptionError("Strumień skompresowany jest niekompletny")
+    return b''
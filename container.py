@@ -0,0 +1,371 @@
+import hashlib
+import json
+import os
+import struct
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from typing import List, Optional, Tuple
+
+from cipher import Cipher, CIPHERS, DEFAULT_CHUNK_SIZE
+from exceptions import ContainerError, InvalidKeyError, FileOperationError
+
+# Układ pliku kontenera:
+#   nagłówek:  MAGIC, wersja (1 bajt), długość JSON (4 bajty), JSON z parametrami szyfru
+#   kawałki:   niezależnie zaszyfrowane kawałki danych (każdy od początku klucza)
+#   indeks:    dla każdego kawałka (pozycja w pliku, długość zapisana, długość jawna)
+#   stopka:    pozycja indeksu, liczba kawałków, INDEX_MAGIC
+# Dopisywanie zapisuje nowe kawałki i indeks za starą stopką, utrwala je (fsync), a dopiero potem zapisuje
+# nową stopkę. Po wyjątku plik jest przycinany do poprzedniej długości; po przerwaniu procesu lub utracie
+# zasilania na końcu zostaje niepełny zapis - odczyt cofa się wtedy do ostatniej poprawnej stopki, a kolejne
+# dopisywanie go nadpisuje. Stare indeksy zostają jako nieużywane miejsce (update_container przepisuje
+# plik, gdy jest go za dużo).
+MAGIC = b'SZYFRCNT'
+INDEX_MAGIC = b'SZYFRIDX'
+# Wersja 2: skrót klucza z losową solą pliku (PBKDF2); wersja 1 (skrót bez soli) jest nadal czytana
+VERSION = 2
+_READABLE_VERSIONS = (1, 2)
+SALT_SIZE = 16
+FINGERPRINT_ITERATIONS = 100_000
+_HEADER_PREFIX = struct.Struct('>8sBI')
+_INDEX_ENTRY = struct.Struct('>QII')
+_FOOTER = struct.Struct('>QI8s')
+# Blok, którym szukana jest poprzednia stopka, gdy plik kończy się niepełnym dopisaniem
+_RECOVERY_BLOCK = 1 << 20
+
+
+def cipher_name(cipher: Cipher) -> str:
+    """Zwraca nazwę rodzaju szyfru z rejestru CIPHERS"""
+    for name, cipher_class in CIPHERS.items():
+        if type(cipher) is cipher_class:
+            return name
+    raise ContainerError(f"Szyfr {cipher.__class__.__name__} nie jest zarejestrowany w CIPHERS")
+
+
+def new_salt() -> bytes:
+    return os.urandom(SALT_SIZE)
+
+
+def key_fingerprint(cipher: Cipher, salt: bytes, iterations: int = FINGERPRINT_ITERATIONS) -> str:
+    """Skrót klucza pozwalający wykryć próbę odczytu złym kluczem.
+
+    Sól jest losowa dla każdego pliku, a PBKDF2 spowalnia zgadywanie, więc zapisany jawnie skrót
+    nie jest gotową wyrocznią do łamania krótkich kluczy.
+    """
+    return _derive_fingerprint(cipher_name(cipher), cipher.key, bytes(salt), iterations)
+
+
+@lru_cache(maxsize=64)
+def _derive_fingerprint(name: str, key: str, salt: bytes, iterations: int) -> str:
+    # Ten sam plik otwierany wielokrotnie (np. odczyt i zapis przy edycji) nie powtarza wyprowadzenia
+    return hashlib.pbkdf2_hmac('sha256', f"{name}:{key}".encode('utf-8'), salt, iterations).hex()[:32]
+
+
+def _legacy_fingerprint(cipher: Cipher) -> str:
+    """Skrót klucza bez soli z kontenerów w wersji 1"""
+    return hashlib.sha256(f"{cipher_name(cipher)}:{cipher.key}".encode('utf-8')).hexdigest()[:16]
+
+
+def _check_key(header: dict, version: int, cipher: Cipher) -> None:
+    if header['cipher'] != cipher_name(cipher):
+        raise InvalidKeyError(f"Kontener został zaszyfrowany szyfrem {header['cipher']}")
+    if version == 1:
+        expected = _legacy_fingerprint(cipher)
+    else:
+        expected = key_fingerprint(cipher, bytes.fromhex(header['salt']), header['iterations'])
+    if header['key_fingerprint'] != expected:
+        raise InvalidKeyError("Klucz nie pasuje do kontenera")
+
+
+def is_container(filename: str) -> bool:
+    try:
+        with open(filename, 'rb') as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except (IOError, OSError):
+        return False
+
+
+def _read_layout(file, cipher: Cipher) -> Tuple[dict, List[Tuple[int, int, int]], int, int]:
+    """Wczytuje nagłówek i indeks; zwraca (parametry, indeks, początek kawałków, pozycja indeksu)"""
+    prefix = file.read(_HEADER_PREFIX.size)
+    if len(prefix) < _HEADER_PREFIX.size:
+        raise ContainerError("Plik jest za krótki, aby był kontenerem")
+    magic, version, header_size = _HEADER_PREFIX.unpack(prefix)
+    if magic != MAGIC:
+        raise ContainerError("Plik nie jest kontenerem szyfratora")
+    if version not in _READABLE_VERSIONS:
+        raise ContainerError(f"Nieobsługiwana wersja kontenera: {version}")
+    try:
+        header = json.loads(file.read(header_size).decode('utf-8'))
+        _check_key(header, version, cipher)
+        header['chunk_size'] = int(header['chunk_size'])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ContainerError(f"Uszkodzony nagłówek kontenera: {type(e).__name__}: {e}")
+    data_start = file.tell()
+    index, index_offset = _find_index(file, data_start)
+    return header, index, data_start, index_offset
+
+
+def _index_at(file, footer_position: int, data_start: int) -> Optional[List[Tuple[int, int, int]]]:
+    """Zwraca indeks, jeśli na danej pozycji jest poprawna stopka (wskazująca indeks tuż przed nią)"""
+    if footer_position < data_start:
+        return None
+    file.seek(footer_position)
+    footer = file.read(_FOOTER.size)
+    if len(footer) < _FOOTER.size:
+        return None
+    index_offset, count, index_magic = _FOOTER.unpack(footer)
+    if index_magic != INDEX_MAGIC or index_offset < data_start \
+            or index_offset + count * _INDEX_ENTRY.size != footer_position:
+        return None
+    file.seek(index_offset)
+    index = list(_INDEX_ENTRY.iter_unpack(file.read(count * _INDEX_ENTRY.size)))
+    if any(offset < data_start or offset + stored_length > index_offset for offset, stored_length, _ in index):
+        return None
+    return index
+
+
+def _find_index(file, data_start: int) -> Tuple[List[Tuple[int, int, int]], int]:
+    """Wczytuje indeks ze stopki na końcu pliku; po przerwanym dopisywaniu - z ostatniej poprawnej stopki"""
+    end = file.seek(0, os.SEEK_END)
+    index = _index_at(file, end - _FOOTER.size, data_start)
+    if index is not None:
+        return index, end - _FOOTER.size - len(index) * _INDEX_ENTRY.size
+    # Szukanie wstecz, blokami zachodzącymi na siebie o długość znacznika
+    position = end
+    while position > data_start:
+        start = max(data_start, position - _RECOVERY_BLOCK)
+        file.seek(start)
+        block = file.read(position - start + len(INDEX_MAGIC) - 1)
+        found = len(block)
+        while True:
+            found = block.rfind(INDEX_MAGIC, 0, found + len(INDEX_MAGIC) - 1)
+            if found < 0:
+                break
+            footer_position = start + found + len(INDEX_MAGIC) - _FOOTER.size
+            index = _index_at(file, footer_position, data_start)
+            if index is not None:
+                return index, footer_position - len(index) * _INDEX_ENTRY.size
+        position = start
+    raise ContainerError("Brak indeksu kawałków - kontener jest uszkodzony lub niezamknięty")
+
+
+class ContainerWriter:
+    """Zapisuje dane do kontenera kawałkami o stałym rozmiarze"""
+
+    def __init__(self, filename: str, cipher: Cipher, chunk_size: int = DEFAULT_CHUNK_SIZE, append: bool = False):
+        self.cipher = cipher
+        self.chunk_size = chunk_size
+        self.filename = filename
+        self._pending = bytearray()
+        # Długość pliku przed dopisywaniem (None dla nowego kontenera) - do niej wraca abort()
+        self._original_size = None
+        try:
+            if append and os.path.exists(filename):
+                self._file = open(filename, 'r+b')
+                header, self._index, _, index_offset = _read_layout(self._file, cipher)
+                self.chunk_size = header['chunk_size']
+                # Stary indeks i stopka zostają nietknięte, dopóki nie zostanie zapisana nowa stopka;
+                # niepełny zapis po przerwanym dopisywaniu (za ostatnią stopką) jest nadpisywany
+                self._original_size = index_offset + len(self._index) * _INDEX_ENTRY.size + _FOOTER.size
+                self._file.seek(self._original_size)
+            else:
+                self._file = open(filename, 'wb')
+                self._index = []
+                salt = new_salt()
+                header = json.dumps({
+                    'cipher': cipher_name(cipher),
+                    'salt': salt.hex(),
+                    'iterations': FINGERPRINT_ITERATIONS,
+                    'key_fingerprint': key_fingerprint(cipher, salt),
+                    'chunk_size': chunk_size,
+                }).encode('utf-8')
+                self._file.write(_HEADER_PREFIX.pack(MAGIC, VERSION, len(header)) + header)
+        except (IOError, OSError) as e:
+            raise FileOperationError(f"Błąd podczas otwierania kontenera: {e}")
+
+    def write(self, data: bytes) -> int:
+        self._pending += data
+        while len(self._pending) >= self.chunk_size:
+            self.write_chunk(bytes(self._pending[:self.chunk_size]))
+            del self._pending[:self.chunk_size]
+        return len(data)
+
+    def write_chunk(self, plain: bytes) -> None:
+        """Szyfruje i zapisuje jeden kawałek (niezależny od pozostałych)"""
+        self.write_encrypted_chunk(self.cipher._encrypt_chunk(plain, 0), len(plain))
+
+    def write_encrypted_chunk(self, stored: bytes, plain_length: int) -> None:
+        """Zapisuje gotowy, zaszyfrowany kawałek"""
+        offset = self._file.tell()
+        self._file.write(stored)
+        self._index.append((offset, len(stored), plain_length))
+
+    def close(self) -> None:
+        """Zapisuje ostatni niepełny kawałek, indeks i stopkę"""
+        if self._file.closed:
+            return
+        if self._pending:
+            self.write_chunk(bytes(self._pending))
+            self._pending.clear()
+        index_offset = self._file.tell()
+        self._file.write(b''.join(_INDEX_ENTRY.pack(*entry) for entry in self._index))
+        if self._original_size is not None:
+            # Istniejący dokument: kawałki i indeks muszą być na dysku przed stopką, która je wskazuje,
+            # a stopka - zanim plik uznamy za zapisany
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._file.write(_FOOTER.pack(index_offset, len(self._index), INDEX_MAGIC))
+        if self._original_size is not None:
+            self._file.truncate()
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._file.close()
+
+    def abort(self) -> None:
+        """Porzuca zapis: przy dopisywaniu przywraca poprzednią zawartość, nowy plik jest usuwany"""
+        if self._file.closed:
+            return
+        try:
+            if self._original_size is not None:
+                self._file.truncate(self._original_size)
+            self._file.close()
+        finally:
+            if self._original_size is None and os.path.exists(self.filename):
+                os.remove(self.filename)
+
+    def __enter__(self) -> 'ContainerWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _read_chunk(cipher: Optional[Cipher], filename: str, data_offset: int, stored_length: int) -> bytes:
+    """Czyta i deszyfruje jeden kawałek; funkcja modułu, więc działa także w puli procesów"""
+    from cipher import _worker_cipher
+    cipher = cipher or _worker_cipher
+    with open(filename, 'rb') as file:
+        file.seek(data_offset)
+        return cipher._decrypt_chunk(file.read(stored_length), 0)
+
+
+class ContainerReader:
+    """Odczyt kontenera z deszyfrowaniem tylko potrzebnych kawałków"""
+
+    def __init__(self, filename: str, cipher: Cipher):
+        self.filename = filename
+        self.cipher = cipher
+        try:
+            with open(filename, 'rb') as file:
+                self.header, self.index, self.data_start, self.index_offset = _read_layout(file, cipher)
+        except (IOError, OSError, ValueError, struct.error) as e:
+            raise ContainerError(f"Błąd podczas odczytu kontenera: {e}")
+        # Pozycje początków kawałków w danych jawnych
+        self.plain_offsets = [0] + list(accumulate(length for _, _, length in self.index))
+        self.size = self.plain_offsets[-1]
+
+    def chunk(self, number: int) -> bytes:
+        """Zwraca odszyfrowany kawałek o danym numerze"""
+        data_offset, stored_length, _ = self.index[number]
+        return _read_chunk(self.cipher, self.filename, data_offset, stored_length)
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        """Odczytuje length bajtów od pozycji offset, deszyfrując tylko kawałki z tego zakresu"""
+        if offset < 0 or length < 0:
+            raise ValueError("Pozycja i długość nie mogą być ujemne")
+        end = min(self.size, offset + length)
+        if offset >= end:
+            return b''
+        first = bisect_right(self.plain_offsets, offset) - 1
+        last = bisect_right(self.plain_offsets, end - 1) - 1
+        data = b''.join(self.chunk(number) for number in range(first, last + 1))
+        start = offset - self.plain_offsets[first]
+        return data[start:start + end - offset]
+
+    def read_all(self, workers: int = 1, use_threads: bool = False) -> bytes:
+        """Deszyfruje cały kontener; przy workers > 1 kawałki są deszyfrowane równolegle"""
+        if workers <= 1 or len(self.index) <= 1:
+            return b''.join(self.chunk(number) for number in range(len(self.index)))
+        executor, cipher = self.cipher._parallel_executor(workers, use_threads)
+        with executor:
+            futures = [executor.submit(_read_chunk, cipher, self.filename, data_offset, stored_length)
+                       for data_offset, stored_length, _ in self.index]
+            return b''.join(future.result() for future in futures)
+
+    def decrypt_to(self, dst) -> int:
+        """Zapisuje odszyfrowaną zawartość do strumienia binarnego, kawałek po kawałku"""
+        for number in range(len(self.index)):
+            dst.write(self.chunk(number))
+        return self.size
+
+
+def update_container(filename: str, cipher: Cipher, data: bytes, old_data: Optional[bytes] = None) -> int:
+    """Zapisuje nową zawartość kontenera, szyfrując tylko kawałki, które się zmieniły.
+
+    Niezmienione kawałki z początku i końca zostają na swoich miejscach w pliku (każdy kawałek
+    jest szyfrowany od początku klucza, więc nie zależy od pozycji), nowe kawałki i nowy indeks są
+    dopisywane na końcu pliku. Gdy nieużywane kawałki i stare indeksy zajmują więcej niż połowę
+    pliku, kontener jest zapisywany od nowa. Zwraca liczbę zaszyfrowanych kawałków.
+    """
+    reader = ContainerReader(filename, cipher)
+    index, starts = reader.index, reader.plain_offsets
+    if old_data is None:
+        old_data = reader.read_all()
+    shift = len(data) - reader.size
+
+    first = 0
+    while first < len(index) and data[starts[first]:starts[first + 1]] == old_data[starts[first]:starts[first + 1]]:
+        first += 1
+    last = len(index)
+    while (last > first and starts[last - 1] + shift >= starts[first]
+           and data[starts[last - 1] + shift:starts[last] + shift] == old_data[starts[last - 1]:starts[last]]):
+        last -= 1
+    changed = data[starts[first]:starts[last] + shift]
+    if first == last and not changed:
+        return 0
+
+    chunk_size = reader.header['chunk_size']
+    kept = index[:first] + index[last:]
+    live = sum(stored_length for _, stored_length, _ in kept) + len(changed)
+    if reader.index_offset - reader.data_start + len(changed) > 2 * live:
+        temp_filename = filename + '.tmp'
+        with ContainerWriter(temp_filename, cipher, chunk_size) as writer:
+            writer.write(data)
+        os.replace(temp_filename, filename)
+        return -(-len(data) // chunk_size)
+
+    # Wyjątek przywraca plik do poprzedniej postaci; po przerwaniu procesu odczyt wraca do starej stopki
+    with ContainerWriter(filename, cipher, chunk_size, append=True) as writer:
+        writer._index = index[:first]
+        for start in range(0, len(changed), chunk_size):
+            writer.write_chunk(changed[start:start + chunk_size])
+        writer._index.extend(index[last:])
+    return -(-len(changed) // chunk_size)
+
+
+def pack_file(cipher: Cipher, src_filename: str, dst_filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+              append: bool = False) -> int:
+    """Szyfruje plik do kontenera (albo dopisuje go na końcu istniejącego); zwraca liczbę bajtów"""
+    written = 0
+    try:
+        with open(src_filename, 'rb') as src, ContainerWriter(dst_filename, cipher, chunk_size, append) as writer:
+            for block in iter(lambda: src.read(writer.chunk_size), b''):
+                writer.write(block)
+                written += len(block)
+    except (IOError, OSError) as e:
+        raise FileOperationError(f"Błąd podczas zapisu kontenera: {e}")
+    return written
+
+
+def unpack_file(cipher: Cipher, src_filename: str, dst_filename: str) -> int:
+    """Deszyfruje cały kontener do zwykłego pliku; zwraca liczbę bajtów"""
+    reader = ContainerReader(src_filename, cipher)
+    try:
+        with open(dst_filename, 'wb') as dst:
+            return reader.decrypt_to(dst)
+    except (IOError, OSError) as e:
+        raise FileOperationError(f"Błąd podczas odczytu kontenera: {e}")
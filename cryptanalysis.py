@@ -0,0 +1,285 @@
+import argparse
+import base64
+import binascii
+import math
+import os
+import string
+import sys
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from cipher import CaesarCipher, _numpy
+from exceptions import DecryptionError, FileOperationError
+
+# Częstości liter a-z w procentach; tabele są normalizowane przy użyciu
+LETTER_FREQUENCIES: Dict[str, Sequence[float]] = {
+    'polish': (8.91, 1.47, 3.96, 3.25, 7.66, 0.30, 1.42, 1.08, 8.21, 2.28, 3.51, 2.10, 2.80,
+               5.52, 7.75, 3.13, 0.14, 4.69, 4.32, 3.98, 2.50, 0.04, 4.65, 0.02, 3.76, 5.64),
+    'english': (8.167, 1.492, 2.782, 4.253, 12.702, 2.228, 2.015, 6.094, 6.966, 0.153, 0.772, 4.025, 2.406,
+                6.749, 7.507, 1.929, 0.095, 5.987, 6.327, 9.056, 2.758, 0.978, 2.360, 0.150, 1.974, 0.074),
+}
+
+# Szyfr Cezara przesuwa małe litery spoza ASCII tak jak literę (kod - ord('a')) % 26,
+# więc ich częstości dodawane są do odpowiadających im liter a-z (np. ą zachowuje się jak i)
+POLISH_DIACRITICS = {'ą': 0.99, 'ć': 0.40, 'ę': 1.11, 'ł': 1.82, 'ń': 0.20, 'ó': 0.85, 'ś': 0.66, 'ź': 0.06, 'ż': 0.83}
+
+
+def _with_diacritics(frequencies: Sequence[float], diacritics: Dict[str, float]) -> List[float]:
+    folded = list(frequencies)
+    for char, frequency in diacritics.items():
+        folded[(ord(char) - ord('a')) % 26] += frequency
+    return folded
+
+
+LETTER_FREQUENCIES['polish'] = _with_diacritics(LETTER_FREQUENCIES['polish'], POLISH_DIACRITICS)
+
+# Próbka, powyżej której histogram liczony jest z równomiernie rozłożonych bloków danych
+DEFAULT_SAMPLE_SIZE = 1 << 20
+SAMPLE_BLOCKS = 64
+
+_LOWER = string.ascii_lowercase.encode('ascii')
+_FOLD_CASE = bytes.maketrans(string.ascii_uppercase.encode('ascii'), _LOWER)
+
+
+def _normalized(frequencies: Sequence[float]) -> List[float]:
+    total = sum(frequencies)
+    return [frequency / total for frequency in frequencies]
+
+
+def _sample_ranges(size: int, sample_size: Optional[int]) -> List[Tuple[int, int]]:
+    """Zakresy do przeanalizowania: całe dane albo SAMPLE_BLOCKS równomiernie rozłożonych bloków"""
+    if sample_size is None or size <= sample_size:
+        return [(0, size)]
+    block = max(1, sample_size // SAMPLE_BLOCKS)
+    step = (size - block) // (SAMPLE_BLOCKS - 1)
+    if step < block:
+        return [(0, size)]
+    return [(start, start + block) for start in range(0, step * SAMPLE_BLOCKS, step)]
+
+
+def _sample(data: Union[str, bytes], sample_size: Optional[int]) -> Union[str, bytes]:
+    ranges = _sample_ranges(len(data), sample_size)
+    if len(ranges) == 1:
+        return data
+    return data[:0].join(data[start:end] for start, end in ranges)
+
+
+def letter_histogram(data: Union[str, bytes], sample_size: Optional[int] = DEFAULT_SAMPLE_SIZE) -> List[int]:
+    """Liczy wystąpienia liter a-z (bez rozróżniania wielkości) jednym histogramem"""
+    sample = _sample(data, sample_size)
+    if isinstance(sample, str):
+        sample = sample.encode('ascii', 'ignore')
+    sample = bytes(sample)
+    numpy = _numpy()
+    if numpy is not None:
+        counts = numpy.bincount(numpy.frombuffer(sample, dtype=numpy.uint8), minlength=256)
+        return [int(counts[code]) + int(counts[code - 32]) for code in _LOWER]
+    folded = sample.translate(_FOLD_CASE)
+    return [folded.count(code) for code in _LOWER]
+
+
+def file_histogram(filename: str, sample_size: Optional[int] = DEFAULT_SAMPLE_SIZE) -> List[int]:
+    """Histogram liter pliku; duże pliki są próbkowane przez odczyt kilkudziesięciu bloków, a nie całości"""
+    try:
+        with open(filename, 'rb') as file:
+            parts = []
+            for start, end in _sample_ranges(os.fstat(file.fileno()).st_size, sample_size):
+                file.seek(start)
+                parts.append(file.read(end - start))
+            return letter_histogram(b''.join(parts), None)
+    except (IOError, OSError) as e:
+        raise FileOperationError(f"Błąd podczas odczytu pliku: {e}")
+
+
+def chi_squared(counts: Sequence[int], frequencies: Sequence[float], shift: int = 0) -> float:
+    """Chi-kwadrat histogramu przesuniętego o shift (czyli tekstu odszyfrowanego tym przesunięciem)"""
+    total = sum(counts)
+    if not total:
+        return float('inf')
+    score = 0.0
+    for letter, frequency in enumerate(frequencies):
+        expected = total * frequency
+        observed = counts[(letter + shift) % 26]
+        score += (observed - expected) ** 2 / expected
+    return score
+
+
+def rank_shifts(counts: Sequence[int], languages: Iterable[str] = ('polish', 'english')) -> List[Tuple[int, float, str]]:
+    """Ocenia wszystkie 26 przesunięć na podstawie histogramu; zwraca (przesunięcie, wynik, język) od najlepszego"""
+    ranking = []
+    tables = {language: _normalized(LETTER_FREQUENCIES[language]) for language in languages}
+    for shift in range(26):
+        score, language = min((chi_squared(counts, frequencies, shift), language)
+                              for language, frequencies in tables.items())
+        ranking.append((shift, score, language))
+    ranking.sort(key=lambda item: item[1])
+    return ranking
+
+
+def rank_caesar_shifts(data: Union[str, bytes], languages: Iterable[str] = ('polish', 'english'),
+                       sample_size: Optional[int] = DEFAULT_SAMPLE_SIZE) -> List[Tuple[int, float, str]]:
+    """Ranking przesunięć szyfru Cezara dla szyfrogramu - bez deszyfrowania go dla każdego kandydata"""
+    return rank_shifts(letter_histogram(data, sample_size), languages)
+
+
+def crack_caesar(data: Union[str, bytes], languages: Iterable[str] = ('polish', 'english'),
+                 sample_size: Optional[int] = DEFAULT_SAMPLE_SIZE) -> CaesarCipher:
+    """Zwraca szyfr Cezara z najbardziej prawdopodobnym przesunięciem"""
+    shift = rank_caesar_shifts(data, languages, sample_size)[0][0]
+    return CaesarCipher.from_shift(shift)
+
+
+# Łamanie XOR z powtarzanym kluczem
+
+MAX_XOR_KEY_LENGTH = 40
+# Długość klucza szacowana jest na początkowym fragmencie szyfrogramu
+KEY_LENGTH_SAMPLE = 64 << 10
+
+
+@lru_cache(maxsize=None)
+def _byte_log_weights() -> Tuple[float, ...]:
+    """Logarytmy prawdopodobieństw bajtów w typowym tekście (polskim lub angielskim, UTF-8)"""
+    letters = [(polish + english) / 2 for polish, english in
+               zip(_normalized(LETTER_FREQUENCIES['polish']), _normalized(LETTER_FREQUENCIES['english']))]
+    probabilities = [1e-6] * 256
+    for code in range(32, 127):
+        probabilities[code] = 5e-4
+    for code in range(0x80, 0x100):
+        probabilities[code] = 2e-4  # bajty wielobajtowych znaków UTF-8 (polskie litery)
+    for index, frequency in enumerate(letters):
+        probabilities[ord('a') + index] = 0.70 * frequency
+        probabilities[ord('A') + index] = 0.03 * frequency
+    for char in '.,!?;:\'"-()':
+        probabilities[ord(char)] = 4e-3
+    for char in string.digits:
+        probabilities[ord(char)] = 3e-3
+    probabilities[ord(' ')] = 0.15
+    probabilities[ord('\n')] = 0.01
+    probabilities[ord('\r')] = probabilities[ord('\t')] = 1e-3
+    total = sum(probabilities)
+    return tuple(math.log(probability / total) for probability in probabilities)
+
+
+def _as_ciphertext(data: Union[str, bytes]) -> bytes:
+    """Tekst traktowany jest jako wynik XORCipher.encrypt (base64), bajty - jako surowy szyfrogram"""
+    if isinstance(data, str):
+        try:
+            return base64.b64decode(data.encode('ascii'), validate=True)
+        except (ValueError, binascii.Error) as e:
+            raise DecryptionError(f"Szyfrogram nie jest poprawnym base64: {e}")
+    return bytes(data)
+
+
+def _column_histograms(data: bytes, key_length: int) -> List[List[int]]:
+    """Histogram bajtów każdej kolumny data[j::key_length]"""
+    numpy = _numpy()
+    if numpy is not None:
+        array = numpy.frombuffer(data, dtype=numpy.uint8)
+        return [numpy.bincount(array[column::key_length], minlength=256).tolist() for column in range(key_length)]
+    histograms = []
+    for column in range(key_length):
+        counts = [0] * 256
+        for byte, count in Counter(data[column::key_length]).items():
+            counts[byte] = count
+        histograms.append(counts)
+    return histograms
+
+
+def index_of_coincidence(histogram: Sequence[int]) -> float:
+    total = sum(histogram)
+    if total < 2:
+        return 0.0
+    return sum(count * (count - 1) for count in histogram) / (total * (total - 1))
+
+
+def estimate_xor_key_length(data: Union[str, bytes], max_length: int = MAX_XOR_KEY_LENGTH,
+                            sample_size: int = KEY_LENGTH_SAMPLE) -> List[Tuple[int, float]]:
+    """Ranking długości klucza według średniego indeksu zgodności kolumn.
+
+    XOR kolumny ze stałym bajtem tylko permutuje jej histogram, więc przy właściwej długości
+    indeks jest taki jak dla tekstu jawnego. Wielokrotności długości klucza wypadają podobnie,
+    dlatego na początek trafia najkrótsza długość z wynikiem co najmniej 90% najlepszego.
+    """
+    sample = _as_ciphertext(data)[:sample_size]
+    scores = []
+    for key_length in range(1, min(max_length, len(sample) // 2) + 1):
+        histograms = _column_histograms(sample, key_length)
+        scores.append((key_length, sum(map(index_of_coincidence, histograms)) / key_length))
+    if not scores:
+        return [(1, 0.0)]
+    best = max(score for _, score in scores)
+    chosen = next(item for item in scores if item[1] >= 0.9 * best)
+    return [chosen] + sorted((item for item in scores if item is not chosen), key=lambda item: -item[1])
+
+
+def _solve_columns(histograms: List[List[int]]) -> bytes:
+    """Dla każdej kolumny wybiera bajt klucza, przy którym odszyfrowana kolumna najbardziej przypomina tekst"""
+    weights = _byte_log_weights()
+    numpy = _numpy()
+    if numpy is not None:
+        codes = numpy.arange(256)
+        # scores[kolumna, k] = suma po c: histogram[c] * waga[c ^ k]
+        weight_matrix = numpy.asarray(weights)[codes[:, None] ^ codes[None, :]]
+        scores = numpy.asarray(histograms, dtype=float) @ weight_matrix
+        return bytes(int(key_byte) for key_byte in scores.argmax(axis=1))
+    key = bytearray()
+    for histogram in histograms:
+        present = [(byte, count) for byte, count in enumerate(histogram) if count]
+        key.append(max(range(256), key=lambda k: sum(count * weights[byte ^ k] for byte, count in present)))
+    return bytes(key)
+
+
+def solve_xor_key(data: Union[str, bytes], key_length: int,
+                  sample_size: Optional[int] = DEFAULT_SAMPLE_SIZE) -> bytes:
+    """Odzyskuje klucz o znanej długości, rozwiązując każdą kolumnę niezależnie"""
+    data = _as_ciphertext(data)
+    if sample_size is not None and len(data) > sample_size:
+        # Próbka z bloków zaczynających się na granicy klucza - kolumny pozostają wyrównane
+        # (początek i długość każdego bloku są wielokrotnościami długości klucza)
+        parts = []
+        for start, end in _sample_ranges(len(data), sample_size):
+            start -= start % key_length
+            parts.append(data[start:start + max(key_length, (end - start) // key_length * key_length)])
+        data = b''.join(parts)
+    # Jeden proces: histogramy próbki (NumPy) liczą się w milisekundach, krócej niż start puli procesów
+    return _solve_columns(_column_histograms(data, key_length))
+
+
+def crack_xor(data: Union[str, bytes], max_length: int = MAX_XOR_KEY_LENGTH,
+              sample_size: Optional[int] = DEFAULT_SAMPLE_SIZE) -> bytes:
+    """Odzyskuje powtarzany klucz XOR z szyfrogramu (base64 z XORCipher.encrypt albo surowe bajty).
+
+    Zwraca klucz w bajtach: dla trybu tekstowego to key.encode('latin-1'), dla binarnego key.encode('utf-8').
+    """
+    data = _as_ciphertext(data)
+    key_length = estimate_xor_key_length(data, max_length)[0][0]
+    return solve_xor_key(data, key_length, sample_size)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Kryptoanaliza szyfrogramów")
+    parser.add_argument('filename', help="Plik z szyfrogramem")
+    parser.add_argument('--cipher', choices=('caesar', 'xor'), default='caesar')
+    parser.add_argument('--top', type=int, default=5, help="Liczba najlepszych kandydatów (Cezar)")
+    parser.add_argument('--sample-size', type=int, default=DEFAULT_SAMPLE_SIZE,
+                        help="Rozmiar próbki w bajtach (0 - cały plik)")
+    parser.add_argument('--armor', action='store_true', help="Szyfrogram XOR zapisany w base64")
+    args = parser.parse_args(argv)
+    if args.cipher == 'caesar':
+        counts = file_histogram(args.filename, args.sample_size or None)
+        for shift, score, language in rank_shifts(counts)[:args.top]:
+            print(f"przesunięcie {shift:2d}  chi2 {score:12.1f}  ({language})")
+        return 0
+    try:
+        with open(args.filename, 'rb') as file:
+            data = file.read()
+    except (IOError, OSError) as e:
+        raise FileOperationError(f"Błąd podczas odczytu pliku: {e}")
+    key = crack_xor(data.decode('ascii') if args.armor else data, sample_size=args.sample_size or None)
+    print(f"Klucz ({len(key)} B): {key!r}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,378 @@
+import argparse
+import base64
+import functools
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from cipher import CIPHERS, _numpy
+from exceptions import CipherError, EncryptionError, DecryptionError, FileOperationError
+
+# Rejestr implementacji (silników) każdego szyfru dla tekstu i bajtów. Kalibracja (python engines.py
+# --calibrate) mierzy silniki na danych kilku rozmiarów, sprawdza ich wyniki z implementacją wzorcową
+# (znak po znaku) i wyznacza progi rozmiaru, od których opłaca się kolejny silnik. Wynik jest zapisywany
+# na dysku osobno dla każdej maszyny i wersji Pythona. Bez zapisanej kalibracji obowiązują STATIC_PLANS -
+# szyfrowanie nigdy nie uruchamia kalibracji samo.
+ENGINES_VERSION = 2
+CALIBRATION_SIZES = (16, 256, 4096, 1 << 16, 1 << 20)
+# Powyżej tego rozmiaru wynik wzorcowy jest liczony silnikiem domyślnym (sprawdzonym na mniejszych danych)
+REFERENCE_LIMIT = 1 << 16
+# Silnik wolniejszy od najlepszego więcej niż tyle razy nie jest mierzony na większych danych
+_PRUNE_FACTOR = 20
+# Silnik zastępuje domyślny tylko wtedy, gdy jest wyraźnie szybszy (a nie w granicach szumu pomiaru)
+_MARGIN = 0.9
+_MEASURE_BUDGET = 0.002
+
+REFERENCE = 'reference'
+DEFAULT = 'default'
+
+# Plany bez kalibracji (w formacie calibrate()['plans']); szyfry spoza listy używają metod domyślnych.
+# Silnik niedostępny na tej maszynie (np. bez NumPy) jest zastępowany domyślnym.
+STATIC_PLANS = {
+    'xor/bytes': {'limits': [1024], 'engines': ['int', 'numpy']},
+    'reverse/bytes': {'limits': [1024], 'engines': [DEFAULT, 'numpy']},
+}
+
+
+class Engine(NamedTuple):
+    name: str
+    run: Callable  # run(szyfr, dane, encrypt) -> wynik
+    available: Callable[[], bool] = lambda: True
+
+
+def _checked(function: Callable) -> Callable:
+    """Błędy silnika są zgłaszane tak samo jak w domyślnej implementacji szyfru"""
+    @functools.wraps(function)
+    def run(cipher, data, encrypt: bool):
+        try:
+            return function(cipher, data, encrypt)
+        except CipherError:
+            raise
+        except Exception as e:
+            if encrypt:
+                raise EncryptionError(f"Błąd podczas szyfrowania: {e}")
+            raise DecryptionError(f"Błąd podczas deszyfrowania: {e}")
+    return run
+
+
+def _default_text(cipher, text: str, encrypt: bool) -> str:
+    return cipher._encrypt(text) if encrypt else cipher._decrypt(text)
+
+
+def _default_bytes(cipher, data: bytes, encrypt: bool) -> bytes:
+    return cipher._encrypt_bytes(data) if encrypt else cipher._decrypt_bytes(data)
+
+
+# Implementacje wzorcowe - pierwotne pętle znak po znaku
+
+@_checked
+def caesar_reference(cipher, data, encrypt: bool):
+    shift = cipher.shift if encrypt else -cipher.shift
+    if isinstance(data, str):
+        result = []
+        for char in data:
+            if char.isalpha():
+                base = ord('a') if char.islower() else ord('A')
+                result.append(chr(((ord(char) - base + shift) % 26) + base))
+            else:
+                result.append(char)
+        return ''.join(result)
+    result = bytearray()
+    for byte in bytes(data):
+        if 97 <= byte <= 122:
+            byte = (byte - 97 + shift) % 26 + 97
+        elif 65 <= byte <= 90:
+            byte = (byte - 65 + shift) % 26 + 65
+        result.append(byte)
+    return bytes(result)
+
+
+@_checked
+def xor_reference(cipher, data, encrypt: bool):
+    if isinstance(data, str):
+        key = cipher._text_stream().key
+        if encrypt:
+            codes = bytes(ord(char) ^ key[index % len(key)] for index, char in enumerate(data))
+            return base64.b64encode(codes).decode('ascii')
+        raw = base64.b64decode(data.encode('utf-8'))
+        return ''.join(chr(byte ^ key[index % len(key)]) for index, byte in enumerate(raw))
+    key = cipher._key_stream.key
+    return bytes(byte ^ key[index % len(key)] for index, byte in enumerate(bytes(data)))
+
+
+@_checked
+def vigenere_reference(cipher, data, encrypt: bool):
+    shifts = cipher.shifts if encrypt else [-shift for shift in cipher.shifts]
+    if isinstance(data, str):
+        result = []
+        for index, char in enumerate(data):
+            if char.isalpha():
+                base = ord('a') if char.islower() else ord('A')
+                char = chr(((ord(char) - base + shifts[index % len(shifts)]) % 26) + base)
+            result.append(char)
+        return ''.join(result)
+    result = bytearray()
+    for index, byte in enumerate(bytes(data)):
+        if 97 <= byte <= 122:
+            byte = (byte - 97 + shifts[index % len(shifts)]) % 26 + 97
+        elif 65 <= byte <= 90:
+            byte = (byte - 65 + shifts[index % len(shifts)]) % 26 + 65
+        result.append(byte)
+    return bytes(result)
+
+
+@_checked
+def reverse_reference(cipher, data, encrypt: bool):
+    if isinstance(data, str):
+        return ''.join(reversed(data))
+    return bytes(reversed(bytes(data)))
+
+
+# Silniki dla dużych buforów
+
+def _has_numpy() -> bool:
+    return _numpy() is not None
+
+
+@_checked
+def caesar_numpy(cipher, data, encrypt: bool) -> bytes:
+    numpy = _numpy()
+    table = cipher._encrypt_bytes_table if encrypt else cipher._decrypt_bytes_table
+    return numpy.frombuffer(table, dtype=numpy.uint8)[numpy.frombuffer(data, dtype=numpy.uint8)].tobytes()
+
+
+@_checked
+def xor_int(cipher, data, encrypt: bool) -> bytes:
+    return cipher._key_stream._xor_int(memoryview(data).cast('B'), 0)
+
+
+@_checked
+def xor_numpy(cipher, data, encrypt: bool) -> bytes:
+    return cipher._key_stream._xor_numpy(_numpy(), memoryview(data).cast('B'), 0)
+
+
+@_checked
+def reverse_numpy(cipher, data, encrypt: bool) -> bytes:
+    numpy = _numpy()
+    return numpy.frombuffer(data, dtype=numpy.uint8)[::-1].tobytes()
+
+
+@_checked
+def vigenere_translate(cipher, data, encrypt: bool) -> bytes:
+    return cipher._shift_translate(bytes(data), 0, encrypt)
+
+
+@_checked
+def vigenere_numpy(cipher, data, encrypt: bool) -> bytes:
+    return cipher._shift_numpy(_numpy(), bytes(data), 0, encrypt)
+
+
+# Bez silnika wieloprocesowego: pulę procesów tworzą tylko jawne encrypt_parallel/decrypt_parallel,
+# a nie zwykłe encrypt_bytes (np. z wątków serwera lub pętli benchmarku)
+ENGINES: Dict[Tuple[str, str], List[Engine]] = {
+    ('caesar', 'text'): [Engine(REFERENCE, caesar_reference), Engine(DEFAULT, _default_text)],
+    ('caesar', 'bytes'): [Engine(REFERENCE, caesar_reference), Engine(DEFAULT, _default_bytes),
+                          Engine('numpy', caesar_numpy, _has_numpy)],
+    ('xor', 'text'): [Engine(REFERENCE, xor_reference), Engine(DEFAULT, _default_text)],
+    ('xor', 'bytes'): [Engine(REFERENCE, xor_reference), Engine(DEFAULT, _default_bytes), Engine('int', xor_int),
+                       Engine('numpy', xor_numpy, _has_numpy)],
+    ('reverse', 'text'): [Engine(REFERENCE, reverse_reference), Engine(DEFAULT, _default_text)],
+    ('reverse', 'bytes'): [Engine(REFERENCE, reverse_reference), Engine(DEFAULT, _default_bytes),
+                           Engine('numpy', reverse_numpy, _has_numpy)],
+    ('vigenere', 'text'): [Engine(REFERENCE, vigenere_reference), Engine(DEFAULT, _default_text)],
+    ('vigenere', 'bytes'): [Engine(REFERENCE, vigenere_reference), Engine(DEFAULT, _default_bytes),
+                            Engine('translate', vigenere_translate), Engine('numpy', vigenere_numpy, _has_numpy)],
+}
+
+
+def register(cipher_name: str, kind: str, engine: Engine) -> None:
+    """Dodaje silnik szyfru; zostanie uwzględniony przy następnej kalibracji"""
+    ENGINES.setdefault((cipher_name, kind), [Engine(DEFAULT, _default_text if kind == 'text' else _default_bytes)])
+    ENGINES[(cipher_name, kind)].append(engine)
+
+
+def _sample(kind: str, size: int, rng: random.Random):
+    if kind == 'bytes':
+        return rng.randbytes(size)
+    # Litery ASCII, polskie znaki i znaki spoza liter; tylko Latin-1 dla XOR w trybie tekstowym
+    alphabet = "Ala ma kota, a kot ma Ale! 123 ZAŻÓŁĆ zażółć ÄÖÜ äöü"
+    return ''.join(rng.choices(alphabet, k=size))
+
+
+def _text_sample_for(cipher_name: str, text: str) -> str:
+    # XOR w trybie tekstowym obsługuje tylko znaki 0-255
+    return text.encode('latin-1', 'replace').decode('latin-1') if cipher_name == 'xor' else text
+
+
+def _timing(engine: Engine, cipher, data) -> float:
+    """Najkrótszy z trzech pomiarów średniego czasu jednego wywołania"""
+    start = time.perf_counter()
+    engine.run(cipher, data, True)
+    single = time.perf_counter() - start
+    repeats = max(1, min(10000, int(_MEASURE_BUDGET / max(single, 1e-7))))
+    best = single
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            engine.run(cipher, data, True)
+        best = min(best, (time.perf_counter() - start) / repeats)
+    return best
+
+
+def calibrate(sizes: Tuple[int, ...] = CALIBRATION_SIZES, key: str = "kalibracja", verbose: bool = False) -> dict:
+    """Mierzy dostępne silniki i zwraca plany wyboru: {'szyfr/rodzaj': {'limits': [...], 'engines': [...]}}.
+
+    Każdy silnik jest najpierw sprawdzany: jego wynik (szyfrowania i deszyfrowania) musi być identyczny
+    z implementacją wzorcową. Silniki z innym wynikiem trafiają do 'rejected' i nie są używane.
+    """
+    rng = random.Random(0)
+    plans, rejected = {}, []
+    for (cipher_name, kind), engines in ENGINES.items():
+        cipher = CIPHERS[cipher_name](key, collect_stats=False)
+        reference = next(engine for engine in engines if engine.name == REFERENCE)
+        default = next(engine for engine in engines if engine.name == DEFAULT)
+        candidates = [engine for engine in engines if engine.available()]
+        winners = []
+        for size in sizes:
+            data = _sample(kind, size, rng)
+            if kind == 'text':
+                data = _text_sample_for(cipher_name, data)
+            expected_engine = reference if size <= REFERENCE_LIMIT else default
+            expected = expected_engine.run(cipher, data, True)
+            expected_back = expected_engine.run(cipher, expected, False)
+            timings = {}
+            for engine in list(candidates):
+                if (engine.run(cipher, data, True) != expected
+                        or engine.run(cipher, expected, False) != expected_back):
+                    rejected.append(f"{cipher_name}/{kind}/{engine.name}")
+                    candidates.remove(engine)
+                    continue
+                timings[engine.name] = _timing(engine, cipher, data)
+            best = min(timings, key=timings.get)
+            # W granicach szumu zostaje silnik z mniejszego rozmiaru, a na początku domyślny
+            for preferred in (winners[-1] if winners else DEFAULT, DEFAULT):
+                if preferred in timings and timings[best] > _MARGIN * timings[preferred]:
+                    best = preferred
+                    break
+            winners.append(best)
+            for engine in list(candidates):
+                # Wzorzec służy do sprawdzania; na dużych danych nie jest już mierzony
+                if engine.name not in (best, DEFAULT) and (timings[engine.name] > _PRUNE_FACTOR * timings[best]
+                                                           or engine.name == REFERENCE and size >= REFERENCE_LIMIT):
+                    candidates.remove(engine)
+            if verbose:
+                ranking = sorted(timings.items(), key=lambda item: item[1])
+                print(f"{cipher_name}/{kind}/{size}: "
+                      + ", ".join(f"{name} {timing * 1e6:.1f} µs" for name, timing in ranking))
+
+        # Próg między rozmiarami, przy których wygrywają różne silniki: średnia geometryczna
+        limits, selected = [], [winners[0]]
+        for previous_size, size, winner in zip(sizes, sizes[1:], winners[1:]):
+            if winner != selected[-1]:
+                limits.append(int(math.sqrt(previous_size * size)))
+                selected.append(winner)
+        plans[f"{cipher_name}/{kind}"] = {'limits': limits, 'engines': selected}
+    return {'version': ENGINES_VERSION, 'plans': plans, 'rejected': rejected}
+
+
+def cache_filename() -> str:
+    """Plik kalibracji dla tej maszyny i wersji Pythona"""
+    directory = os.environ.get('SZYFRATOR_CACHE_DIR') or os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'szyfrator')
+    machine = f"{platform.node()}-{platform.machine()}-{platform.python_implementation()}-{platform.python_version()}"
+    return os.path.join(directory, f"engines-{''.join(c if c.isalnum() or c in '.-' else '_' for c in machine)}.json")
+
+
+def _compatible(calibration: dict) -> bool:
+    if not isinstance(calibration, dict) or calibration.get('version') != ENGINES_VERSION:
+        return False
+    # Nowy szyfr lub rodzaj danych w rejestrze wymaga nowej kalibracji
+    if set(calibration.get('plans', {})) != {f"{cipher_name}/{kind}" for cipher_name, kind in ENGINES}:
+        return False
+    for name, plan in calibration.get('plans', {}).items():
+        cipher_name, _, kind = name.partition('/')
+        known = {engine.name for engine in ENGINES.get((cipher_name, kind), [])}
+        if not set(plan['engines']) <= known:
+            return False
+    return True
+
+
+def load_calibration() -> Optional[dict]:
+    """Zwraca zapisaną kalibrację albo None, jeśli jej brak lub jest nieaktualna"""
+    try:
+        with open(cache_filename(), 'r', encoding='utf-8') as file:
+            calibration = json.load(file)
+    except (IOError, OSError, ValueError):
+        return None
+    return calibration if _compatible(calibration) else None
+
+
+def save_calibration(calibration: dict) -> str:
+    """Zapisuje kalibrację dla tej maszyny; zwraca nazwę pliku"""
+    filename = cache_filename()
+    try:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(calibration, file, indent=1)
+        os.replace(filename + '.tmp', filename)
+    except (IOError, OSError) as e:
+        raise FileOperationError(f"Nie można zapisać kalibracji {filename}: {e}")
+    return filename
+
+
+def load_plans() -> dict:
+    """Plany wyboru silników dla Cipher._run: {(klasa, rodzaj): (progi, silniki lub None dla domyślnego)}.
+
+    Tylko odczyt zapisanej kalibracji (bez niej STATIC_PLANS) - nigdy nie kalibruje.
+    SZYFRATOR_ENGINES=default wyłącza wybór (zawsze domyślna implementacja).
+    """
+    if os.environ.get('SZYFRATOR_ENGINES') == DEFAULT:
+        return {}
+    calibration = load_calibration()
+    plans = {}
+    for name, plan in (calibration['plans'] if calibration else STATIC_PLANS).items():
+        cipher_name, _, kind = name.partition('/')
+        engines = {engine.name: engine for engine in ENGINES.get((cipher_name, kind), [])}
+        selected = tuple(None if engine_name == DEFAULT or not engines[engine_name].available()
+                         else engines[engine_name].run for engine_name in plan['engines'])
+        if any(selected):
+            plans[(CIPHERS[cipher_name], kind)] = (tuple(plan['limits']), selected)
+    return plans
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Kalibracja wyboru implementacji szyfrów według rozmiaru danych")
+    parser.add_argument('--calibrate', action='store_true', help="Wykonuje kalibrację i zapisuje jej wynik")
+    parser.add_argument('--verbose', action='store_true', help="Wypisuje czasy wszystkich silników (z --calibrate)")
+    args = parser.parse_args(argv)
+    if args.calibrate:
+        calibration = calibrate(verbose=args.verbose)
+        try:
+            print(f"Zapisano kalibrację: {save_calibration(calibration)}")
+        except FileOperationError as e:
+            print(f"Błąd: {e}", file=sys.stderr)
+            return 1
+    else:
+        calibration = load_calibration()
+        if calibration is None:
+            print(f"Brak kalibracji ({cache_filename()}) - obowiązują plany domyślne, "
+                  f"python engines.py --calibrate wyznacza progi dla tej maszyny")
+            calibration = {'plans': STATIC_PLANS, 'rejected': []}
+        else:
+            print(f"Plik kalibracji: {cache_filename()}")
+    for name, plan in calibration['plans'].items():
+        ranges = [plan['engines'][0]] + [f"od {limit} B: {engine}"
+                                         for limit, engine in zip(plan['limits'], plan['engines'][1:])]
+        print(f"{name:<15} {', '.join(ranges)}")
+    for name in calibration['rejected']:
+        print(f"Odrzucony (inny wynik niż wzorzec): {name}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
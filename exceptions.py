@@ -16,4 +16,12 @@ class EncryptionError(CipherError):
 
 class DecryptionError(CipherError):
     #Wyjątek zgłaszany gdy wystąpi błąd podczas deszyfrowania
-    pass
\ No newline at end of file
+    pass
+
+class ServiceError(CipherError):
+    #Wyjątek zgłaszany gdy wystąpi błąd komunikacji z serwerem szyfrującym
+    pass
+
+class ContainerError(FileOperationError):
+    #Wyjątek zgłaszany gdy plik kontenera jest uszkodzony lub ma nieznany format
+    pass
@@ -1,14 +1,47 @@
-from cipher import Cipher, CaesarCipher, XORCipher, ReverseCipher
-from exceptions import CipherError, InvalidKeyError, FileOperationError, EncryptionError, DecryptionError
+from cipher import Cipher, CaesarCipher, XORCipher, ReverseCipher, VigenereCipher, CIPHERS
+from exceptions import CipherError, InvalidKeyError, FileOperationError, EncryptionError, DecryptionError, ServiceError, \
+    ContainerError
+from stats import PerformanceStats
+from cache import CipherCache, get_cipher, cache_stats
+from pipeline import CipherPipeline
+from cryptanalysis import rank_caesar_shifts, crack_caesar, crack_xor
+from transforms import Transform
+from container import ContainerReader, ContainerWriter, pack_file, unpack_file
+from tree import process_tree
+from profiling import span, tracing, MemorySink, JsonLinesSink, ChromeTraceSink, profile_call
 
 __all__ = [
     'Cipher',
     'CaesarCipher',
     'XORCipher',
     'ReverseCipher',
+    'VigenereCipher',
+    'CIPHERS',
     'CipherError',
     'InvalidKeyError',
     'FileOperationError',
     'EncryptionError',
-    'DecryptionError'
+    'DecryptionError',
+    'ServiceError',
+    'ContainerError',
+    'PerformanceStats',
+    'CipherCache',
+    'get_cipher',
+    'cache_stats',
+    'CipherPipeline',
+    'Transform',
+    'rank_caesar_shifts',
+    'crack_caesar',
+    'crack_xor',
+    'ContainerReader',
+    'ContainerWriter',
+    'pack_file',
+    'unpack_file',
+    'span',
+    'tracing',
+    'MemorySink',
+    'JsonLinesSink',
+    'ChromeTraceSink',
+    'profile_call',
+    'process_tree'
 ]
\ No newline at end of file
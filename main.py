@@ -1,8 +1,24 @@
-from cipher import CaesarCipher, XORCipher, ReverseCipher
-from exceptions import CipherError
+from cipher import CaesarCipher, XORCipher, ReverseCipher, CIPHERS, DEFAULT_CHUNK_SIZE
+from exceptions import CipherError, FileOperationError
+from benchmark import measure
+from armor import ArmorReader, ArmorWriter
+from transforms import upper, drop
+from container import ContainerReader, ContainerWriter, is_container, update_container
+from compression import parse_spec
+from tree import process_tree
+from profiling import span, tracing, sink_for
+from stats import byte_size
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+import argparse
 import os
+import sys
+import tempfile
 import time
 
+# Mniejsze kawałki w edytowanych plikach - zmiana jednej linii przepisuje mniej danych
+EDIT_CHUNK_SIZE = 64 << 10
+
 
 def get_cipher_choice():
     #Menu
@@ -80,28 +96,31 @@ def save_to_file(text):
     if choice == 't':
         filename = input("Podaj nazwę pliku: ")
         try:
-            with open(filename, 'w', encoding='utf-8') as file:
+            with span('write', size=byte_size(text)), open(filename, 'w', encoding='utf-8') as file:
                 file.write(text)
             print(f"Tekst został zapisany do pliku {filename}")
         except IOError as e:
             print(f"Błąd zapisu do pliku: {e}")
 
 
+# Przekształcenia kompilowane raz do tablic str.translate
+UPPER = upper()
+NO_SPACES = drop(chars=' ')
+
+
 def apply_lambda_operations(cipher, text):
     #Użycie funkcji lambda
     print("\nUżycie funkcji lambda:")
 
-    # Lambda do zamiany na wielkie litery
-    upper = lambda x: x.upper()
-    print(f"Tekst wielkimi literami: {cipher.apply_lambda_operation(text, upper)}")
+    # Zamiana na wielkie litery (tablica translacji)
+    print(f"Tekst wielkimi literami: {cipher.apply_lambda_operation(text, UPPER)}")
 
     # Lambda do odwrócenia tekstu
     reverse = lambda x: x[::-1]
     print(f"Odwrócony tekst: {cipher.apply_lambda_operation(text, reverse)}")
 
-    # Lambda do usunięcia spacji
-    no_spaces = lambda x: x.replace(" ", "")
-    print(f"Tekst bez spacji: {cipher.apply_lambda_operation(text, no_spaces)}")
+    # Usunięcie spacji (tablica translacji)
+    print(f"Tekst bez spacji: {cipher.apply_lambda_operation(text, NO_SPACES)}")
 
 
 def show_performance_stats(cipher):
@@ -115,6 +134,10 @@ def show_performance_stats(cipher):
         print(f"Maksymalny czas szyfrowania: {stats['max_encrypt']:.6f}s")
         print(f"Minimalny czas deszyfrowania: {stats['min_decrypt']:.6f}s")
         print(f"Maksymalny czas deszyfrowania: {stats['max_decrypt']:.6f}s")
+        print(f"Percentyle szyfrowania p50/p95/p99: {stats['p50_encrypt']:.6f}s / "
+              f"{stats['p95_encrypt']:.6f}s / {stats['p99_encrypt']:.6f}s")
+        print(f"Przepustowość szyfrowania: {stats['throughput_encrypt'] / 1e6:.2f} MB/s")
+        print(f"Przepustowość deszyfrowania: {stats['throughput_decrypt'] / 1e6:.2f} MB/s")
 
         choice = input("\nCzy chcesz wygenerować wykres wydajności? (t/n): ").lower()
         if choice == 't':
@@ -132,26 +155,27 @@ def show_performance_stats(cipher):
 def benchmark_cipher(cipher_class, key, text, iterations=100):
     """Test wydajnościowy dla danego szyfru"""
     print(f"\nRozpoczynam test wydajności dla {cipher_class.__name__}...")
-    cipher = cipher_class(key)
+    cipher = cipher_class(key, collect_stats=False)
 
     # Test szyfrowania
-    start_time = time.time()
-    for _ in range(iterations):
-        cipher.encrypt(text)
-    encrypt_time = time.time() - start_time
+    encrypt_result = measure(lambda: cipher.encrypt(text), repeats=iterations, warmup=3)
 
     # Test deszyfrowania
     encrypted = cipher.encrypt(text)
-    start_time = time.time()
-    for _ in range(iterations):
-        cipher.decrypt(encrypted)
-    decrypt_time = time.time() - start_time
+    decrypt_result = measure(lambda: cipher.decrypt(encrypted), repeats=iterations, warmup=3)
 
     print(f"Wyniki dla {iterations} iteracji:")
-    print(f"Całkowity czas szyfrowania: {encrypt_time:.4f}s")
-    print(f"Średni czas szyfrowania: {encrypt_time / iterations:.6f}s")
-    print(f"Całkowity czas deszyfrowania: {decrypt_time:.4f}s")
-    print(f"Średni czas deszyfrowania: {decrypt_time / iterations:.6f}s")
+    print(f"Całkowity czas szyfrowania: {encrypt_result['mean'] * iterations:.4f}s")
+    print(f"Średni czas szyfrowania: {encrypt_result['mean']:.6f}s (odchylenie {encrypt_result['stdev']:.6f}s)")
+    print(f"Całkowity czas deszyfrowania: {decrypt_result['mean'] * iterations:.4f}s")
+    print(f"Średni czas deszyfrowania: {decrypt_result['mean']:.6f}s (odchylenie {decrypt_result['stdev']:.6f}s)")
+
+
+def private_temp_dir():
+    #Katalog w pamięci (tmpfs), jeśli jest dostępny; inaczej domyślny katalog tymczasowy
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return None
 
 
 def edit_file_content(filename: str) -> str:
@@ -164,12 +188,16 @@ def edit_file_content(filename: str) -> str:
             os.system(f'nano "{filename}"')
 
         # Przeczytaj zmodyfikowaną zawartość
-        with open(filename, 'r', encoding='utf-8') as file:
+        with open(filename, 'r', encoding='utf-8', newline='') as file:
             return file.read()
     except Exception as e:
         raise FileOperationError(f"Błąd podczas edycji pliku: {e}")
 
 
+class DecryptedText(str):
+    """Tekst już odszyfrowany (zawartość kontenera albo wynik edycji) - menu nie deszyfruje go ponownie"""
+
+
 def handle_file_operations(cipher, operation: str):
     """Obsługa operacji na plikach z możliwością edycji"""
     filename = input("Podaj nazwę pliku: ")
@@ -178,35 +206,226 @@ def handle_file_operations(cipher, operation: str):
         return None
 
     try:
-        # Deszyfrowanie przed edycją
-        if operation == 'edit':
-            encrypted_text = cipher.read_from_file(filename)
-            decrypted_text = cipher.decrypt(encrypted_text)
+        with span('file_operation', operation=operation):
+            return _file_operation(cipher, operation, filename)
+    except CipherError as e:
+        print(f"Błąd operacji szyfrującej: {e}")
+    except Exception as e:
+        print(f"Błąd operacji na pliku: {e}")
+    return None
 
-            # Zapisz tymczasowo odszyfrowaną wersję do edycji
-            temp_file = "temp_decrypted.txt"
-            cipher.save_to_file(temp_file, decrypted_text)
 
-            # Edytuj plik
-            edited_text = edit_file_content(temp_file)
+def _file_operation(cipher, operation: str, filename: str):
+    #Właściwa operacja na pliku; fazy są mierzone osobno, gdy podłączony jest odbiorca pomiarów
+    # Deszyfrowanie przed edycją
+    if operation == 'edit':
+        if is_container(filename):
+            original = ContainerReader(filename, cipher).read_all()
+        else:
+            original = None
+            decrypted_text = cipher.decrypt(cipher.read_from_file(filename))
+
+        # Odszyfrowana wersja trafia do prywatnego pliku tymczasowego (w pamięci, jeśli to możliwe)
+        descriptor, temp_file = tempfile.mkstemp(suffix='.txt', dir=private_temp_dir())
+        try:
+            with span('write'), os.fdopen(descriptor, 'wb') as file:
+                file.write(original if original is not None else decrypted_text.encode('utf-8'))
 
-            # Zaszyfruj i zapisz zmiany
-            encrypted_edited = cipher.encrypt(edited_text)
-            cipher.save_to_file(filename, encrypted_edited)
+            # Edytuj plik
+            with span('edit'):
+                edited_text = edit_file_content(temp_file)
+        finally:
             os.remove(temp_file)  # Usuń plik tymczasowy
-            print("Plik został pomyślnie edytowany i zaszyfrowany")
-            return edited_text
 
-        # Standardowe odczytanie pliku
-        elif operation == 'read':
-            content = cipher.read_from_file(filename)
-            return content
+        # Zaszyfruj i zapisz tylko zmienione kawałki; zwykły plik jest zamieniany na kontener
+        with span('encode', size=byte_size(edited_text)):
+            edited = edited_text.encode('utf-8')
+        with span('write', size=len(edited)):
+            if original is not None:
+                rewritten = update_container(filename, cipher, edited, original)
+                print(f"Zaszyfrowano ponownie zmienione kawałki: {rewritten}")
+            else:
+                with ContainerWriter(filename + '.tmp', cipher, EDIT_CHUNK_SIZE) as writer:
+                    writer.write(edited)
+                os.replace(filename + '.tmp', filename)
+                print("Plik zapisano jako kontener (kolejne edycje szyfrują tylko zmienione kawałki)")
+        print("Plik został pomyślnie edytowany i zaszyfrowany")
+        return DecryptedText(edited_text)
+
+    # Standardowe odczytanie pliku
+    elif operation == 'read':
+        if is_container(filename):
+            print("Plik jest kontenerem - wczytano odszyfrowaną zawartość")
+            data = ContainerReader(filename, cipher).read_all()
+            with span('decode', size=len(data)):
+                return DecryptedText(data.decode('utf-8'))
+        content = cipher.read_from_file(filename)
+        return content
+
+
+def compression_spec(spec: str):
+    """parse_spec dla argparse - komunikat o błędnym kodeku lub poziomie trafia do użytkownika"""
+    try:
+        return parse_spec(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Parser argumentów trybu wsadowego"""
+    parser = argparse.ArgumentParser(
+        prog='main.py',
+        description="Szyfrator - tryb wsadowy. Dane są przetwarzane binarnie, kawałkami "
+                    "(XOR zapisuje surowe bajty, base64 tylko z --armor). Bez argumentów uruchamia się menu interaktywne.")
+    operations = parser.add_subparsers(dest='operation', required=True)
+    for operation, description in (('encrypt', "Szyfrowanie"), ('decrypt', "Deszyfrowanie")):
+        command = operations.add_parser(operation, help=description)
+        command.add_argument('--cipher', choices=sorted(CIPHERS), required=True, help="Rodzaj szyfru")
+        key = command.add_mutually_exclusive_group(required=True)
+        key.add_argument('--key', help="Klucz szyfrowania")
+        key.add_argument('--key-file', help="Plik z kluczem szyfrowania (UTF-8)")
+        command.add_argument('-i', '--input', nargs='+', default=['-'],
+                             help="Pliki wejściowe; '-' oznacza stdin (domyślnie)")
+        command.add_argument('-o', '--output', default='-',
+                             help="Plik wynikowy, '-' dla stdout; przy wielu plikach wejściowych katalog")
+        command.add_argument('--armor', action='store_true',
+                             help="Szyfrogram w base64 (przy szyfrowaniu zapisywany, przy deszyfrowaniu oczekiwany)")
+        if operation == 'encrypt':
+            command.add_argument('--compress', type=compression_spec, metavar='KODEK[:POZIOM]',
+                                 help="Kompresja przed szyfrowaniem: zlib, bz2 lub lzma, np. zlib:6 "
+                                      "(deszyfrowanie rozpoznaje ją samo)")
+        command.add_argument('--trace', metavar='PLIK',
+                             help="Zapisuje czasy faz (odczyt, szyfrowanie, base64, zapis) do pliku: .jsonl - linie "
+                                  "JSON, inne rozszerzenia - format Chrome trace (chrome://tracing); wymaga --jobs 1")
+        command.add_argument('--jobs', type=int, default=1, help="Liczba plików przetwarzanych równolegle")
+        command.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rozmiar kawałka w bajtach")
+    tree = operations.add_parser('tree', help="Szyfrowanie całego katalogu do lustrzanego drzewa")
+    tree.add_argument('source', help="Katalog źródłowy")
+    tree.add_argument('destination', help="Katalog wynikowy (z manifestem do pomijania niezmienionych plików)")
+    tree.add_argument('--cipher', choices=sorted(CIPHERS), required=True, help="Rodzaj szyfru")
+    key = tree.add_mutually_exclusive_group(required=True)
+    key.add_argument('--key', help="Klucz szyfrowania")
+    key.add_argument('--key-file', help="Plik z kluczem szyfrowania (UTF-8)")
+    tree.add_argument('--decrypt', action='store_true', help="Deszyfrowanie zamiast szyfrowania")
+    tree.add_argument('--compress', type=compression_spec, metavar='KODEK[:POZIOM]', help="Kompresja przed szyfrowaniem")
+    tree.add_argument('--prune', action='store_true',
+                      help="Usuwa z katalogu wynikowego pliki, których nie ma już w katalogu źródłowym")
+    tree.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help="Liczba procesów")
+    tree.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rozmiar kawałka w bajtach")
+    return parser
+
+
+def run_tree(args) -> int:
+    """Tryb katalogowy; wypisuje podsumowanie i zwraca kod wyjścia procesu"""
+    try:
+        key = args.key if args.key is not None else read_key_file(args.key_file)
+        CIPHERS[args.cipher](key)
+        summary = process_tree(args.cipher, key, args.source, args.destination,
+                               'decrypt' if args.decrypt else 'encrypt', args.jobs, args.chunk_size,
+                               args.compress, args.prune)
+    except CipherError as e:
+        print(f"Błąd: {e}", file=sys.stderr)
+        return 1
+    for relative, error in summary['errors'].items():
+        print(f"Błąd: {relative}: {error}", file=sys.stderr)
+    print(f"Pliki: {summary['files']}, przetworzone: {summary['processed']}, pominięte: {summary['skipped']}, "
+          f"usunięte: {summary['removed']}, osierocone: {summary['orphaned']}, błędy: {len(summary['errors'])}")
+    print(f"Czas: {summary['elapsed']:.2f} s, {summary['files_per_s']:.1f} plików/s, "
+          f"{summary['mb_per_s']:.1f} MB/s")
+    return 1 if summary['errors'] else 0
+
+
+def read_key_file(filename: str) -> str:
+    #Wczytuje klucz z pliku, pomijając końcowy znak nowej linii
+    try:
+        with open(filename, 'r', encoding='utf-8') as file:
+            return file.read().rstrip('\r\n')
+    except (IOError, OSError) as e:
+        raise FileOperationError(f"Błąd podczas odczytu klucza: {e}")
+
+
+def output_path(input_filename: str, output: str, operation: str, multiple: bool) -> str:
+    #Wyznacza ścieżkę pliku wynikowego dla danego pliku wejściowego
+    if not multiple:
+        return output
+    if output == '-':
+        if operation == 'decrypt' and input_filename.endswith('.enc'):
+            return input_filename[:-len('.enc')]
+        return input_filename + ('.enc' if operation == 'encrypt' else '.dec')
+    return os.path.join(output, os.path.basename(input_filename))
+
+
+def process_file(cipher_name: str, key: str, operation: str, src_filename: str, dst_filename: str,
+                 chunk_size: int, armor: bool = False, compress: tuple = None) -> int:
+    """Szyfruje lub deszyfruje jeden plik (albo stdin/stdout) binarnie, kawałkami.
+    compress to para (kodek, poziom) kompresji przed szyfrowaniem"""
+    cipher = CIPHERS[cipher_name](key, collect_stats=False)
+    if operation == 'encrypt':
+        codec, level = compress or (None, None)
+        stream = lambda src, dst, chunk_size: cipher.encrypt_stream(src, dst, chunk_size, codec, level)
+    else:
+        stream = cipher.decrypt_stream
+    try:
+        src = sys.stdin.buffer if src_filename == '-' else open(src_filename, 'rb')
+        try:
+            dst = sys.stdout.buffer if dst_filename == '-' else open(dst_filename, 'wb')
+            try:
+                if armor and operation == 'encrypt':
+                    with ArmorWriter(dst) as armored:
+                        return stream(src, armored, chunk_size)
+                return stream(ArmorReader(src) if armor else src, dst, chunk_size)
+            finally:
+                if dst is sys.stdout.buffer:
+                    dst.flush()
+                else:
+                    dst.close()
+        finally:
+            if src is not sys.stdin.buffer:
+                src.close()
+    except (IOError, OSError) as e:
+        raise FileOperationError(f"Błąd operacji na pliku {src_filename}: {e}")
+
+
+def trace_to(filename: str):
+    #Pomiar faz do pliku na czas bloku with (bez nazwy pliku - bez pomiarów)
+    return tracing(sink_for(filename)) if filename else nullcontext()
+
+
+def run_batch(argv) -> int:
+    """Tryb wsadowy (bez interakcji); zwraca kod wyjścia procesu"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs musi być dodatnie")
+    if args.operation == 'tree':
+        return run_tree(args)
+    if args.trace and args.jobs > 1:
+        parser.error("--trace mierzy tylko bieżący proces - użyj --jobs 1")
+    multiple = len(args.input) > 1
+    if multiple and '-' in args.input:
+        parser.error("stdin ('-') nie może występować razem z innymi plikami wejściowymi")
 
+    try:
+        key = args.key if args.key is not None else read_key_file(args.key_file)
+        CIPHERS[args.cipher](key)  # walidacja klucza przed uruchomieniem procesów
+        if multiple and args.output != '-':
+            os.makedirs(args.output, exist_ok=True)
+        tasks = [(args.cipher, key, args.operation, src, output_path(src, args.output, args.operation, multiple),
+                  args.chunk_size, args.armor, getattr(args, 'compress', None)) for src in args.input]
+
+        if args.jobs == 1 or len(tasks) == 1:
+            with trace_to(args.trace):
+                for task in tasks:
+                    process_file(*task)
+        else:
+            with ProcessPoolExecutor(args.jobs) as executor:
+                for future in [executor.submit(process_file, *task) for task in tasks]:
+                    future.result()
     except CipherError as e:
-        print(f"Błąd operacji szyfrującej: {e}")
-    except Exception as e:
-        print(f"Błąd operacji na pliku: {e}")
-    return None
+        print(f"Błąd: {e}", file=sys.stderr)
+        return 1
+    return 0
+
 
 def main():
     print("=== Szyfrator wiadomości tekstowych ===")
@@ -247,6 +466,10 @@ def main():
                     if operation_choice == 1:  # Szyfrowanie
                         result = cipher.encrypt(text)
                         print("\nZaszyfrowany tekst:", result)
+                    elif operation_choice == 2 and isinstance(text, DecryptedText):
+                        # Kontener i wynik edycji są już odszyfrowane - drugie deszyfrowanie dałoby śmieci
+                        result = text
+                        print("\nTekst jest już odszyfrowany:", result)
                     elif operation_choice == 2:  # Deszyfrowanie
                         result = cipher.decrypt(text)
                         print("\nOdszyfrowany tekst:", result)
@@ -264,4 +487,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        sys.exit(run_batch(sys.argv[1:]))
+    # W trybie interaktywnym pomiary faz włącza zmienna środowiskowa SZYFRATOR_TRACE=plik
+    with trace_to(os.environ.get('SZYFRATOR_TRACE')):
+        main()
\ No newline at end of file
@@ -1,79 +1,101 @@
+import os
+import sys
 import time
-import matplotlib.pyplot as plt
-from cipher import CaesarCipher, XORCipher, ReverseCipher
-
-text_sizes = [100, 1000, 10000]
-def compare_ciphers_performance():
-    results = {
-        'Caesar': {'encrypt': [], 'decrypt': []},
-        'XOR': {'encrypt': [], 'decrypt': []},
-        'Reverse': {'encrypt': [], 'decrypt': []}
-    }
-
-    for size in text_sizes:
-        text = 'a' * size
-
-        # Test Caesar
-        cipher = CaesarCipher("secret")
-        start = time.time()
-        encrypted = cipher.encrypt(text)
-        results['Caesar']['encrypt'].append(time.time() - start)
-
-        start = time.time()
-        cipher.decrypt(encrypted)
-        results['Caesar']['decrypt'].append(time.time() - start)
-
-        # Test XOR
-        cipher = XORCipher("secret")
-        start = time.time()
-        encrypted = cipher.encrypt(text)
-        results['XOR']['encrypt'].append(time.time() - start)
-
-        start = time.time()
-        cipher.decrypt(encrypted)
-        results['XOR']['decrypt'].append(time.time() - start)
-
-        # Test Reverse
-        cipher = ReverseCipher("secret")
-        start = time.time()
-        encrypted = cipher.encrypt(text)
-        results['Reverse']['encrypt'].append(time.time() - start)
-
-        start = time.time()
-        cipher.decrypt(encrypted)
-        results['Reverse']['decrypt'].append(time.time() - start)
+import base64
+from cipher import CaesarCipher, XORCipher, ReverseCipher, VigenereCipher, _numpy
+from reporting import plot_comparison
+from benchmark import run_benchmarks, save_results
+
+text_sizes = [100, 1000, 10000, 100000]
+cipher_labels = {'caesar': 'Caesar', 'xor': 'XOR', 'reverse': 'Reverse', 'vigenere': 'Vigenere'}
+
+
+def compare_ciphers_performance(output: str = 'performance_test.json'):
+    """Porównuje szyfry dla rosnących rozmiarów tekstu; zapisuje wyniki JSON i wykres"""
+    measurements = run_benchmarks(list(cipher_labels), ['ascii'], text_sizes, ['encrypt', 'decrypt'],
+                                  repeats=5, warmup=1)
+    save_results(output, measurements)
+    print(f"Wyniki zapisano do {output}")
+
+    results = {label: {'encrypt': [], 'decrypt': []} for label in cipher_labels.values()}
+    for measurement in measurements:
+        results[cipher_labels[measurement['cipher']]][measurement['direction']].append(measurement['mean'])
 
     # Generowanie wykresów
-    plt.figure(figsize=(12, 6))
-
-    # Wykres szyfrowania
-    plt.subplot(1, 2, 1)
-    for cipher in results:
-        plt.plot(text_sizes, results[cipher]['encrypt'], label=f'{cipher} encrypt', marker='o')
-    plt.title('Czas szyfrowania w zależności od rozmiaru tekstu')
-    plt.xlabel('Rozmiar tekstu')
-    plt.ylabel('Czas (s)')
-    plt.xscale('log')
-    plt.yscale('log')
-    plt.legend()
-    plt.grid(True)
-
-    # Wykres deszyfrowania
-    plt.subplot(1, 2, 2)
-    for cipher in results:
-        plt.plot(text_sizes, results[cipher]['decrypt'], label=f'{cipher} decrypt', marker='x')
-    plt.title('Czas deszyfrowania w zależności od rozmiaru tekstu')
-    plt.xlabel('Rozmiar tekstu')
-    plt.ylabel('Czas (s)')
-    plt.xscale('log')
-    plt.yscale('log')
-    plt.legend()
-    plt.grid(True)
-
-    plt.tight_layout()
-    plt.savefig('performance_test.png')
-    print("Wykres porównawczy zapisano do performance_test.png")
+    plot_comparison(results, text_sizes, 'performance_test.png')
+
+
+def legacy_xor_encrypt(key: str, text: str) -> str:
+    """Pierwotna implementacja XOR (lista znak po znaku) - punkt odniesienia"""
+    key_repeated = (key * (len(text) // len(key) + 1))[:len(text)]
+    encrypted_bytes = [ord(t) ^ ord(k) for t, k in zip(text, key_repeated)]
+    return base64.b64encode(bytes(encrypted_bytes)).decode('utf-8')
+
+
+def compare_xor_engines(size_mb: int = 100, legacy_size_mb: int = 10):
+    """Porównuje przepustowość nowego rdzenia XOR z pierwotną implementacją"""
+    key = "secret"
+    cipher = XORCipher(key)
+    data = os.urandom(size_mb * 1024 * 1024)
+
+    # Stara implementacja jest zbyt wolna i pamięciożerna dla pełnego rozmiaru
+    legacy_text = data[:legacy_size_mb * 1024 * 1024].decode('latin-1')
+    start = time.perf_counter()
+    legacy_xor_encrypt(key, legacy_text)
+    legacy_speed = legacy_size_mb / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    cipher.encrypt_bytes(data)
+    bytes_speed = size_mb / (time.perf_counter() - start)
+
+    text = data.decode('latin-1')
+    start = time.perf_counter()
+    cipher.encrypt(text)
+    text_speed = size_mb / (time.perf_counter() - start)
+
+    print(f"Pierwotny XOR ({legacy_size_mb} MB): {legacy_speed:.1f} MB/s")
+    print(f"XOR na bajtach ({size_mb} MB): {bytes_speed:.1f} MB/s ({bytes_speed / legacy_speed:.1f}x)")
+    print(f"XOR na tekście z base64 ({size_mb} MB): {text_speed:.1f} MB/s ({text_speed / legacy_speed:.1f}x)")
+
+
+def legacy_vigenere_encrypt(shifts, data: bytes) -> bytes:
+    """Vigenère bajt po bajcie - punkt odniesienia"""
+    result = bytearray()
+    for index, byte in enumerate(data):
+        if 97 <= byte <= 122:
+            byte = (byte - 97 + shifts[index % len(shifts)]) % 26 + 97
+        elif 65 <= byte <= 90:
+            byte = (byte - 65 + shifts[index % len(shifts)]) % 26 + 65
+        result.append(byte)
+    return bytes(result)
+
+
+def compare_vigenere_engines(size_mb: int = 64, legacy_size_mb: int = 4):
+    """Porównuje przepustowość ścieżek Vigenère'a: pętla, translate na kolumnach klucza i NumPy"""
+    cipher = VigenereCipher("Tajny Klucz!")
+    data = os.urandom(size_mb * 1024 * 1024)
+
+    start = time.perf_counter()
+    legacy_vigenere_encrypt(cipher.shifts, data[:legacy_size_mb * 1024 * 1024])
+    legacy_speed = legacy_size_mb / (time.perf_counter() - start)
+    print(f"Pętla bajt po bajcie ({legacy_size_mb} MB): {legacy_speed:.1f} MB/s")
+
+    engines = [('translate', lambda: cipher._shift_translate(data, 0, True))]
+    numpy = _numpy()
+    if numpy is not None:
+        engines.append(('NumPy', lambda: cipher._shift_numpy(numpy, data, 0, True)))
+    engines.append(('encrypt_bytes', lambda: cipher.encrypt_bytes(data)))
+    for name, run in engines:
+        start = time.perf_counter()
+        run()
+        speed = size_mb / (time.perf_counter() - start)
+        print(f"{name} ({size_mb} MB): {speed:.1f} MB/s ({speed / legacy_speed:.1f}x)")
 
 
 if __name__ == "__main__":
-    compare_ciphers_performance()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == 'xor':
+        compare_xor_engines()
+    elif len(sys.argv) > 1 and sys.argv[1] == 'vigenere':
+        compare_vigenere_engines()
+    else:
+        compare_ciphers_performance()
\ No newline at end of file
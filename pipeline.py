@@ -0,0 +1,268 @@
+import io
+import tempfile
+from itertools import chain
+from math import gcd
+from typing import Callable, Dict, Iterator, List, Tuple, Union
+
+from cipher import (Cipher, CaesarCipher, XORCipher, ReverseCipher, DEFAULT_CHUNK_SIZE,
+                    _caesar_tables, _XorKeyStream, _read_chunks, _read_backwards)
+from exceptions import CipherError, FileOperationError
+from stats import byte_size
+from transforms import Transform, compose_tables
+
+# Połączone klucze XOR dłuższe niż ten limit (NWW długości kluczy) nie są łączone w jeden strumień
+MAX_FUSED_XOR_KEY = 1 << 16
+
+# Operacja planu wykonania: (rodzaj, wartość), gdzie rodzaj to jeden z:
+#   'shift'     - przesunięcie Cezara (tablica translacji), wartość: przesunięcie 0-25
+#   'table'     - tablica str.translate (tryb tekstowy), wartość: tablica
+#   'xor'       - XOR z powtarzanym kluczem (tylko tryb binarny), wartość: _XorKeyStream
+#   'reverse'   - odwrócenie całości danych
+#   'encrypt'   - szyfrowanie dowolnym innym szyfrem, wartość: instancja Cipher
+#   'decrypt'   - deszyfrowanie dowolnym innym szyfrem, wartość: instancja Cipher
+#   'transform' - jednokierunkowe przekształcenie (tylko przy szyfrowaniu), wartość: funkcja
+Operation = Tuple[str, object]
+
+
+def _combine_xor_keys(first: bytes, second: bytes) -> bytes:
+    period = len(first) * len(second) // gcd(len(first), len(second))
+    combined = (int.from_bytes(first * (period // len(first)), 'little')
+                ^ int.from_bytes(second * (period // len(second)), 'little'))
+    return combined.to_bytes(period, 'little')
+
+
+def _table(kind: str, value) -> dict:
+    return _caesar_tables(value)[0] if kind == 'shift' else value
+
+
+def _fuse(operations: List[Operation], text_mode: bool) -> List[Operation]:
+    """Łączy sąsiednie etapy, które można wykonać jednym przejściem"""
+    fused: List[Operation] = []
+    for kind, value in operations:
+        if (kind in ('shift', 'table') and fused and fused[-1][0] in ('shift', 'table')
+                and (kind, fused[-1][0]) != ('shift', 'shift')):
+            # Sąsiednie tablice translacji (także przesunięcia Cezara) łączą się w jedną
+            fused[-1] = ('table', compose_tables((_table(*fused[-1]), _table(kind, value))))
+            continue
+        if kind == 'shift':
+            # Przesunięcie jest przemienne z odwróceniem, więc może przejść przed nie
+            position = len(fused)
+            while position and fused[position - 1][0] == 'reverse':
+                position -= 1
+            if position and fused[position - 1][0] == 'shift':
+                shift = (fused[position - 1][1] + value) % 26
+                # W trybie tekstowym przesunięcie 0 nie jest tożsamością dla liter spoza ASCII
+                if shift or text_mode:
+                    fused[position - 1] = ('shift', shift)
+                else:
+                    del fused[position - 1]
+                continue
+            if not value and not text_mode:
+                continue
+        elif kind == 'reverse':
+            position = len(fused)
+            while position and fused[position - 1][0] == 'shift':
+                position -= 1
+            if position and fused[position - 1][0] == 'reverse':
+                del fused[position - 1]
+                continue
+        elif kind == 'xor' and fused and fused[-1][0] == 'xor':
+            previous, key = fused[-1][1].key, value.key
+            if len(previous) * len(key) // gcd(len(previous), len(key)) <= MAX_FUSED_XOR_KEY:
+                combined = _combine_xor_keys(previous, key)
+                if any(combined):
+                    fused[-1] = ('xor', _XorKeyStream(combined))
+                else:
+                    del fused[-1]  # ten sam klucz dwa razy znosi się
+                continue
+        fused.append((kind, value))
+    return fused
+
+
+def _regroup(chunks: Iterator, granularity: int) -> Iterator:
+    """Skleja kawałki tak, by długość każdego (poza ostatnim) była wielokrotnością granularity"""
+    pending = None
+    for chunk in chunks:
+        if pending:
+            chunk = pending + chunk
+            pending = None
+        cut = len(chunk) - len(chunk) % granularity
+        if cut < len(chunk):
+            pending = chunk[cut:]
+            chunk = chunk[:cut]
+        if chunk:
+            yield chunk
+    if pending:
+        yield pending
+
+
+def _reverse_chunks(chunks: Iterator, chunk_size: int) -> Iterator:
+    """Odwraca cały strumień kawałków przez plik tymczasowy czytany od końca"""
+    text_mode = None
+    with tempfile.TemporaryFile() as spool:
+        for chunk in chunks:
+            text_mode = isinstance(chunk, str)
+            spool.write(chunk.encode('utf-8') if text_mode else chunk)
+        for block in _read_backwards(spool, chunk_size, utf8=bool(text_mode)):
+            yield block[::-1]
+
+
+class CipherPipeline:
+    """Złożenie szyfrów i przekształceń tekstu wykonywane jako jeden przebieg.
+
+    Szyfrowanie wykonuje etapy po kolei, deszyfrowanie odwraca szyfry w odwrotnej kolejności.
+    Przekształcenia (funkcje) są jednokierunkowe - stosowane tylko przy szyfrowaniu tekstu; potok
+    z przekształceniem nie szyfruje danych binarnych. W strumieniach funkcja dostaje kolejne kawałki
+    osobno, więc musi działać znak po znaku (jak str.upper) - inaczej wynik zależałby od granic kawałków.
+    Przed wykonaniem etapy są łączone: przesunięcia Cezara sumowane, sąsiednie tablice translacji
+    (Cezar i przekształcenia z transforms.py) składane w jedną, klucze XOR (w trybie binarnym)
+    łączone w jeden strumień, a podwójne odwrócenia usuwane. Przy przetwarzaniu
+    strumieni każdy kawałek przechodzi przez wszystkie etapy, zanim zostanie wczytany następny.
+    """
+
+    def __init__(self, *stages: Union[Cipher, Callable]):
+        for stage in stages:
+            if not isinstance(stage, Cipher) and not callable(stage):
+                raise CipherError(f"Etap potoku musi być szyfrem albo funkcją, a nie {type(stage).__name__}")
+        self.stages = list(stages)
+        self._plans: Dict[Tuple[bool, bool], List[Operation]] = {}
+
+    def then(self, stage: Union[Cipher, Callable]) -> 'CipherPipeline':
+        """Zwraca nowy potok z dodatkowym etapem na końcu"""
+        return CipherPipeline(*self.stages, stage)
+
+    def _operations(self, encrypt: bool, text_mode: bool) -> List[Operation]:
+        operations = []
+        for stage in self.stages:
+            if isinstance(stage, CaesarCipher):
+                operations.append(('shift', stage.shift if encrypt else -stage.shift % 26))
+            elif isinstance(stage, ReverseCipher):
+                operations.append(('reverse', None))
+            elif isinstance(stage, XORCipher) and not text_mode:
+                operations.append(('xor', stage._key_stream))
+            elif isinstance(stage, Cipher):
+                operations.append(('encrypt' if encrypt else 'decrypt', stage))
+            elif encrypt and text_mode and isinstance(stage, Transform) and stage.table is not None:
+                operations.append(('table', stage.table))
+            elif encrypt and text_mode:
+                operations.append(('transform', stage))
+            elif encrypt:
+                name = getattr(stage, '__qualname__', type(stage).__name__)
+                raise CipherError(f"Przekształcenie {name} działa tylko na tekście - "
+                                  f"użyj encrypt lub encrypt_stream na strumieniu tekstowym")
+        return operations if encrypt else operations[::-1]
+
+    def plan(self, encrypt: bool = True, text_mode: bool = True) -> List[Operation]:
+        """Zwraca (zapamiętany) plan wykonania po połączeniu etapów"""
+        plan = self._plans.get((encrypt, text_mode))
+        if plan is None:
+            plan = _fuse(self._operations(encrypt, text_mode), text_mode)
+            self._plans[(encrypt, text_mode)] = plan
+        return plan
+
+    @staticmethod
+    def _apply(plan: List[Operation], data: Union[str, bytes]) -> Union[str, bytes]:
+        text_mode = isinstance(data, str)
+        for kind, value in plan:
+            if kind == 'shift':
+                tables = _caesar_tables(value)
+                data = data.translate(tables[0]) if text_mode else bytes(data).translate(tables[1])
+            elif kind == 'table':
+                data = data.translate(value)
+            elif kind == 'xor':
+                data = value.xor(data)
+            elif kind == 'reverse':
+                data = data[::-1]
+            elif kind == 'encrypt':
+                data = value._encrypt_chunk(data, 0)
+            elif kind == 'decrypt':
+                data = value._decrypt_chunk(data, 0)
+            else:
+                data = value(data)
+            text_mode = isinstance(data, str)
+        return data
+
+    def encrypt(self, text: str) -> str:
+        return self._apply(self.plan(True, True), text)
+
+    def decrypt(self, encrypted_text: str) -> str:
+        return self._apply(self.plan(False, True), encrypted_text)
+
+    def encrypt_bytes(self, data: bytes) -> bytes:
+        return self._apply(self.plan(True, False), data)
+
+    def decrypt_bytes(self, data: bytes) -> bytes:
+        return self._apply(self.plan(False, False), data)
+
+    @staticmethod
+    def _stage(kind: str, value, chunks: Iterator, chunk_size: int) -> Iterator:
+        """Zwraca iterator kawałków po przejściu przez jeden etap planu"""
+        if kind == 'reverse':
+            return _reverse_chunks(chunks, chunk_size)
+        if kind == 'shift':
+            text_table, bytes_table = _caesar_tables(value)
+            return (chunk.translate(text_table) if isinstance(chunk, str) else bytes(chunk).translate(bytes_table)
+                    for chunk in chunks)
+        if kind == 'table':
+            return (chunk.translate(value) for chunk in chunks)
+        if kind == 'transform':
+            # Każdy kawałek osobno - poprawne tylko dla przekształceń działających znak po znaku
+            return map(value, chunks)
+        return CipherPipeline._offset_stage(kind, value, chunks)
+
+    @staticmethod
+    def _offset_stage(kind: str, value, chunks: Iterator) -> Iterator:
+        """Etap zależny od pozycji w danych (XOR albo dowolny szyfr)"""
+        if kind == 'xor':
+            offset = 0
+            for chunk in chunks:
+                yield value.xor(chunk, offset)
+                offset += len(chunk)
+            return
+        encrypt = kind == 'encrypt'
+        transform = value._encrypt_chunk if encrypt else value._decrypt_chunk
+        granularity = value._encrypt_granularity if encrypt else value._decrypt_granularity
+        if not encrypt and value._decrypt_skips_whitespace:
+            chunks = (''.join(chunk.split()) if isinstance(chunk, str) else chunk for chunk in chunks)
+        offset = 0
+        for chunk in _regroup(chunks, granularity):
+            result = transform(chunk, offset)
+            # Tak jak w Cipher._encrypt_stream / _decrypt_stream: pozycja w tekście jawnym
+            offset += len(chunk) if encrypt else len(result)
+            yield result
+
+    def _stream(self, src, dst, chunk_size: int, encrypt: bool) -> int:
+        chunks = _read_chunks(src, chunk_size)
+        first = next(chunks, None)
+        if first is None:
+            return 0
+        plan = self.plan(encrypt, isinstance(first, str))
+        if (plan and plan[0][0] == 'reverse' and isinstance(src, (io.RawIOBase, io.BufferedIOBase))
+                and src.seekable()):
+            # Plik binarny z możliwością przewijania czytany od końca - bez pliku tymczasowego
+            src.seek(-len(first), 1)
+            chunks = (block[::-1] for block in _read_backwards(src, chunk_size, src.tell()))
+            plan = plan[1:]
+        else:
+            chunks = chain([first], chunks)
+        for kind, value in plan:
+            chunks = self._stage(kind, value, chunks, chunk_size)
+        written = 0
+        for chunk in chunks:
+            dst.write(chunk)
+            written += byte_size(chunk)
+        return written
+
+    def encrypt_stream(self, src, dst, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """Szyfruje strumień kawałkami przez wszystkie etapy; zwraca liczbę zapisanych bajtów (tekst w UTF-8)"""
+        try:
+            return self._stream(src, dst, chunk_size, encrypt=True)
+        except (IOError, OSError) as e:
+            raise FileOperationError(f"Błąd podczas szyfrowania strumienia: {e}")
+
+    def decrypt_stream(self, src, dst, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """Deszyfruje strumień kawałkami przez wszystkie etapy; zwraca liczbę zapisanych bajtów (tekst w UTF-8)"""
+        try:
+            return self._stream(src, dst, chunk_size, encrypt=False)
+        except (IOError, OSError) as e:
+            raise FileOperationError(f"Błąd podczas deszyfrowania strumienia: {e}")
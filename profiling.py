@@ -0,0 +1,219 @@
+import io
+import json
+import os
+import threading
+from contextlib import contextmanager
+from time import perf_counter_ns
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from exceptions import FileOperationError
+from stats import PerformanceStats
+
+# Pomiar czasu faz przetwarzania (odczyt, dekodowanie, szyfrowanie, base64, zapis) nazwanymi
+# odcinkami (span). Bez podłączonych odbiorców span() zwraca wspólny pusty obiekt, a gorące
+# ścieżki sprawdzają tylko flagę active - koszt jest pomijalny.
+active = False
+_sinks: List = []
+_sinks_lock = threading.Lock()
+
+
+class SpanEvent(NamedTuple):
+    name: str
+    start_ns: int
+    duration_ns: int
+    thread_id: int
+    attrs: Dict[str, object]
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'attrs', 'start_ns')
+
+    def __init__(self, name: str, attrs: Dict[str, object]):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self) -> '_Span':
+        self.start_ns = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        event = SpanEvent(self.name, self.start_ns, perf_counter_ns() - self.start_ns, threading.get_ident(),
+                          self.attrs)
+        for sink in _sinks:
+            sink.emit(event)
+        return False
+
+
+def span(name: str, **attrs):
+    """Mierzy czas bloku with jako fazę name (attrs trafiają do odbiorców, np. size=...)"""
+    if not active:
+        return _NULL_SPAN
+    return _Span(name, attrs)
+
+
+def add_sink(sink) -> None:
+    """Podłącza odbiorcę zdarzeń (obiekt z metodą emit(SpanEvent))"""
+    global _sinks, active
+    with _sinks_lock:
+        # Nowa lista zamiast modyfikacji - wątki w trakcie wysyłania zdarzeń widzą spójną kopię
+        _sinks = _sinks + [sink]
+        active = True
+
+
+def remove_sink(sink) -> None:
+    global _sinks, active
+    with _sinks_lock:
+        _sinks = [other for other in _sinks if other is not sink]
+        active = bool(_sinks)
+
+
+@contextmanager
+def tracing(*sinks):
+    """Podłącza odbiorców na czas bloku with, a potem ich odłącza i zamyka"""
+    for sink in sinks:
+        add_sink(sink)
+    try:
+        yield sinks[0] if len(sinks) == 1 else sinks
+    finally:
+        for sink in sinks:
+            remove_sink(sink)
+            sink.close()
+
+
+class MemorySink:
+    """Agreguje czasy faz w pamięci - osobne statystyki dla każdej nazwy"""
+
+    def __init__(self):
+        self.stats: Dict[str, PerformanceStats] = {}
+        self._lock = threading.Lock()
+
+    def emit(self, event: SpanEvent) -> None:
+        stats = self.stats.get(event.name)
+        if stats is None:
+            with self._lock:
+                stats = self.stats.setdefault(event.name, PerformanceStats(recent_size=0))
+        stats.record(event.duration_ns, event.attrs.get('size', 0))
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {name: dict(stats.summary(), total=stats.total_ns / 1e9) for name, stats in self.stats.items()}
+
+    def report(self) -> str:
+        """Tabela faz posortowana malejąco według łącznego czasu"""
+        lines = [f"{'faza':<20} {'liczba':>8} {'łącznie ms':>12} {'średnio µs':>12} {'p95 µs':>10}"]
+        for name, summary in sorted(self.summary().items(), key=lambda item: -item[1]['total']):
+            lines.append(f"{name:<20} {summary['count']:>8} {summary['total'] * 1e3:>12.3f}"
+                         f" {summary['avg'] * 1e6:>12.1f} {summary['p95'] * 1e6:>10.1f}")
+        return '\n'.join(lines)
+
+    def close(self) -> None:
+        pass
+
+
+class _FileSink:
+    """Wspólna obsługa pliku docelowego: nazwa pliku albo otwarty strumień tekstowy"""
+
+    def __init__(self, target):
+        self._owned = isinstance(target, (str, os.PathLike))
+        try:
+            self._file = open(target, 'w', encoding='utf-8') if self._owned else target
+        except (IOError, OSError) as e:
+            raise FileOperationError(f"Nie można otworzyć pliku pomiarów: {e}")
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def close(self) -> None:
+        if self._owned and not self._file.closed:
+            self._file.close()
+
+
+class JsonLinesSink(_FileSink):
+    """Zapisuje każde zdarzenie jako jedną linię JSON"""
+
+    def emit(self, event: SpanEvent) -> None:
+        line = json.dumps({
+            'name': event.name,
+            'start_us': event.start_ns / 1e3,
+            'duration_us': event.duration_ns / 1e3,
+            'pid': self._pid,
+            'thread': event.thread_id,
+            'attrs': event.attrs,
+        }, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+
+
+class ChromeTraceSink(_FileSink):
+    """Zapisuje zdarzenia w formacie Trace Event (chrome://tracing, Perfetto) w trakcie działania"""
+
+    def __init__(self, target):
+        super().__init__(target)
+        self._separator = ''
+        self._file.write('[\n')
+
+    def emit(self, event: SpanEvent) -> None:
+        record = json.dumps({
+            'name': event.name,
+            'ph': 'X',
+            'ts': event.start_ns / 1e3,
+            'dur': event.duration_ns / 1e3,
+            'pid': self._pid,
+            'tid': event.thread_id,
+            'args': event.attrs,
+        }, default=str)
+        with self._lock:
+            self._file.write(self._separator + record)
+            self._separator = ',\n'
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.write('\n]\n')
+                self._file.flush()
+        super().close()
+
+
+def sink_for(filename: str):
+    """Odbiorca zapisujący do pliku: .jsonl - linie JSON, inne - format Chrome trace"""
+    return JsonLinesSink(filename) if filename.endswith('.jsonl') else ChromeTraceSink(filename)
+
+
+class ProfileResult(NamedTuple):
+    value: object
+    report: str
+    peak_memory: Optional[int]
+
+
+def profile_call(func: Callable, *args, memory: bool = False, sort: str = 'cumulative', limit: int = 25,
+                 **kwargs) -> ProfileResult:
+    """Wykonuje jedno wywołanie pod cProfile; memory=True mierzy też szczyt alokacji (tracemalloc)"""
+    import cProfile
+    import pstats
+    import tracemalloc
+    profiler = cProfile.Profile()
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    elif memory:
+        tracemalloc.reset_peak()
+    try:
+        value = profiler.runcall(func, *args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats(sort).print_stats(limit)
+    return ProfileResult(value, output.getvalue(), peak)
@@ -0,0 +1,65 @@
+from typing import Dict, List
+
+# matplotlib jest ładowany dopiero przy pierwszym wykresie - import modułów szyfrujących go nie wymaga
+
+
+def _pyplot():
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def plot_performance(cipher, save_path: str = None) -> None:
+    """Generuje wykres wydajności szyfrowania i deszyfrowania"""
+    if not cipher.encryption_stats.count or not cipher.decryption_stats.count:
+        raise ValueError("Brak danych do wygenerowania wykresu")
+
+    plt = _pyplot()
+    plt.figure(figsize=(10, 5))
+    plt.plot(cipher.encryption_times, label='Szyfrowanie', marker='o')
+    plt.plot(cipher.decryption_times, label='Deszyfrowanie', marker='x')
+    plt.title(f'Wydajność algorytmu {cipher.__class__.__name__}')
+    plt.xlabel('Numer operacji')
+    plt.ylabel('Czas wykonania (s)')
+    plt.legend()
+    plt.grid(True)
+
+    if save_path:
+        plt.savefig(save_path)
+        print(f"Wykres zapisano do {save_path}")
+    else:
+        plt.show()
+
+
+def plot_comparison(results: Dict[str, Dict[str, List[float]]], text_sizes: List[int],
+                    save_path: str = 'performance_test.png') -> None:
+    """Generuje wykresy porównawcze czasu szyfrowania i deszyfrowania w zależności od rozmiaru tekstu"""
+    plt = _pyplot()
+    plt.figure(figsize=(12, 6))
+
+    # Wykres szyfrowania
+    plt.subplot(1, 2, 1)
+    for cipher in results:
+        plt.plot(text_sizes, results[cipher]['encrypt'], label=f'{cipher} encrypt', marker='o')
+    plt.title('Czas szyfrowania w zależności od rozmiaru tekstu')
+    plt.xlabel('Rozmiar tekstu')
+    plt.ylabel('Czas (s)')
+    plt.xscale('log')
+    plt.yscale('log')
+    plt.legend()
+    plt.grid(True)
+
+    # Wykres deszyfrowania
+    plt.subplot(1, 2, 2)
+    for cipher in results:
+        plt.plot(text_sizes, results[cipher]['decrypt'], label=f'{cipher} decrypt', marker='x')
+    plt.title('Czas deszyfrowania w zależności od rozmiaru tekstu')
+    plt.xlabel('Rozmiar tekstu')
+    plt.ylabel('Czas (s)')
+    plt.xscale('log')
+    plt.yscale('log')
+    plt.legend()
+    plt.grid(True)
+
+    plt.tight_layout()
+    plt.savefig(save_path)
+    print(f"Wykres porównawczy zapisano do {save_path}")
@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import json
+import struct
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Optional, Tuple, Union
+
+from cache import get_cipher
+from exceptions import CipherError, ServiceError
+
+# Ramka: długość nagłówka JSON i długość danych (po 4 bajty, big-endian), nagłówek, dane
+_FRAME_PREFIX = struct.Struct('>II')
+MAX_FRAME_SIZE = 64 << 20
+# Żądania większe niż ten próg są wykonywane w puli, żeby nie blokować pętli zdarzeń
+OFFLOAD_THRESHOLD = 64 << 10
+
+
+def encode_frame(header: Dict, payload: bytes = b'') -> bytes:
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    return _FRAME_PREFIX.pack(len(header_bytes), len(payload)) + header_bytes + payload
+
+
+async def read_frame(reader: asyncio.StreamReader, max_frame_size: int = MAX_FRAME_SIZE) -> Optional[Tuple[Dict, bytes]]:
+    """Czyta jedną ramkę; zwraca None, gdy połączenie zostało zamknięte przed kolejną ramką"""
+    try:
+        prefix = await reader.readexactly(_FRAME_PREFIX.size)
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise ServiceError("Połączenie przerwane w trakcie ramki")
+        return None
+    header_size, payload_size = _FRAME_PREFIX.unpack(prefix)
+    if header_size + payload_size > max_frame_size:
+        raise ServiceError(f"Ramka przekracza limit {max_frame_size} bajtów")
+    try:
+        header = json.loads(await reader.readexactly(header_size))
+        payload = await reader.readexactly(payload_size)
+    except asyncio.IncompleteReadError:
+        raise ServiceError("Połączenie przerwane w trakcie ramki")
+    except ValueError as e:
+        raise ServiceError(f"Niepoprawny nagłówek ramki: {e}")
+    return header, payload
+
+
+def execute_request(operation: str, cipher_name: str, key: str, mode: str, payload: bytes) -> bytes:
+    """Wykonuje jedno żądanie; funkcja modułu, więc może działać także w puli procesów"""
+    cipher = get_cipher(cipher_name, key)
+    if operation not in ('encrypt', 'decrypt'):
+        raise ServiceError(f"Nieznana operacja: {operation}")
+    if mode == 'text':
+        method = cipher.encrypt if operation == 'encrypt' else cipher.decrypt
+        return method(payload.decode('utf-8')).encode('utf-8')
+    if mode == 'bytes':
+        method = cipher.encrypt_bytes if operation == 'encrypt' else cipher.decrypt_bytes
+        return method(payload)
+    raise ServiceError(f"Nieznany tryb: {mode}")
+
+
+class CipherServer:
+    """Serwer asyncio udostępniający szyfrowanie i deszyfrowanie przez gniazdo TCP lub Unix"""
+
+    def __init__(self, executor: Executor = None, max_inflight: int = 64, max_pending_per_connection: int = 16,
+                 max_frame_size: int = MAX_FRAME_SIZE, offload_threshold: int = OFFLOAD_THRESHOLD):
+        self.executor = executor
+        self.max_frame_size = max_frame_size
+        self.max_pending_per_connection = max_pending_per_connection
+        self.offload_threshold = offload_threshold
+        self.max_inflight = max_inflight
+        self._inflight: Optional[asyncio.Semaphore] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start_tcp(self, host: str = '127.0.0.1', port: int = 0) -> Tuple[str, int]:
+        """Uruchamia serwer TCP; zwraca faktyczny adres (port 0 oznacza dowolny wolny)"""
+        self._inflight = asyncio.Semaphore(self.max_inflight)
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def start_unix(self, path: str) -> str:
+        """Uruchamia serwer na gnieździe Unix"""
+        self._inflight = asyncio.Semaphore(self.max_inflight)
+        self._server = await asyncio.start_unix_server(self._handle_connection, path)
+        return path
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        pending = asyncio.Semaphore(self.max_pending_per_connection)
+        tasks = set()
+        try:
+            while True:
+                # Limit żądań w toku: dopóki nie ma miejsca, kolejne ramki nie są czytane
+                # i nadawca jest spowalniany przez kontrolę przepływu TCP
+                await pending.acquire()
+                await self._inflight.acquire()
+                frame = None
+                try:
+                    frame = await read_frame(reader, self.max_frame_size)
+                except ServiceError as e:
+                    writer.write(encode_frame({'id': None, 'ok': False, 'error': str(e)}))
+                except (ConnectionError, OSError):
+                    pass  # klient zerwał połączenie w trakcie ramki
+                finally:
+                    # Bez ramki nie ma żądania, które zwolniłoby limity - inaczej każde zerwane
+                    # połączenie trwale zmniejszałoby przepustowość serwera
+                    if frame is None:
+                        self._inflight.release()
+                        pending.release()
+                if frame is None:
+                    break
+                task = asyncio.ensure_future(self._respond(frame, writer, pending))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def _respond(self, frame: Tuple[Dict, bytes], writer: asyncio.StreamWriter,
+                       pending: asyncio.Semaphore) -> None:
+        header, payload = frame
+        request_id = header.get('id') if isinstance(header, dict) else None
+        try:
+            try:
+                arguments = (header['op'], header['cipher'], header['key'], header.get('mode', 'bytes'), payload)
+                if len(payload) >= self.offload_threshold:
+                    loop = asyncio.get_running_loop()
+                    result = await loop.run_in_executor(self.executor, execute_request, *arguments)
+                else:
+                    result = execute_request(*arguments)
+                response = encode_frame({'id': request_id, 'ok': True}, result)
+            except Exception as e:
+                # Każdy błąd żądania (np. zły typ pola nagłówka) dostaje odpowiedź - inaczej klient czekałby bez końca
+                error = str(e) if isinstance(e, CipherError) else f"{type(e).__name__}: {e}"
+                response = encode_frame({'id': request_id, 'ok': False, 'error': error})
+            writer.write(response)
+            await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self._inflight.release()
+            pending.release()
+
+
+class CipherClient:
+    """Klient asyncio serwera szyfrującego; obsługuje wiele równoległych żądań na jednym połączeniu"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+        self._waiting: Dict[int, asyncio.Future] = {}
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect_tcp(cls, host: str = '127.0.0.1', port: int = 0) -> 'CipherClient':
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    @classmethod
+    async def connect_unix(cls, path: str) -> 'CipherClient':
+        reader, writer = await asyncio.open_unix_connection(path)
+        return cls(reader, writer)
+
+    async def encrypt(self, cipher_name: str, key: str, data: Union[str, bytes]) -> Union[str, bytes]:
+        """Szyfruje tekst (str) lub dane binarne (bytes) po stronie serwera"""
+        return await self.request('encrypt', cipher_name, key, data)
+
+    async def decrypt(self, cipher_name: str, key: str, data: Union[str, bytes]) -> Union[str, bytes]:
+        """Deszyfruje tekst (str) lub dane binarne (bytes) po stronie serwera"""
+        return await self.request('decrypt', cipher_name, key, data)
+
+    async def request(self, operation: str, cipher_name: str, key: str,
+                      data: Union[str, bytes]) -> Union[str, bytes]:
+        text_mode = isinstance(data, str)
+        payload = data.encode('utf-8') if text_mode else bytes(data)
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+        header = {'id': request_id, 'op': operation, 'cipher': cipher_name, 'key': key,
+                  'mode': 'text' if text_mode else 'bytes'}
+        self._writer.write(encode_frame(header, payload))
+        await self._writer.drain()
+        result = await future
+        return result.decode('utf-8') if text_mode else result
+
+    async def _receive(self) -> None:
+        error = ServiceError("Połączenie z serwerem zostało zamknięte")
+        try:
+            while True:
+                frame = await read_frame(self._reader)
+                if frame is None:
+                    break
+                header, payload = frame
+                future = self._waiting.pop(header.get('id'), None)
+                if header.get('id') is None:
+                    error = ServiceError(header.get('error', "Błąd serwera"))
+                    break
+                if future is None or future.done():
+                    continue
+                if header.get('ok'):
+                    future.set_result(payload)
+                else:
+                    future.set_exception(ServiceError(header.get('error', "Błąd serwera")))
+        except (ServiceError, ConnectionError, OSError) as e:
+            error = e if isinstance(e, ServiceError) else ServiceError(str(e))
+        finally:
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._waiting.clear()
+
+    async def close(self) -> None:
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+        await self._receiver
+
+
+async def _serve(args) -> None:
+    executor = ProcessPoolExecutor(args.workers) if args.workers else None
+    server = CipherServer(executor, max_inflight=args.max_inflight)
+    if args.unix:
+        address = await server.start_unix(args.unix)
+    else:
+        address = await server.start_tcp(args.host, args.port)
+    print(f"Serwer szyfrujący nasłuchuje na {address}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+        if executor is not None:
+            executor.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serwer szyfrujący (asyncio)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="Ścieżka gniazda Unix zamiast TCP")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="Liczba procesów dla dużych żądań (0 - pula wątków)")
+    parser.add_argument('--max-inflight', type=int, default=64)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,126 @@
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+# Histogram logarytmiczny: 16 przedziałów na każdą potęgę dwójki (błąd względny ok. 6%)
+_SUB_BUCKET_BITS = 4
+_SUB_BUCKETS = 1 << _SUB_BUCKET_BITS
+
+
+def _bucket_index(value: int) -> int:
+    if value < _SUB_BUCKETS:
+        return value
+    exponent = value.bit_length() - _SUB_BUCKET_BITS - 1
+    return (exponent + 1) * _SUB_BUCKETS + (value >> exponent) - _SUB_BUCKETS
+
+
+def _bucket_value(index: int) -> float:
+    """Zwraca środek przedziału histogramu o danym indeksie"""
+    if index < _SUB_BUCKETS:
+        return float(index)
+    exponent = index // _SUB_BUCKETS - 1
+    lower = (_SUB_BUCKETS + index % _SUB_BUCKETS) << exponent
+    return lower + ((1 << exponent) - 1) / 2
+
+
+def byte_size(data) -> int:
+    """Rozmiar danych w bajtach; tekst liczony w UTF-8, żeby przepustowość tekstu i bajtów była porównywalna"""
+    if not isinstance(data, str):
+        return len(data)
+    # Dla tekstu ASCII (sprawdzenie bez przeglądania znaków) liczba znaków to liczba bajtów
+    return len(data) if data.isascii() else len(data.encode('utf-8', 'surrogatepass'))
+
+
+class PerformanceStats:
+    """Statystyki czasów wykonania o stałym zużyciu pamięci; bezpieczne przy użyciu z wielu wątków"""
+
+    def __init__(self, recent_size: int = 1000, enabled: bool = True):
+        self.enabled = enabled
+        self.recent_size = recent_size
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __getstate__(self) -> dict:
+        # Blokady nie da się przesłać do innego procesu (ProcessPoolExecutor) - tworzona jest nowa
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Czyści zebrane pomiary"""
+        with self._lock:
+            self._reset()
+
+    def _reset(self) -> None:
+        self.count = 0
+        self.total_ns = 0
+        self.total_size = 0
+        self.min_ns: Optional[int] = None
+        self.max_ns = 0
+        self.recent = deque(maxlen=self.recent_size)
+        self._histogram: Dict[int, int] = {}
+
+    def record(self, elapsed_ns: int, size: int = 0) -> None:
+        """Dodaje pomiar czasu (w nanosekundach) dla danych o rozmiarze size bajtów (zob. byte_size)"""
+        if not self.enabled:
+            return
+        index = _bucket_index(elapsed_ns)
+        with self._lock:
+            self.count += 1
+            self.total_ns += elapsed_ns
+            self.total_size += size
+            if self.min_ns is None or elapsed_ns < self.min_ns:
+                self.min_ns = elapsed_ns
+            if elapsed_ns > self.max_ns:
+                self.max_ns = elapsed_ns
+            self.recent.append(elapsed_ns)
+            self._histogram[index] = self._histogram.get(index, 0) + 1
+
+    def percentile(self, q: float) -> float:
+        """Zwraca przybliżony percentyl q (0-100) czasu wykonania w sekundach"""
+        with self._lock:
+            count = self.count
+            histogram = sorted(self._histogram.items())
+        if not count:
+            return 0.0
+        rank = max(1, round(q / 100 * count))
+        seen = 0
+        for index, bucket_count in histogram:
+            seen += bucket_count
+            if seen >= rank:
+                value = min(max(_bucket_value(index), self.min_ns), self.max_ns)
+                return value / 1e9
+        return self.max_ns / 1e9
+
+    @property
+    def recent_times(self) -> List[float]:
+        """Ostatnie pomiary w sekundach"""
+        with self._lock:
+            recent = list(self.recent)
+        return [elapsed / 1e9 for elapsed in recent]
+
+    @property
+    def average(self) -> float:
+        return self.total_ns / self.count / 1e9 if self.count else 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Przepustowość w bajtach na sekundę (tekst liczony w UTF-8)"""
+        return self.total_size / (self.total_ns / 1e9) if self.total_ns else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        """Zwraca podsumowanie pomiarów"""
+        return {
+            'count': self.count,
+            'avg': self.average,
+            'min': (self.min_ns or 0) / 1e9,
+            'max': self.max_ns / 1e9,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'throughput': self.throughput,
+        }
@@ -1,7 +1,40 @@
+import io
+import contextlib
+import asyncio
+import os
+import mmap
+import socket
+import struct
+import sys
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 import unittest
+import tempfile
 import time
-from cipher import CaesarCipher, XORCipher, ReverseCipher
+import base64
+import json
+# Kalibracja silników (engines.py) trafia do katalogu tymczasowego, a nie do pamięci podręcznej użytkownika
+os.environ.setdefault('SZYFRATOR_CACHE_DIR', tempfile.mkdtemp())
+import cipher
+from cipher import Cipher, CaesarCipher, XORCipher, ReverseCipher, VigenereCipher
 from exceptions import *
+from stats import PerformanceStats
+from cache import CipherCache
+from armor import ArmorReader, ArmorWriter
+from service import CipherServer, CipherClient, encode_frame
+from container import ContainerReader, ContainerWriter, pack_file, unpack_file, update_container
+from pipeline import CipherPipeline
+import transforms
+import cryptanalysis
+import profiling
+import tree
+import compression
+import container
+import engines
+from unittest import mock
+import main
+from benchmark import (make_corpus, parse_size, run_benchmarks, run_cracker_benchmarks, run_thread_benchmarks,
+                       run_compression_benchmarks, compare_results)
 
 
 class TestCiphers(unittest.TestCase):
@@ -68,6 +101,1141 @@ class TestCiphers(unittest.TestCase):
         stats = self.caesar.get_performance_stats()
         self.assertIn('avg_encrypt', stats)
         self.assertIn('avg_decrypt', stats)
+        self.assertIn('p99_encrypt', stats)
+        self.assertGreater(stats['throughput_encrypt'], 0)
+        self.assertLessEqual(stats['min_encrypt'], stats['p50_encrypt'])
+        self.assertLessEqual(stats['p50_encrypt'], stats['max_encrypt'])
+
+    def test_text_throughput_counts_utf8_bytes(self):
+        cipher = CaesarCipher("secret")
+        text = "Zażółć gęślą jaźń"
+        cipher.encrypt(text)
+        cipher.encrypt_bytes(text.encode('utf-8'))
+        self.assertEqual(cipher.encryption_stats.total_size, 2 * len(text.encode('utf-8')))
+        written = cipher.encrypt_stream(io.StringIO(text), io.StringIO())
+        self.assertEqual(written, len(cipher.encrypt(text).encode('utf-8')))
+
+    def test_performance_stats_disabled(self):
+        cipher = CaesarCipher("secret", collect_stats=False)
+        cipher.decrypt(cipher.encrypt(self.test_text))
+        self.assertEqual(cipher.get_performance_stats(), {})
+
+
+class TestPerformanceStats(unittest.TestCase):
+    def test_bounded_memory(self):
+        stats = PerformanceStats(recent_size=10)
+        for elapsed in range(1, 1001):
+            stats.record(elapsed * 1000, 100)
+        self.assertEqual(stats.count, 1000)
+        self.assertEqual(len(stats.recent), 10)
+        self.assertEqual(stats.min_ns, 1000)
+        self.assertEqual(stats.max_ns, 1000000)
+        self.assertAlmostEqual(stats.percentile(50), 500e-6, delta=500e-6 * 0.07)
+        self.assertAlmostEqual(stats.percentile(99), 990e-6, delta=990e-6 * 0.07)
+        self.assertAlmostEqual(stats.throughput, 100 * 1000 / stats.total_ns * 1e9)
+
+    def test_concurrent_record(self):
+        stats = PerformanceStats(recent_size=100)
+
+        def record(_):
+            for elapsed in range(1, 1001):
+                stats.record(elapsed, 10)
+
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(record, range(8)))
+        self.assertEqual(stats.count, 8000)
+        self.assertEqual(stats.total_size, 80000)
+        self.assertEqual(sum(stats._histogram.values()), 8000)
+        self.assertEqual(len(stats.recent_times), 100)
+
+    def test_picklable(self):
+        import pickle
+        stats = PerformanceStats()
+        stats.record(1000, 10)
+        copy = pickle.loads(pickle.dumps(stats))
+        copy.record(2000, 10)
+        self.assertEqual(copy.count, 2)
+
+
+class TestCaesarTranslate(unittest.TestCase):
+    @staticmethod
+    def reference_encrypt(text, shift):
+        # Pierwotna implementacja znak po znaku
+        result = []
+        for char in text:
+            if char.isalpha():
+                base = ord('a') if char.islower() else ord('A')
+                result.append(chr(((ord(char) - base + shift) % 26) + base))
+            else:
+                result.append(char)
+        return ''.join(result)
+
+    def test_matches_reference(self):
+        text = "Zażółć gęślą jaźń! Ala ma kota, a kot ma Ale. 123"
+        for key in ("secret", "a", "klucz"):
+            cipher = CaesarCipher(key)
+            self.assertEqual(cipher.encrypt(text), self.reference_encrypt(text, cipher.shift))
+            self.assertEqual(cipher.decrypt(text), self.reference_encrypt(text, -cipher.shift))
+
+    def test_bytes_mode(self):
+        cipher = CaesarCipher("secret")
+        data = bytes(range(256))
+        encrypted = cipher.encrypt_bytes(data)
+        self.assertEqual(cipher.decrypt_bytes(encrypted), data)
+        self.assertEqual(cipher.encrypt_bytes(b"Ala ma kota!").decode('ascii'), cipher.encrypt("Ala ma kota!"))
+
+
+class TestXORCore(unittest.TestCase):
+    def test_matches_reference(self):
+        text = ''.join(chr(i % 256) for i in range(200003))
+        key = "secret"
+        key_repeated = (key * (len(text) // len(key) + 1))[:len(text)]
+        expected = base64.b64encode(bytes(ord(t) ^ ord(k) for t, k in zip(text, key_repeated))).decode('utf-8')
+        cipher = XORCipher(key)
+        self.assertEqual(cipher.encrypt(text), expected)
+        self.assertEqual(cipher.decrypt(expected), text)
+
+    def test_bytes_mode_accepts_any_buffer(self):
+        cipher = XORCipher("klucz")
+        data = bytes(range(256)) * 300
+        encrypted = cipher.encrypt_bytes(bytearray(data))
+        self.assertEqual(cipher.decrypt_bytes(memoryview(encrypted)), data)
+        self.assertEqual(cipher._key_stream.xor(data[7:], 7), encrypted[7:])
+
+    def test_numpy_matches_fallback(self):
+        import cipher as cipher_module
+        if cipher_module._numpy() is None:
+            self.skipTest("NumPy nie jest zainstalowany")
+        stream = XORCipher("klucz")._key_stream
+        data = os.urandom(300001)
+        for offset in (0, 3, 65539):
+            with_numpy = stream.xor(data, offset)
+            with mock.patch.object(cipher_module, '_numpy', return_value=None):
+                self.assertEqual(stream.xor(data, offset), with_numpy)
+
+    def test_shared_instance_across_threads(self):
+        cipher = XORCipher("klucz")
+        chunks = [os.urandom(100000 + n) for n in range(16)]
+        expected = [XORCipher("klucz", collect_stats=False).encrypt_bytes(chunk) for chunk in chunks]
+        with ThreadPoolExecutor(8) as executor:
+            self.assertEqual(list(executor.map(cipher.encrypt_bytes, chunks)), expected)
+        self.assertEqual(cipher.encryption_stats.count, len(chunks))
+        self.assertEqual(cipher.encryption_stats.total_size, sum(map(len, chunks)))
+
+
+class TestVigenere(unittest.TestCase):
+    @staticmethod
+    def reference_encrypt(text, shifts):
+        # Cezar znak po znaku z przesunięciem kolejnej pozycji klucza
+        return ''.join(TestCaesarTranslate.reference_encrypt(char, shifts[index % len(shifts)])
+                       for index, char in enumerate(text))
+
+    def test_matches_reference(self):
+        text = "Zażółć gęślą jaźń! Ala ma kota, a kot ma Ale. 123" * 7
+        for key in ("secret", "a", "Tajny Klucz!", "zażółć", "k" * 500):
+            cipher = VigenereCipher(key)
+            for sample in (text, text.encode('ascii', 'replace').decode('ascii')):
+                encrypted = cipher.encrypt(sample)
+                self.assertEqual(encrypted, self.reference_encrypt(sample, cipher.shifts))
+                self.assertEqual(cipher.decrypt(sample), self.reference_encrypt(sample, [-s for s in cipher.shifts]))
+                self.assertEqual(cipher.decrypt(encrypted), self.reference_encrypt(
+                    encrypted, [-s for s in cipher.shifts]))
+        self.assertEqual(VigenereCipher("secret").encrypt("Ala ma kota"), "Spc qt oqke")
+        self.assertEqual(VigenereCipher("b").encrypt("Zebra"), CaesarCipher.from_shift(1).encrypt("Zebra"))
+
+    def test_bytes_mode(self):
+        for key in ("secret", "Tajny Klucz!", "k" * 500):
+            cipher = VigenereCipher(key)
+            for size in (0, 5, 1000, 100003):
+                data = os.urandom(size)
+                expected = self.reference_encrypt(data.decode('latin-1'), cipher.shifts)
+                # Tylko litery ASCII są przesuwane
+                expected = bytes(ord(new) if old.isascii() else ord(old)
+                                 for old, new in zip(data.decode('latin-1'), expected))
+                encrypted = cipher.encrypt_bytes(data)
+                self.assertEqual(encrypted, expected)
+                self.assertEqual(cipher.decrypt_bytes(memoryview(encrypted)), data)
+
+    def test_numpy_matches_fallback(self):
+        import cipher as cipher_module
+        if cipher_module._numpy() is None:
+            self.skipTest("NumPy nie jest zainstalowany")
+        cipher = VigenereCipher("Tajny Klucz!")
+        data = os.urandom(300001)
+        for offset in (0, 5, 65539):
+            with_numpy = cipher._encrypt_chunk(data, offset)
+            with mock.patch.object(cipher_module, '_numpy', return_value=None):
+                self.assertEqual(cipher._encrypt_chunk(data, offset), with_numpy)
+                self.assertEqual(cipher._decrypt_chunk(with_numpy, offset), data)
+
+    def test_chunk_offsets(self):
+        cipher = VigenereCipher("Tajny Klucz!")
+        text = "Zażółć gęślą jaźń! Ala ma kota." * 40
+        encrypted = cipher.encrypt(text)
+        self.assertEqual(''.join(cipher._encrypt_chunk(text[start:start + 13], start)
+                                 for start in range(0, len(text), 13)), encrypted)
+
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.text = "Ala ma kota, a kot ma Ale!\n" * 500
+        self.polish_text = "Zażółć gęślą jaźń. Ala ma kota!\n" * 500
+        self.latin_text = ''.join(chr(i % 256) for i in range(10007))
+
+    def assert_stream_matches(self, cipher, text, chunk_size=7):
+        encrypted = io.StringIO()
+        cipher.encrypt_stream(io.StringIO(text), encrypted, chunk_size)
+        self.assertEqual(encrypted.getvalue(), cipher.encrypt(text))
+        decrypted = io.StringIO()
+        cipher.decrypt_stream(io.StringIO(encrypted.getvalue()), decrypted, chunk_size)
+        self.assertEqual(decrypted.getvalue(), text)
+
+    def test_text_streams_match_whole_string(self):
+        self.assert_stream_matches(CaesarCipher("secret"), self.text)
+        self.assert_stream_matches(ReverseCipher("secret"), self.polish_text)
+        self.assert_stream_matches(XORCipher("secret"), self.latin_text)
+        self.assert_stream_matches(VigenereCipher("secret"), self.text)
+
+    def test_wrapped_base64_stream(self):
+        cipher = XORCipher("secret")
+        encrypted = cipher.encrypt(self.latin_text)
+        # Base64 łamane co 76 znaków i zakończone znakiem nowej linii, jak z narzędzia base64
+        wrapped = '\n'.join(encrypted[start:start + 76] for start in range(0, len(encrypted), 76)) + '\n'
+        self.assertEqual(cipher.decrypt(wrapped), self.latin_text)
+        for chunk_size in (7, 100, 4096):
+            decrypted = io.StringIO()
+            cipher.decrypt_stream(io.StringIO(wrapped), decrypted, chunk_size)
+            self.assertEqual(decrypted.getvalue(), self.latin_text)
+        decrypted = io.StringIO()
+        CipherPipeline(cipher, ReverseCipher("x")).decrypt_stream(io.StringIO(wrapped[::-1]), decrypted, 100)
+        self.assertEqual(decrypted.getvalue(), self.latin_text)
+
+    def test_binary_streams(self):
+        data = bytes(range(256)) * 40
+        for cipher in (CaesarCipher("secret"), XORCipher("secret"), ReverseCipher("secret"), VigenereCipher("secret")):
+            encrypted = io.BytesIO()
+            cipher.encrypt_stream(io.BytesIO(data), encrypted, 100)
+            self.assertEqual(encrypted.getvalue(), cipher.encrypt_bytes(data))
+            decrypted = io.BytesIO()
+            cipher.decrypt_stream(io.BytesIO(encrypted.getvalue()), decrypted, 100)
+            self.assertEqual(decrypted.getvalue(), data)
+
+    def test_file_helpers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            plain = os.path.join(directory, "plain.txt")
+            encrypted = os.path.join(directory, "encrypted.txt")
+            decrypted = os.path.join(directory, "decrypted.txt")
+            for cipher, text in ((CaesarCipher("secret"), self.text), (ReverseCipher("secret"), self.polish_text)):
+                with open(plain, 'w', encoding='utf-8', newline='') as file:
+                    file.write(text)
+                cipher.encrypt_file(plain, encrypted, chunk_size=5)
+                with open(encrypted, encoding='utf-8', newline='') as file:
+                    self.assertEqual(file.read(), cipher.encrypt(text))
+                cipher.decrypt_file(encrypted, decrypted, chunk_size=5)
+                with open(decrypted, encoding='utf-8', newline='') as file:
+                    self.assertEqual(file.read(), text)
+
+
+class TestXORRawMode(unittest.TestCase):
+    def setUp(self):
+        self.cipher = XORCipher("klucz")
+        self.text = "Zażółć gęślą jaźń"
+
+    def test_polish_text_round_trip(self):
+        encrypted = self.cipher.encrypt_raw(self.text)
+        self.assertEqual(len(encrypted), len(self.text.encode('utf-8')))
+        self.assertEqual(self.cipher.decrypt_raw(encrypted), self.text)
+        with self.assertRaises(EncryptionError):
+            self.cipher.encrypt(self.text)
+
+    def test_streaming_armor(self):
+        data = self.text.encode('utf-8') * 1000
+        armored = io.StringIO()
+        with ArmorWriter(armored) as writer:
+            self.cipher.encrypt_stream(io.BytesIO(data), writer, chunk_size=100)
+        self.assertEqual(armored.getvalue(), base64.b64encode(self.cipher.encrypt_bytes(data)).decode('ascii'))
+
+        wrapped = "\n".join(armored.getvalue()[start:start + 76] for start in range(0, len(armored.getvalue()), 76))
+        decrypted = io.BytesIO()
+        self.cipher.decrypt_stream(ArmorReader(io.StringIO(wrapped)), decrypted, chunk_size=100)
+        self.assertEqual(decrypted.getvalue(), data)
+
+    def test_binary_file_helpers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            plain = os.path.join(directory, "plain.txt")
+            encrypted = os.path.join(directory, "encrypted.b64")
+            decrypted = os.path.join(directory, "decrypted.txt")
+            with open(plain, 'w', encoding='utf-8') as file:
+                file.write(self.text * 100)
+            self.cipher.encrypt_binary_file(plain, encrypted, chunk_size=64, armor=True)
+            self.cipher.decrypt_binary_file(encrypted, decrypted, chunk_size=64, armor=True)
+            with open(decrypted, encoding='utf-8') as file:
+                self.assertEqual(file.read(), self.text * 100)
+
+
+class TestMmap(unittest.TestCase):
+    def test_copy_and_in_place(self):
+        data = os.urandom(3 * mmap.PAGESIZE + 123)
+        with tempfile.TemporaryDirectory() as directory:
+            plain = os.path.join(directory, "plain.bin")
+            encrypted = os.path.join(directory, "encrypted.bin")
+            for cipher in (CaesarCipher("secret"), XORCipher("secret"), ReverseCipher("secret"),
+                           VigenereCipher("secret")):
+                with open(plain, 'wb') as file:
+                    file.write(data)
+                cipher.encrypt_mmap(plain, encrypted, window_size=mmap.PAGESIZE)
+                with open(encrypted, 'rb') as file:
+                    self.assertEqual(file.read(), cipher.encrypt_bytes(data))
+
+                cipher.encrypt_mmap(plain, window_size=mmap.PAGESIZE)
+                with open(plain, 'rb') as file:
+                    self.assertEqual(file.read(), cipher.encrypt_bytes(data))
+                cipher.decrypt_mmap(plain, window_size=mmap.PAGESIZE)
+                with open(plain, 'rb') as file:
+                    self.assertEqual(file.read(), data)
+
+
+class TestParallel(unittest.TestCase):
+    def setUp(self):
+        self.data = os.urandom(100003)
+        self.ciphers = (CaesarCipher("secret"), XORCipher("secret"), ReverseCipher("secret"), VigenereCipher("secret"))
+
+    def test_matches_serial(self):
+        for use_threads in (True, False):
+            for cipher in self.ciphers:
+                encrypted = cipher.encrypt_parallel(self.data, workers=2, chunk_size=10000, use_threads=use_threads)
+                self.assertEqual(encrypted, cipher.encrypt_bytes(self.data))
+                decrypted = cipher.decrypt_parallel(encrypted, workers=2, chunk_size=10000, use_threads=use_threads)
+                self.assertEqual(decrypted, self.data)
+
+    def test_file_variant(self):
+        with tempfile.TemporaryDirectory() as directory:
+            plain = os.path.join(directory, "plain.bin")
+            encrypted = os.path.join(directory, "encrypted.bin")
+            with open(plain, 'wb') as file:
+                file.write(self.data)
+            for cipher in self.ciphers:
+                cipher.encrypt_file_parallel(plain, encrypted, workers=2, chunk_size=10000)
+                with open(encrypted, 'rb') as file:
+                    self.assertEqual(file.read(), cipher.encrypt_bytes(self.data))
+
+
+class TestBatch(unittest.TestCase):
+    def test_many_matches_single_calls(self):
+        messages = ["Ala ma kota", "", "a kot ma Ale!", "x" * 37]
+        for cipher in (CaesarCipher("secret"), XORCipher("secret"), ReverseCipher("secret")):
+            encrypted = cipher.encrypt_many(messages)
+            self.assertEqual(encrypted, [cipher.encrypt(message) for message in messages])
+            self.assertEqual(cipher.decrypt_many(encrypted), messages)
+
+            binary = [message.encode('utf-8') for message in messages]
+            self.assertEqual(cipher.decrypt_many(cipher.encrypt_many(binary)), binary)
+
+    def test_single_timing_sample_per_batch(self):
+        cipher = XORCipher("secret")
+        cipher.encrypt_many(["a", "b", "c"])
+        self.assertEqual(cipher.encryption_stats.count, 1)
+
+
+class TestImportTime(unittest.TestCase):
+    # Budżet czasu importu modułu cipher (w sekundach)
+    IMPORT_BUDGET = 0.25
+
+    def test_import_cipher_is_fast(self):
+        code = ("import sys, time; start = time.perf_counter(); import cipher; "
+                "print(time.perf_counter() - start); print('matplotlib' in sys.modules)")
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+        self.assertLess(float(output[0]), self.IMPORT_BUDGET)
+        self.assertEqual(output[1], 'False')
+
+
+class TestBatchCli(unittest.TestCase):
+    def run_cli(self, *args, data=b""):
+        return subprocess.run([sys.executable, "main.py", *args], input=data, capture_output=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    def test_stdin_to_stdout(self):
+        data = "Zażółć gęślą jaźń".encode('utf-8')
+        for cipher in ("caesar", "xor", "reverse"):
+            encrypted = self.run_cli("encrypt", "--cipher", cipher, "--key", "secret", data=data)
+            self.assertEqual(encrypted.returncode, 0)
+            decrypted = self.run_cli("decrypt", "--cipher", cipher, "--key", "secret", data=encrypted.stdout)
+            self.assertEqual(decrypted.stdout, data)
+
+    def test_multiple_files_with_jobs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            inputs = []
+            for index in range(3):
+                filename = os.path.join(directory, f"plik{index}.txt")
+                with open(filename, 'wb') as file:
+                    file.write(b"Ala ma kota " * (index + 1))
+                inputs.append(filename)
+            key_file = os.path.join(directory, "klucz")
+            with open(key_file, 'w', encoding='utf-8') as file:
+                file.write("secret\n")
+            result = self.run_cli("encrypt", "--cipher", "xor", "--key-file", key_file, "--jobs", "2", "-i", *inputs)
+            self.assertEqual(result.returncode, 0)
+            cipher = XORCipher("secret")
+            for index, filename in enumerate(inputs):
+                with open(filename + ".enc", 'rb') as file:
+                    self.assertEqual(cipher.decrypt_bytes(file.read()), b"Ala ma kota " * (index + 1))
+
+    def test_armored_output(self):
+        data = "Zażółć gęślą jaźń".encode('utf-8')
+        encrypted = self.run_cli("encrypt", "--cipher", "xor", "--key", "secret", "--armor", data=data)
+        self.assertEqual(encrypted.stdout, base64.b64encode(XORCipher("secret").encrypt_bytes(data)))
+        decrypted = self.run_cli("decrypt", "--cipher", "xor", "--key", "secret", "--armor", data=encrypted.stdout)
+        self.assertEqual(decrypted.stdout, data)
+
+    def test_compressed_stdin(self):
+        data = b"2024-01-01 INFO request done\n" * 2000
+        encrypted = self.run_cli("encrypt", "--cipher", "xor", "--key", "secret", "--compress", "zlib:9", data=data)
+        self.assertLess(len(encrypted.stdout), len(data) // 10)
+        decrypted = self.run_cli("decrypt", "--cipher", "xor", "--key", "secret", data=encrypted.stdout)
+        self.assertEqual(decrypted.stdout, data)
+
+    def test_trace_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            trace = os.path.join(directory, "pomiary.jsonl")
+            result = self.run_cli("encrypt", "--cipher", "xor", "--key", "secret", "--armor", "--trace", trace,
+                                  data=b"Ala ma kota" * 1000)
+            self.assertEqual(result.returncode, 0)
+            with open(trace, encoding='utf-8') as file:
+                names = {json.loads(line)['name'] for line in file}
+            self.assertTrue({'read', 'encrypt', 'base64', 'write'} <= names)
+
+    def test_exit_codes(self):
+        self.assertEqual(self.run_cli("encrypt", "--cipher", "caesar", "--key", "k", "-i", "brak.txt").returncode, 1)
+        self.assertEqual(self.run_cli("encrypt", "--cipher", "nieznany", "--key", "k").returncode, 2)
+        result = self.run_cli("encrypt", "--cipher", "xor", "--key", "k", "--compress", "zlib:99")
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("-1..9", result.stderr.decode("utf-8"))
+
+
+class TestCompression(unittest.TestCase):
+    data = "2024-01-01 12:00:00 INFO żółw zapytanie obsłużone\n".encode('utf-8') * 5000
+
+    def test_level_ranges(self):
+        self.assertEqual(compression.parse_spec('zlib:-1'), ('zlib', -1))
+        self.assertEqual(compression.parse_spec('lzma:0'), ('lzma', 0))
+        for spec in ('zlib:99', 'bz2:0', 'lzma:42', 'zlib:x'):
+            with self.assertRaises(ValueError):
+                compression.parse_spec(spec)
+        with self.assertRaises(ValueError):
+            XORCipher("k").encrypt_stream(io.BytesIO(b"dane"), io.BytesIO(), compression='lzma', level=42)
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ValueError):
+                tree.process_tree('xor', 'k', directory, directory + '-wynik', compress=('bz2', 10))
+
+    def test_roundtrip_all_codecs(self):
+        for cipher in (CaesarCipher("klucz"), XORCipher("klucz"), ReverseCipher("klucz")):
+            for codec in ('zlib', 'bz2', 'lzma'):
+                with self.subTest(cipher=type(cipher).__name__, codec=codec):
+                    encrypted = io.BytesIO()
+                    written = cipher.encrypt_stream(io.BytesIO(self.data), encrypted, 1000, codec, 1)
+                    self.assertEqual(written, len(encrypted.getvalue()))
+                    self.assertLess(written, len(self.data) // 10)
+                    decrypted = io.BytesIO()
+                    cipher.decrypt_stream(io.BytesIO(encrypted.getvalue()), decrypted, 1000)
+                    self.assertEqual(decrypted.getvalue(), self.data)
+
+    def test_detection_keeps_plain_streams(self):
+        cipher = XORCipher("klucz")
+        for data in (b"", b"abc", self.data):
+            encrypted = cipher.encrypt_bytes(data)
+            decrypted = io.BytesIO()
+            # Strumień bez przewijania - odczytany nagłówek musi wrócić na początek danych
+            cipher.decrypt_stream(ArmorReader(io.BytesIO(base64.b64encode(encrypted))), decrypted, 7)
+            self.assertEqual(decrypted.getvalue(), data)
+
+    def test_text_files(self):
+        text = self.data.decode('utf-8')
+        with tempfile.TemporaryDirectory() as directory:
+            plain, encrypted, decrypted = (os.path.join(directory, name) for name in ('p.txt', 'e.bin', 'd.txt'))
+            with open(plain, 'w', encoding='utf-8', newline='') as file:
+                file.write(text)
+            for cipher in (CaesarCipher("klucz"), ReverseCipher("klucz")):
+                cipher.encrypt_file(plain, encrypted, chunk_size=100, compression='lzma')
+                self.assertLess(os.path.getsize(encrypted), len(self.data) // 10)
+                # Bardzo mały kawałek dzieli znaki wielobajtowe między bloki rozpakowanych danych
+                cipher.decrypt_file(encrypted, decrypted, chunk_size=3)
+                with open(decrypted, 'r', encoding='utf-8', newline='') as file:
+                    self.assertEqual(file.read(), text)
+
+    def test_corrupted_stream(self):
+        cipher = XORCipher("klucz")
+        encrypted = io.BytesIO()
+        cipher.encrypt_stream(io.BytesIO(self.data), encrypted, compression='zlib')
+        for damaged in (encrypted.getvalue()[:-5], encrypted.getvalue()[:-1] + b'x'):
+            with self.assertRaises(DecryptionError):
+                cipher.decrypt_stream(io.BytesIO(damaged), io.BytesIO())
+        with self.assertRaises(ValueError):
+            cipher.encrypt_stream(io.BytesIO(self.data), io.BytesIO(), compression='zip')
+
+
+class TestProfiling(unittest.TestCase):
+    def test_disabled_by_default(self):
+        self.assertFalse(profiling.active)
+        self.assertIs(profiling.span('a'), profiling.span('b'))
+
+    def test_memory_sink_phases(self):
+        cipher = XORCipher("klucz")
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "plik.txt")
+            cipher.save_to_file(filename, cipher.encrypt("Ala ma kota"))
+            with profiling.tracing(profiling.MemorySink()) as sink:
+                self.assertEqual(cipher.decrypt(cipher.read_from_file(filename)), "Ala ma kota")
+                cipher.encrypt("Ala ma kota")
+        self.assertFalse(profiling.active)
+        summary = sink.summary()
+        for name in ('read', 'decode', 'decrypt', 'base64', 'xor', 'encode', 'encrypt'):
+            self.assertIn(name, summary)
+        self.assertEqual(summary['base64']['count'], 2)
+        self.assertEqual(summary['encrypt']['count'], 1)
+        self.assertIn('xor', sink.report())
+
+    def test_read_keeps_newline_translation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "plik.txt")
+            with open(filename, 'wb') as file:
+                file.write("a\r\nb\rc\nż".encode('utf-8'))
+            self.assertEqual(ReverseCipher("k").read_from_file(filename), "a\nb\nc\nż")
+
+    def test_file_sinks(self):
+        trace, lines = io.StringIO(), io.StringIO()
+        cipher = CaesarCipher("klucz")
+        with profiling.tracing(profiling.ChromeTraceSink(trace), profiling.JsonLinesSink(lines)):
+            cipher.encrypt_stream(io.StringIO("Ala ma kota" * 100), io.StringIO(), chunk_size=256)
+        events = json.loads(trace.getvalue())
+        self.assertEqual({event['name'] for event in events}, {'read', 'encrypt', 'write'})
+        self.assertTrue(all(event['ph'] == 'X' and event['dur'] >= 0 for event in events))
+        self.assertEqual(len(lines.getvalue().splitlines()), len(events))
+
+    def test_profile_call(self):
+        result = profiling.profile_call(XORCipher("klucz").encrypt_bytes, b"x" * 100000, memory=True)
+        self.assertEqual(len(result.value), 100000)
+        self.assertIn('encrypt_bytes', result.report)
+        self.assertGreater(result.peak_memory, 100000)
+
+
+class TestTree(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.directory.name, "zrodlo")
+        self.target = os.path.join(self.directory.name, "wynik")
+        self.files = {'a.txt': b"Ala ma kota" * 100, 'logi/b.log': b"INFO ok\n" * 1000, 'logi/x/c.bin': os.urandom(5000)}
+        for relative, data in self.files.items():
+            self.write(relative, data)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, relative, data):
+        path = os.path.join(self.source, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(data)
+
+    def test_mirrors_tree_and_skips_unchanged(self):
+        summary = tree.process_tree('xor', 'klucz', self.source, self.target, workers=2)
+        self.assertEqual((summary['files'], summary['processed'], summary['skipped']), (3, 3, 0))
+        cipher = XORCipher("klucz")
+        for relative, data in self.files.items():
+            with open(os.path.join(self.target, relative), 'rb') as file:
+                self.assertEqual(cipher.decrypt_bytes(file.read()), data)
+        self.assertEqual(tree.process_tree('xor', 'klucz', self.source, self.target, workers=1)['processed'], 0)
+
+        # Sam nowy czas modyfikacji - skrót zawartości się zgadza, plik nie jest szyfrowany ponownie
+        os.utime(os.path.join(self.source, 'a.txt'), ns=(1, 1))
+        self.write('logi/b.log', b"INFO zmiana\n")
+        summary = tree.process_tree('xor', 'klucz', self.source, self.target, workers=1)
+        self.assertEqual((summary['processed'], summary['skipped']), (1, 2))
+        # Inny klucz - wszystkie pliki od nowa
+        self.assertEqual(tree.process_tree('xor', 'inny', self.source, self.target, workers=1)['processed'], 3)
+        self.assertFalse([name for name in os.listdir(self.target) if name.endswith('tmp')])
+
+    def test_decrypt_roundtrip_and_prune(self):
+        tree.process_tree('caesar', 'klucz', self.source, self.target, compress=('zlib', 6), workers=1)
+        os.remove(os.path.join(self.source, 'a.txt'))
+        summary = tree.process_tree('caesar', 'klucz', self.source, self.target, compress=('zlib', 6),
+                                    workers=1, prune=True)
+        self.assertEqual((summary['removed'], summary['processed']), (1, 0))
+        self.assertFalse(os.path.exists(os.path.join(self.target, 'a.txt')))
+
+        restored = os.path.join(self.directory.name, "odtworzone")
+        tree.process_tree('caesar', 'klucz', self.target, restored, operation='decrypt', workers=1)
+        for relative, data in self.files.items():
+            if relative != 'a.txt':
+                with open(os.path.join(restored, relative), 'rb') as file:
+                    self.assertEqual(file.read(), data)
+
+    def test_removed_entries_kept_until_pruned(self):
+        tree.process_tree('xor', 'klucz', self.source, self.target, workers=1)
+        os.remove(os.path.join(self.source, 'a.txt'))
+        summary = tree.process_tree('xor', 'klucz', self.source, self.target, workers=1)
+        # Bez prune nic nie jest usuwane - wynik zostaje jako osierocony
+        self.assertEqual((summary['files'], summary['skipped'], summary['removed'], summary['orphaned']),
+                         (2, 2, 0, 1))
+        self.assertTrue(os.path.exists(os.path.join(self.target, 'a.txt')))
+        # Zmiana klucza nie gubi wpisu - późniejsze prune nadal znajduje osierocony wynik
+        tree.process_tree('xor', 'inny', self.source, self.target, workers=1)
+        summary = tree.process_tree('xor', 'inny', self.source, self.target, workers=1, prune=True)
+        self.assertEqual((summary['removed'], summary['orphaned']), (1, 0))
+        self.assertFalse(os.path.exists(os.path.join(self.target, 'a.txt')))
+        self.assertEqual(tree.process_tree('xor', 'inny', self.source, self.target, workers=1,
+                                           prune=True)['removed'], 0)
+
+    def test_nested_directories_rejected(self):
+        with self.assertRaises(FileOperationError):
+            tree.process_tree('xor', 'klucz', self.source, os.path.join(self.source, 'wynik'))
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_corpora(self):
+        self.assertEqual(len(make_corpus('binary', 1000)), 1000)
+        self.assertEqual(len(make_corpus('polish', 1000)), 1000)
+        self.assertEqual(sum(map(len, make_corpus('messages', 1000))), 1000)
+        self.assertEqual(parse_size('16M'), 16 << 20)
+
+    def test_run_and_compare(self):
+        results = run_benchmarks(['caesar', 'xor'], ['ascii', 'polish'], [1000], ['encrypt', 'decrypt'],
+                                 repeats=2, warmup=0, verbose=False)
+        # XOR w trybie tekstowym nie obsługuje polskich znaków - mierzona jest ścieżka surowa (UTF-8)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(result['mb_per_s'] > 0 for result in results))
+        self.assertEqual({result['path'] for result in results if result['name'].startswith('xor/encrypt/polish')},
+                         {'raw'})
+        with mock.patch('builtins.print') as printed:
+            run_benchmarks(['reverse'], ['polish'], [10], ['encrypt'], repeats=1, warmup=0)
+        self.assertEqual(printed.call_count, 1)
+        with mock.patch.object(ReverseCipher, 'encrypt', side_effect=EncryptionError("test")), \
+                mock.patch('builtins.print') as printed:
+            self.assertEqual(run_benchmarks(['reverse'], ['polish'], [10], ['encrypt'], repeats=1, warmup=0), [])
+        self.assertIn("pominięto", printed.call_args[0][0])
+
+        baseline = [dict(result, mean=result['mean'] / 2) for result in results]
+        self.assertEqual(len(compare_results(results, baseline, threshold=0.5)), len(results))
+        self.assertEqual(compare_results(results, results), [])
+
+    def test_cracker_benchmark(self):
+        results = run_cracker_benchmarks([8192], repeats=1, verbose=False)
+        self.assertEqual([result['name'] for result in results], ['crack/xor/sampled/8192', 'crack/xor/full/8192'])
+        self.assertTrue(all(result['recovered'] for result in results))
+
+    def test_compression_benchmark(self):
+        results = run_compression_benchmarks(['xor'], ['zlib:1'], size=1 << 16, repeats=1, verbose=False)
+        self.assertEqual([result['compression'] for result in results], ['none', 'zlib:1'])
+        self.assertTrue(all(result['roundtrip_ok'] for result in results))
+        self.assertLess(results[1]['stored_size'], results[0]['stored_size'])
+
+    def test_thread_benchmark(self):
+        results = run_thread_benchmarks(['xor'], [1, 2], size=1 << 16, chunk_size=1 << 14, repeats=1,
+                                        verbose=False)
+        self.assertEqual([result['threads'] for result in results], [1, 2])
+        self.assertEqual(results[0]['speedup'], 1.0)
+
+
+class TestCipherCache(unittest.TestCase):
+    def test_lru_counters(self):
+        cache = CipherCache(maxsize=2)
+        first = cache.get("caesar", "a")
+        self.assertIs(cache.get("caesar", "a"), first)
+        cache.get("xor", "b")
+        cache.get("caesar", "a")
+        cache.get("reverse", "c")  # usuwa najdawniej używany ("xor", "b")
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 3, 'evictions': 1, 'size': 2, 'maxsize': 2})
+        self.assertIs(cache.get("caesar", "a"), first)
+        with self.assertRaises(CipherError):
+            cache.get("nieznany", "a")
+
+    def test_thread_safety(self):
+        cache = CipherCache(maxsize=8)
+        keys = [f"klucz{index % 16}" for index in range(2000)]
+        with ThreadPoolExecutor(8) as executor:
+            ciphers = list(executor.map(lambda key: cache.get("xor", key), keys))
+        self.assertTrue(all(cipher.key == key for cipher, key in zip(ciphers, keys)))
+        stats = cache.stats()
+        self.assertEqual(stats['hits'] + stats['misses'], len(keys))
+        self.assertLessEqual(stats['size'], 8)
+
+
+class TestService(unittest.TestCase):
+    def test_concurrent_requests_over_tcp(self):
+        async def scenario():
+            server = CipherServer(offload_threshold=1024, max_inflight=4)
+            host, port = await server.start_tcp()
+            client = await CipherClient.connect_tcp(host, port)
+            try:
+                payloads = [os.urandom(size) for size in (0, 10, 5000, 100000)] * 5
+                encrypted = await asyncio.gather(*(client.encrypt("xor", "secret", data) for data in payloads))
+                self.assertEqual(encrypted, [XORCipher("secret").encrypt_bytes(data) for data in payloads])
+                decrypted = await asyncio.gather(*(client.decrypt("xor", "secret", data) for data in encrypted))
+                self.assertEqual(decrypted, payloads)
+
+                text = await client.encrypt("caesar", "secret", "Ala ma kota")
+                self.assertEqual(text, CaesarCipher("secret").encrypt("Ala ma kota"))
+                with self.assertRaises(ServiceError):
+                    await client.encrypt("nieznany", "secret", b"dane")
+                # Nieoczekiwany błąd (tu: klucz, który nie jest tekstem) też daje odpowiedź, a nie zawieszenie klienta
+                with self.assertRaises(ServiceError):
+                    await asyncio.wait_for(client.request('encrypt', "xor", ["lista"], b"dane"), 5)
+                self.assertEqual(await client.encrypt("xor", "secret", b"dane"),
+                                 XORCipher("secret").encrypt_bytes(b"dane"))
+            finally:
+                await client.close()
+                await server.close()
+
+        asyncio.run(scenario())
+
+    def test_frame_limit(self):
+        async def scenario():
+            server = CipherServer(max_frame_size=1000)
+            host, port = await server.start_tcp()
+            client = await CipherClient.connect_tcp(host, port)
+            try:
+                with self.assertRaises(ServiceError):
+                    await client.encrypt("xor", "secret", b"x" * 2000)
+            finally:
+                await client.close()
+                await server.close()
+
+        asyncio.run(scenario())
+
+
+    def test_reset_mid_frame_releases_capacity(self):
+        async def scenario():
+            server = CipherServer(max_inflight=1)
+            host, port = await server.start_tcp()
+            try:
+                for _ in range(3):
+                    _, writer = await asyncio.open_connection(host, port)
+                    writer.write(encode_frame({'id': 1, 'op': 'encrypt'}, b"dane")[:10])
+                    await writer.drain()
+                    await asyncio.sleep(0.05)
+                    # SO_LINGER 0: zamknięcie wysyła RST, więc serwer dostaje ConnectionResetError
+                    writer.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_LINGER,
+                                                               struct.pack('ii', 1, 0))
+                    writer.transport.abort()
+                    await asyncio.sleep(0.05)
+                client = await CipherClient.connect_tcp(host, port)
+                try:
+                    self.assertEqual(await asyncio.wait_for(client.encrypt("xor", "secret", b"dane"), 5),
+                                     XORCipher("secret").encrypt_bytes(b"dane"))
+                finally:
+                    await client.close()
+            finally:
+                await server.close()
+
+        asyncio.run(scenario())
+
+
+class TestContainer(unittest.TestCase):
+    def setUp(self):
+        self.data = os.urandom(10000)
+        self.directory = tempfile.TemporaryDirectory()
+        self.plain = os.path.join(self.directory.name, "plain.bin")
+        self.container = os.path.join(self.directory.name, "plain.szyfr")
+        with open(self.plain, 'wb') as file:
+            file.write(self.data)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read_range_and_parallel(self):
+        for cipher in (CaesarCipher("secret"), XORCipher("secret"), ReverseCipher("secret")):
+            pack_file(cipher, self.plain, self.container, chunk_size=1000)
+            reader = ContainerReader(self.container, cipher)
+            self.assertEqual(len(reader.index), 10)
+            self.assertEqual(reader.size, len(self.data))
+            for offset, length in ((0, 10), (995, 10), (2500, 3000), (9990, 100), (20000, 5)):
+                self.assertEqual(reader.read_range(offset, length), self.data[offset:offset + length])
+            self.assertEqual(reader.read_all(), self.data)
+            self.assertEqual(reader.read_all(workers=2, use_threads=True), self.data)
+            self.assertEqual(reader.read_all(workers=2), self.data)
+
+    def test_append_keeps_existing_chunks(self):
+        cipher = XORCipher("secret")
+        pack_file(cipher, self.plain, self.container, chunk_size=4096)
+        with open(self.container, 'rb') as file:
+            chunks_before = file.read(ContainerReader(self.container, cipher).index[-1][0])
+        with ContainerWriter(self.container, cipher, append=True) as writer:
+            writer.write(b"nowe dane")
+        with open(self.container, 'rb') as file:
+            self.assertTrue(file.read().startswith(chunks_before))
+        output = os.path.join(self.directory.name, "output.bin")
+        unpack_file(cipher, self.container, output)
+        with open(output, 'rb') as file:
+            self.assertEqual(file.read(), self.data + b"nowe dane")
+
+    def test_interrupted_append_recovers_last_footer(self):
+        cipher = XORCipher("secret")
+        pack_file(cipher, self.plain, self.container, chunk_size=4096)
+        # Przerwanie procesu po zapisaniu kawałków i części indeksu, przed nową stopką
+        writer = ContainerWriter(self.container, cipher, append=True)
+        writer.write_chunk(os.urandom(5000))
+        writer._file.write(container._INDEX_ENTRY.pack(1, 2, 3) + container.INDEX_MAGIC[:5])
+        writer._file.close()
+        self.assertEqual(ContainerReader(self.container, cipher).read_all(), self.data)
+        with mock.patch.object(container, '_RECOVERY_BLOCK', 100):
+            self.assertEqual(ContainerReader(self.container, cipher).read_all(), self.data)
+        # Kolejne dopisanie nadpisuje niepełny zapis
+        with ContainerWriter(self.container, cipher, append=True) as writer:
+            writer.write(b"nowe dane")
+        self.assertEqual(ContainerReader(self.container, cipher).read_all(), self.data + b"nowe dane")
+        with open(self.container, 'rb') as file:
+            self.assertEqual(file.read()[-len(container.INDEX_MAGIC):], container.INDEX_MAGIC)
+
+    def test_wrong_key_and_format(self):
+        pack_file(XORCipher("secret"), self.plain, self.container)
+        with self.assertRaises(InvalidKeyError):
+            ContainerReader(self.container, XORCipher("inny"))
+        with self.assertRaises(InvalidKeyError):
+            ContainerReader(self.container, CaesarCipher("secret"))
+        with self.assertRaises(ContainerError):
+            ContainerReader(self.plain, XORCipher("secret"))
+
+    def write_raw_container(self, version, header, stored):
+        header = json.dumps(header).encode('utf-8')
+        prefix = container._HEADER_PREFIX.pack(container.MAGIC, version, len(header)) + header
+        with open(self.container, 'wb') as file:
+            file.write(prefix + stored + container._INDEX_ENTRY.pack(len(prefix), len(stored), len(stored))
+                       + container._FOOTER.pack(len(prefix) + len(stored), 1, container.INDEX_MAGIC))
+
+    def test_salted_fingerprint(self):
+        cipher = XORCipher("k")
+        headers = []
+        for _ in range(2):
+            pack_file(cipher, self.plain, self.container)
+            headers.append(ContainerReader(self.container, cipher).header)
+        # Losowa sól pliku: ten sam klucz daje różne skróty, żaden nie jest zwykłym SHA-256 klucza
+        self.assertNotEqual(headers[0]['salt'], headers[1]['salt'])
+        self.assertNotEqual(headers[0]['key_fingerprint'], headers[1]['key_fingerprint'])
+        self.assertNotIn(container._legacy_fingerprint(cipher), [header['key_fingerprint'] for header in headers])
+
+        # Kontener w wersji 1 (skrót bez soli) jest nadal czytany
+        stored = cipher._encrypt_chunk(b"stare dane", 0)
+        self.write_raw_container(1, {'cipher': 'xor', 'key_fingerprint': container._legacy_fingerprint(cipher),
+                                     'chunk_size': 4096}, stored)
+        self.assertEqual(ContainerReader(self.container, cipher).read_all(), b"stare dane")
+        with self.assertRaises(InvalidKeyError):
+            ContainerReader(self.container, XORCipher("x"))
+
+        # Brak pola w nagłówku to uszkodzony kontener, a nie KeyError
+        self.write_raw_container(2, {'cipher': 'xor', 'key_fingerprint': "0" * 32, 'chunk_size': 4096}, stored)
+        with self.assertRaises(ContainerError):
+            ContainerReader(self.container, cipher)
+        with self.assertRaises(ContainerError):
+            ContainerWriter(self.container, cipher, append=True)
+
+
+class TestIncrementalEdit(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "dokument.szyfr")
+        self.cipher = XORCipher("secret")
+        self.lines = [f"linia {number}\n".encode('utf-8') for number in range(1000)]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_only_changed_chunks_are_rewritten(self):
+        data = b''.join(self.lines)
+        with ContainerWriter(self.filename, self.cipher, chunk_size=512) as writer:
+            writer.write(data)
+        with open(self.filename, 'rb') as file:
+            head = file.read(2000)
+
+        edits = (lambda text: text[:5000] + b"zmiana" + text[5006:],       # zamiana w środku
+                 lambda text: text[:3000] + b"nowa linia\n" + text[3000:],  # wstawienie przesuwa resztę
+                 lambda text: text[:100] + text[700:],                      # usunięcie
+                 lambda text: text + b"koniec\n")                           # dopisanie
+        for edit in edits:
+            edited = edit(data)
+            rewritten = update_container(self.filename, self.cipher, edited, data)
+            self.assertLessEqual(rewritten, 3)
+            self.assertEqual(ContainerReader(self.filename, self.cipher).read_all(), edited)
+            data = edited
+        self.assertEqual(update_container(self.filename, self.cipher, data), 0)
+        with open(self.filename, 'rb') as file:
+            self.assertEqual(file.read(2000), head)
+
+    def test_compaction_after_many_edits(self):
+        data = b''.join(self.lines)
+        with ContainerWriter(self.filename, self.cipher, chunk_size=512) as writer:
+            writer.write(data)
+        for number in range(50):
+            data = str(number).encode('ascii') + data[5000:] + data[:5000]
+            update_container(self.filename, self.cipher, data)
+        self.assertEqual(ContainerReader(self.filename, self.cipher).read_all(), data)
+        self.assertLess(os.path.getsize(self.filename), 3 * len(data))
+
+    def test_interrupted_update_keeps_document(self):
+        data = b''.join(self.lines)
+        with ContainerWriter(self.filename, self.cipher, chunk_size=512) as writer:
+            writer.write(data)
+        with open(self.filename, 'rb') as file:
+            before = file.read()
+        edited = data[:5000] + b"zmiana" + data[5006:]
+        for error in (EncryptionError("test"), KeyboardInterrupt()):
+            with mock.patch.object(ContainerWriter, 'write_chunk', side_effect=error), \
+                    self.assertRaises(type(error)):
+                update_container(self.filename, self.cipher, edited, data)
+            with open(self.filename, 'rb') as file:
+                self.assertEqual(file.read(), before)
+        update_container(self.filename, self.cipher, edited, data)
+        self.assertEqual(ContainerReader(self.filename, self.cipher).read_all(), edited)
+
+    def test_edit_converts_legacy_file(self):
+        cipher = CaesarCipher("secret")
+        cipher.save_to_file(self.filename, cipher.encrypt("Ala ma kota\n"))
+        for edited in ("Ala ma psa\n", "Ala ma psa i kota\n"):
+            with mock.patch('builtins.input', return_value=self.filename), \
+                    mock.patch.object(main, 'edit_file_content', return_value=edited), \
+                    mock.patch('builtins.print'):
+                self.assertEqual(main.handle_file_operations(cipher, 'edit'), edited)
+            self.assertEqual(ContainerReader(self.filename, cipher).read_all(), edited.encode('utf-8'))
+        self.assertFalse(os.path.exists("temp_decrypted.txt"))
+
+    def test_read_marks_container_text_as_decrypted(self):
+        cipher = CaesarCipher("secret")
+        legacy = os.path.join(self.directory.name, "stary.txt")
+        cipher.save_to_file(legacy, cipher.encrypt("Ala ma kota\n"))
+        with ContainerWriter(self.filename, cipher) as writer:
+            writer.write("Ala ma kota\n".encode('utf-8'))
+        with mock.patch('builtins.print'):
+            with mock.patch('builtins.input', return_value=legacy):
+                stored = main.handle_file_operations(cipher, 'read')
+            with mock.patch('builtins.input', return_value=self.filename):
+                plain = main.handle_file_operations(cipher, 'read')
+        # Zwykły plik zwraca szyfrogram, kontener - tekst już odszyfrowany (menu go nie deszyfruje)
+        self.assertNotIsInstance(stored, main.DecryptedText)
+        self.assertEqual(cipher.decrypt(stored), "Ala ma kota\n")
+        self.assertIsInstance(plain, main.DecryptedText)
+        self.assertEqual(plain, "Ala ma kota\n")
+
+        answers = iter(["1", "sekret", "n", "2", "2", self.filename, "n", "n", "3", "4"])
+        with mock.patch('builtins.input', side_effect=lambda prompt='': next(answers)), \
+                mock.patch('builtins.print') as printed, mock.patch.object(main, 'show_performance_stats'), \
+                mock.patch.object(main, 'CaesarCipher', return_value=cipher):
+            main.main()
+        self.assertIn(mock.call("\nTekst jest już odszyfrowany:", "Ala ma kota\n"), printed.call_args_list)
+
+
+class TestTransforms(unittest.TestCase):
+    def setUp(self):
+        self.text = "Zażółć gęślą jaźń!\tAla ma kota 123.\n" * 50
+
+    def test_match_callable_versions(self):
+        self.assertEqual(transforms.upper()(self.text), ''.join(map(str.upper, self.text)))
+        self.assertEqual(transforms.keep('alpha', chars=' ')(self.text),
+                         ''.join(filter(lambda char: char.isalpha() or char == ' ', self.text)))
+        self.assertEqual(transforms.remove_whitespace()(self.text), ''.join(self.text.split()))
+        self.assertEqual(transforms.substitute({'ą': 'a', 'ma': 'MA', '!': None})("Ala ma ą!"), "Ala MA a")
+        self.assertEqual(transforms.regex(r'\d+', '#')(self.text), self.text.replace('123', '#'))
+        with self.assertRaises(ValueError):
+            transforms.keep('nieznana')
+
+    def test_combined_transform_is_one_table(self):
+        combined = transforms.lower() + transforms.drop('digit', 'punct') + transforms.substitute({'ł': 'l'})
+        self.assertIsNotNone(combined.table)
+        expected = ''.join(char for char in self.text.lower() if not char.isdigit() and char not in '!.')
+        self.assertEqual(combined(self.text), expected.replace('ł', 'l'))
+
+    def test_cipher_helpers_use_compiled_tables(self):
+        self.assertEqual(Cipher.map_text(self.text, str.upper), ''.join(map(str.upper, self.text)))
+        self.assertEqual(Cipher.filter_text(self.text, str.isalpha), ''.join(filter(str.isalpha, self.text)))
+        self.assertEqual(Cipher.map_text(self.text, transforms.upper()), self.text.upper())
+        self.assertEqual(Cipher.filter_text("a b", transforms.remove_whitespace()), "ab")
+
+    def test_pipeline_merges_transform_and_caesar_tables(self):
+        caesar = CaesarCipher("secret")
+        pipeline = CipherPipeline(transforms.upper(), transforms.remove_whitespace(), caesar)
+        self.assertEqual([kind for kind, _ in pipeline.plan()], ['table'])
+        self.assertEqual(pipeline.encrypt("Ala ma kota"), caesar.encrypt("ALAMAKOTA"))
+
+
+class TestCryptanalysis(unittest.TestCase):
+    POLISH = ("Litwo! Ojczyzno moja! ty jesteś jak zdrowie. Ile cię trzeba cenić, ten tylko się dowie, "
+              "Kto cię stracił. Dziś piękność twą w całej ozdobie Widzę i opisuję, bo tęsknię po tobie.")
+    ENGLISH = "It was the best of times, it was the worst of times, it was the age of wisdom."
+
+    def test_recovers_every_shift(self):
+        for text in (self.POLISH, self.ENGLISH):
+            for shift in range(26):
+                encrypted = CaesarCipher.from_shift(shift).encrypt(text)
+                self.assertEqual(cryptanalysis.rank_caesar_shifts(encrypted)[0][0], shift)
+
+    def test_crack_returns_working_cipher(self):
+        encrypted = CaesarCipher("klucz").encrypt(self.ENGLISH)
+        self.assertEqual(cryptanalysis.crack_caesar(encrypted).decrypt(encrypted), self.ENGLISH)
+
+    def test_sampled_file_histogram(self):
+        data = CaesarCipher("klucz").encrypt(self.ENGLISH * 20000).encode('ascii')
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "szyfrogram.bin")
+            with open(filename, 'wb') as file:
+                file.write(data)
+            sampled = cryptanalysis.file_histogram(filename, sample_size=64 * 1024)
+        self.assertLess(sum(sampled), len(data) // 10)
+        self.assertEqual(cryptanalysis.rank_shifts(sampled)[0][0], CaesarCipher("klucz").shift)
+        self.assertEqual(cryptanalysis.letter_histogram(data, None),
+                         [data.lower().count(letter) for letter in b"abcdefghijklmnopqrstuvwxyz"])
+
+
+class TestXORCracker(unittest.TestCase):
+    def setUp(self):
+        self.text = make_corpus('ascii', 20000)
+
+    def test_recovers_key_from_raw_bytes_and_base64(self):
+        for key in ("secret", "tajny_klucz_123", "Zażółć"):
+            encrypted = XORCipher(key).encrypt_bytes(self.text.encode('ascii'))
+            self.assertEqual(cryptanalysis.estimate_xor_key_length(encrypted)[0][0], len(key.encode('utf-8')))
+            self.assertEqual(cryptanalysis.crack_xor(encrypted), key.encode('utf-8'))
+        armored = XORCipher("klucz").encrypt(self.text)
+        self.assertEqual(cryptanalysis.crack_xor(armored), b"klucz")
+        with self.assertRaises(DecryptionError):
+            cryptanalysis.crack_xor("to nie jest base64!")
+
+    def test_sampled_and_parallel_paths(self):
+        encrypted = XORCipher("secret").encrypt_bytes(make_corpus('ascii', 300000).encode('ascii'))
+        self.assertEqual(cryptanalysis.solve_xor_key(encrypted, 6, sample_size=10000), b"secret")
+        self.assertEqual(cryptanalysis.solve_xor_key(encrypted, 6, sample_size=None), b"secret")
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.text = ''.join(chr(i % 256) for i in range(3001))
+        self.data = os.urandom(3001)
+
+    @staticmethod
+    def sequential(stages, data, encrypt):
+        for stage in (stages if encrypt else stages[::-1]):
+            if isinstance(data, str):
+                data = stage.encrypt(data) if encrypt else stage.decrypt(data)
+            else:
+                data = stage.encrypt_bytes(data) if encrypt else stage.decrypt_bytes(data)
+        return data
+
+    def test_matches_sequential_stages(self):
+        combinations = ([CaesarCipher("ab"), ReverseCipher("r"), CaesarCipher("klucz"), ReverseCipher("r")],
+                        [CaesarCipher("ab"), XORCipher("secret"), ReverseCipher("r")],
+                        [XORCipher("secret"), XORCipher("kot"), ReverseCipher("r"), XORCipher("secret")])
+        for stages in combinations:
+            pipeline = CipherPipeline(*stages)
+            for data in (self.text, self.data):
+                encrypt = pipeline.encrypt if isinstance(data, str) else pipeline.encrypt_bytes
+                decrypt = pipeline.decrypt if isinstance(data, str) else pipeline.decrypt_bytes
+                encrypted = encrypt(data)
+                self.assertEqual(encrypted, self.sequential(stages, data, True))
+                # Tekstowy szyfr Cezara gubi litery spoza ASCII, więc wynik porównywany jest z etapami po kolei
+                decrypted = decrypt(encrypted)
+                self.assertEqual(decrypted, self.sequential(stages, encrypted, False))
+                if isinstance(data, bytes):
+                    self.assertEqual(decrypted, data)
+
+                for chunk_size in (7, 1000):
+                    stream_type = io.StringIO if isinstance(data, str) else io.BytesIO
+                    output = stream_type()
+                    pipeline.encrypt_stream(stream_type(data), output, chunk_size)
+                    self.assertEqual(output.getvalue(), encrypted)
+                    output = stream_type()
+                    pipeline.decrypt_stream(stream_type(encrypted), output, chunk_size)
+                    self.assertEqual(output.getvalue(), decrypted)
+
+    def test_stage_fusion(self):
+        pipeline = CipherPipeline(CaesarCipher("ab"), ReverseCipher("r"), CaesarCipher("klucz"), ReverseCipher("r"))
+        self.assertEqual(pipeline.plan(), [('shift', (CaesarCipher("ab").shift + CaesarCipher("klucz").shift) % 26)])
+        xor_pipeline = CipherPipeline(XORCipher("secret"), XORCipher("kot"))
+        self.assertEqual([kind for kind, _ in xor_pipeline.plan(text_mode=False)], ['xor'])
+        self.assertEqual(CipherPipeline(XORCipher("secret"), XORCipher("secret")).plan(text_mode=False), [])
+
+    def test_transforms_are_one_way(self):
+        pipeline = CipherPipeline(str.upper, CaesarCipher("secret"))
+        encrypted = pipeline.encrypt("Ala ma kota")
+        self.assertEqual(encrypted, CaesarCipher("secret").encrypt("ALA MA KOTA"))
+        self.assertEqual(pipeline.decrypt(encrypted), "ALA MA KOTA")
+        with self.assertRaises(CipherError):
+            CipherPipeline("nie szyfr")
+
+    def test_transforms_rejected_for_bytes(self):
+        pipeline = CipherPipeline(str.upper, CaesarCipher("klucz"), XORCipher("tajny"), ReverseCipher("-"))
+        self.assertEqual(pipeline.decrypt(pipeline.encrypt("Ala ma kota")), "ALA MA KOTA")
+        with self.assertRaises(CipherError):
+            pipeline.encrypt_bytes(b"Ala ma kota")
+        with self.assertRaises(CipherError):
+            pipeline.encrypt_stream(io.BytesIO(b"Ala ma kota"), io.BytesIO())
+        # Deszyfrowanie pomija przekształcenia, więc działa także na danych binarnych
+        binary = CipherPipeline(CaesarCipher("klucz"), XORCipher("tajny"), ReverseCipher("-"))
+        self.assertEqual(pipeline.decrypt_bytes(binary.encrypt_bytes(b"ALA")), b"ALA")
+
+
+class TestEngines(unittest.TestCase):
+    def test_engines_match_reference(self):
+        for (cipher_name, kind), registered in engines.ENGINES.items():
+            instance = cipher.CIPHERS[cipher_name]("secret", collect_stats=False)
+            reference = registered[0]
+            for size in (0, 1, 15, 4099):
+                data = engines._sample(kind, size, engines.random.Random(size))
+                if kind == 'text':
+                    data = engines._text_sample_for(cipher_name, data)
+                encrypted = reference.run(instance, data, True)
+                for engine in registered:
+                    if engine.available():
+                        with self.subTest(cipher=cipher_name, kind=kind, engine=engine.name, size=size):
+                            self.assertEqual(engine.run(instance, data, True), encrypted)
+                            self.assertEqual(engine.run(instance, encrypted, False),
+                                             reference.run(instance, encrypted, False))
+
+    def test_dispatch_by_size(self):
+        plans = {(XORCipher, 'bytes'): ((100,), (None, engines.xor_reference))}
+        xor = XORCipher("secret")
+        with mock.patch.object(cipher, '_engine_plans', plans), \
+                mock.patch.object(XORCipher, '_encrypt_bytes', wraps=xor._encrypt_bytes) as default:
+            small, large = xor.encrypt_bytes(b"a" * 99), xor.encrypt_bytes(b"a" * 100)
+            self.assertEqual(default.call_count, 1)
+            self.assertEqual(xor.decrypt_bytes(large), b"a" * 100)
+        self.assertEqual(small, large[:99])
+
+    def test_plans_never_calibrate(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.dict(os.environ, {'SZYFRATOR_CACHE_DIR': directory}), \
+                mock.patch.object(engines, 'calibrate') as calibrate:
+            plans = engines.load_plans()
+            calibrate.assert_not_called()
+            self.assertFalse(os.path.exists(engines.cache_filename()))
+            self.assertLessEqual(set(plans), {(XORCipher, 'bytes'), (ReverseCipher, 'bytes')})
+
+    def test_calibration_is_cached(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.dict(os.environ, {'SZYFRATOR_CACHE_DIR': directory}):
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(engines.main(['--calibrate']), 0)
+            calibration = engines.load_calibration()
+            self.assertIsNotNone(calibration)
+            for (cipher_class, kind), (limits, selected) in engines.load_plans().items():
+                self.assertEqual(len(selected), len(limits) + 1)
+                self.assertEqual(list(limits), sorted(limits))
+
+    def test_dispatch_never_starts_process_pool(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.dict(os.environ, {'SZYFRATOR_CACHE_DIR': directory}):
+            # Kalibracja sprzed usunięcia silnika wieloprocesowego jest nieaktualna
+            plans = {f"{name}/{kind}": {'limits': [], 'engines': [engines.DEFAULT]} for name, kind in engines.ENGINES}
+            plans['xor/bytes'] = {'limits': [1 << 22], 'engines': [engines.DEFAULT, 'parallel']}
+            engines.save_calibration({'version': 1, 'plans': plans, 'rejected': []})
+            self.assertIsNone(engines.load_calibration())
+            with mock.patch.object(cipher, '_engine_plans', engines.load_plans()), \
+                    mock.patch.object(Cipher, '_parallel_result') as parallel:
+                for name in cipher.CIPHERS:
+                    cipher.CIPHERS[name]("secret").encrypt_bytes(b"a" * (8 << 20))
+            parallel.assert_not_called()
+
+    def test_failed_cache_write_is_reported(self):
+        with tempfile.NamedTemporaryFile() as blocker, \
+                mock.patch.dict(os.environ, {'SZYFRATOR_CACHE_DIR': os.path.join(blocker.name, 'kalibracja')}):
+            with self.assertRaises(FileOperationError):
+                engines.save_calibration({'version': engines.ENGINES_VERSION, 'plans': {}, 'rejected': []})
 
 
 class TestIntegration(unittest.TestCase):
@@ -0,0 +1,184 @@
+import re
+import string
+from typing import Callable, Dict, Iterable, Optional, Pattern, Tuple, Union
+
+# Deklaratywne przekształcenia tekstu kompilowane do tablic str.translate albo wyrażeń regularnych.
+# Sąsiednie tablice łączą się w jedną, więc kilka przekształceń wykonuje się jednym przebiegiem.
+
+CHAR_CLASSES: Dict[str, Callable[[str], bool]] = {
+    'alpha': str.isalpha,
+    'digit': str.isdigit,
+    'alnum': str.isalnum,
+    'space': str.isspace,
+    'upper': str.isupper,
+    'lower': str.islower,
+    'ascii': str.isascii,
+    'printable': str.isprintable,
+    'punct': lambda char: char in string.punctuation,
+}
+
+
+class _LazyTable(dict):
+    """Tablica translacji wyliczająca wynik dla znaku przy pierwszym wystąpieniu"""
+
+    def __init__(self, function: Callable[[str], Optional[str]]):
+        super().__init__()
+        self.function = function
+
+    def __missing__(self, code: int) -> Optional[str]:
+        value = self.function(chr(code))
+        self[code] = value
+        return value
+
+
+class _ComposedTable(dict):
+    """Złożenie kilku tablic translacji - jedno translate zamiast kilku"""
+
+    def __init__(self, tables: Iterable[dict]):
+        super().__init__()
+        self.tables = tuple(tables)
+
+    def __missing__(self, code: int) -> Optional[str]:
+        text = chr(code)
+        for table in self.tables:
+            text = text.translate(table)
+        value = text or None
+        self[code] = value
+        return value
+
+
+def compose_tables(tables: Iterable[dict]) -> dict:
+    """Łączy tablice translacji (także Cezara) w jedną; zwraca pojedynczą tablicę bez zmian"""
+    flat = []
+    for table in tables:
+        flat.extend(table.tables if isinstance(table, _ComposedTable) else (table,))
+    return flat[0] if len(flat) == 1 else _ComposedTable(flat)
+
+
+# Krok przekształcenia: ('table', tablica translacji) albo ('regex', (wzorzec, zamiennik))
+Step = Tuple[str, object]
+
+
+class Transform:
+    """Przekształcenie tekstu złożone z tablic translacji i wyrażeń regularnych; łączone operatorem +"""
+
+    def __init__(self, steps: Iterable[Step], name: str = 'transform'):
+        merged = []
+        for kind, value in steps:
+            if kind == 'table' and merged and merged[-1][0] == 'table':
+                merged[-1] = ('table', compose_tables((merged[-1][1], value)))
+            else:
+                merged.append((kind, value))
+        self.steps: Tuple[Step, ...] = tuple(merged)
+        self.name = name
+
+    @property
+    def table(self) -> Optional[dict]:
+        """Jedyna tablica translacji, jeśli przekształcenie składa się tylko z niej"""
+        if len(self.steps) == 1 and self.steps[0][0] == 'table':
+            return self.steps[0][1]
+        return None
+
+    def __call__(self, text: str) -> str:
+        for kind, value in self.steps:
+            if kind == 'table':
+                text = text.translate(value)
+            else:
+                pattern, replacement = value
+                text = pattern.sub(replacement, text)
+        return text
+
+    def __add__(self, other: 'Transform') -> 'Transform':
+        if not isinstance(other, Transform):
+            return NotImplemented
+        return Transform(self.steps + other.steps, f"{self.name}+{other.name}")
+
+    def __repr__(self) -> str:
+        return f"Transform({self.name})"
+
+
+def _table_transform(function: Callable[[str], Optional[str]], name: str) -> Transform:
+    return Transform([('table', _LazyTable(function))], name)
+
+
+def upper() -> Transform:
+    return _table_transform(str.upper, 'upper')
+
+
+def lower() -> Transform:
+    return _table_transform(str.lower, 'lower')
+
+
+def swapcase() -> Transform:
+    return _table_transform(str.swapcase, 'swapcase')
+
+
+def _predicate(classes: Tuple[str, ...], chars: str) -> Callable[[str], bool]:
+    unknown = [name for name in classes if name not in CHAR_CLASSES]
+    if unknown:
+        raise ValueError(f"Nieznane klasy znaków: {', '.join(unknown)}")
+    predicates = [CHAR_CLASSES[name] for name in classes]
+    return lambda char: char in chars or any(predicate(char) for predicate in predicates)
+
+
+def keep(*classes: str, chars: str = '') -> Transform:
+    """Zostawia tylko znaki z podanych klas (np. 'alpha', 'digit') lub z chars"""
+    matches = _predicate(classes, chars)
+    return _table_transform(lambda char: char if matches(char) else None, f"keep({','.join(classes)}{chars})")
+
+
+def drop(*classes: str, chars: str = '') -> Transform:
+    """Usuwa znaki z podanych klas lub z chars"""
+    matches = _predicate(classes, chars)
+    return _table_transform(lambda char: None if matches(char) else char, f"drop({','.join(classes)}{chars})")
+
+
+def remove_whitespace() -> Transform:
+    return drop('space')
+
+
+def substitute(mapping: Dict[str, Optional[str]]) -> Transform:
+    """Zamienia znaki lub ciągi znaków (None usuwa); same pojedyncze znaki dają tablicę, dłuższe - regex"""
+    if all(len(old) == 1 for old in mapping):
+        return Transform([('table', {ord(old): new for old, new in mapping.items()})], 'substitute')
+    # Dłuższe wzorce najpierw, żeby "abc" wygrało z "ab"; wszystkie zamiany w jednym przebiegu
+    replacements = {old: new or '' for old, new in mapping.items()}
+    pattern = re.compile('|'.join(re.escape(old) for old in sorted(replacements, key=len, reverse=True)))
+    return Transform([('regex', (pattern, lambda match: replacements[match.group(0)]))], 'substitute')
+
+
+def regex(pattern: Union[str, Pattern], replacement: Union[str, Callable] = '') -> Transform:
+    """Zamiana według wyrażenia regularnego (kompilowanego raz)"""
+    compiled = re.compile(pattern) if isinstance(pattern, str) else pattern
+    return Transform([('regex', (compiled, replacement))], f"regex({compiled.pattern})")
+
+
+# Znane funkcje jednoznakowe i predykaty, które map_text / filter_text wykonują jako tablice translacji
+_KNOWN_MAPS = (('upper', str.upper, upper), ('lower', str.lower, lower), ('swapcase', str.swapcase, swapcase))
+_KNOWN_FILTERS = {name: predicate for name, predicate in CHAR_CLASSES.items() if name != 'punct'}
+_compiled: Dict[str, Transform] = {}
+
+
+def compile_map(function: Callable) -> Optional[Transform]:
+    """Zwraca przekształcenie równoważne map(function, text) albo None, gdy funkcja jest nieznana"""
+    if isinstance(function, Transform):
+        return function
+    for name, known, factory in _KNOWN_MAPS:
+        if function is known:
+            if name not in _compiled:
+                _compiled[name] = factory()
+            return _compiled[name]
+    return None
+
+
+def compile_filter(condition: Callable) -> Optional[Transform]:
+    """Zwraca przekształcenie równoważne filter(condition, text) albo None, gdy predykat jest nieznany"""
+    if isinstance(condition, Transform):
+        return condition
+    for name, known in _KNOWN_FILTERS.items():
+        if condition is known:
+            key = f"keep({name})"
+            if key not in _compiled:
+                _compiled[key] = keep(name)
+            return _compiled[key]
+    return None
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, Optional, Tuple
+
+from cache import get_cipher
+from cipher import DEFAULT_CHUNK_SIZE
+from compression import check_level
+from container import key_fingerprint, new_salt
+from exceptions import CipherError, FileOperationError
+
+# Tryb katalogowy: całe drzewo plików jest szyfrowane do lustrzanego drzewa wynikowego.
+# Manifest w katalogu wynikowym pamięta dla każdego pliku rozmiar, czas modyfikacji i skrót
+# zawartości, więc kolejne uruchomienie pomija pliki, które się nie zmieniły.
+MANIFEST_NAME = '.szyfrator-manifest.json'
+MANIFEST_VERSION = 1
+_TEMP_SUFFIX = '.szyfrator-tmp'
+
+
+def file_hash(filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    """Skrót SHA-256 zawartości pliku, liczony kawałkami"""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _walk(root: str) -> Iterator[str]:
+    """Zwraca ścieżki plików względem root (z '/' jako separatorem), w stałej kolejności"""
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories.sort()
+        for filename in sorted(filenames):
+            # Manifest drzewa wynikowego nie jest plikiem do przetworzenia (np. przy deszyfrowaniu)
+            if filename == MANIFEST_NAME or filename.endswith(_TEMP_SUFFIX):
+                continue
+            path = os.path.join(directory, filename)
+            if os.path.isfile(path):
+                yield os.path.relpath(path, root).replace(os.sep, '/')
+
+
+def load_manifest(dst_dir: str) -> dict:
+    """Wczytuje manifest; brakujący lub uszkodzony oznacza przetworzenie wszystkich plików od nowa"""
+    try:
+        with open(os.path.join(dst_dir, MANIFEST_NAME), 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (IOError, OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) and manifest.get('version') == MANIFEST_VERSION else {}
+
+
+def save_manifest(dst_dir: str, manifest: dict) -> None:
+    """Zapisuje manifest atomowo: plik tymczasowy, fsync, potem os.replace"""
+    filename = os.path.join(dst_dir, MANIFEST_NAME)
+    temp_filename = filename + _TEMP_SUFFIX
+    try:
+        with open(temp_filename, 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=1, sort_keys=True)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_filename, filename)
+    except (IOError, OSError) as e:
+        raise FileOperationError(f"Błąd podczas zapisu manifestu: {e}")
+
+
+# Zadanie dla jednego pliku: (szyfr, klucz, operacja, plik źródłowy, plik wynikowy,
+# poprzedni skrót, rozmiar kawałka, kompresja)
+Task = Tuple[str, str, str, str, str, Optional[str], int, Optional[Tuple[str, Optional[int]]]]
+
+
+def _process_entry(task: Task) -> Tuple[Optional[dict], bool, Optional[str]]:
+    """Przetwarza jeden plik; zwraca (wpis manifestu, czy zapisano wynik, błąd). Działa także w puli procesów"""
+    cipher_name, key, operation, src, dst, previous_hash, chunk_size, compress = task
+    temp_filename = dst + _TEMP_SUFFIX
+    try:
+        # Rozmiar i czas modyfikacji sprzed odczytu: zmiana pliku w trakcie da inny czas przy następnym
+        # uruchomieniu, więc plik zostanie wtedy przetworzony ponownie
+        stat = os.stat(src)
+        digest = file_hash(src, chunk_size)
+        entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+        if digest == previous_hash and os.path.exists(dst):
+            # Zmienił się tylko czas modyfikacji - zawartość jest taka sama
+            return entry, False, None
+        cipher = get_cipher(cipher_name, key)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if operation == 'encrypt':
+            codec, level = compress or (None, None)
+            cipher.encrypt_binary_file(src, temp_filename, chunk_size, compression=codec, level=level)
+        else:
+            cipher.decrypt_binary_file(src, temp_filename, chunk_size)
+        os.replace(temp_filename, dst)
+        return entry, True, None
+    except (CipherError, IOError, OSError) as e:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        return None, False, str(e)
+
+
+def process_tree(cipher_name: str, key: str, src_dir: str, dst_dir: str, operation: str = 'encrypt',
+                 workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 compress: Optional[Tuple[str, Optional[int]]] = None, prune: bool = False) -> Dict:
+    """Szyfruje (lub deszyfruje) wszystkie pliki z src_dir do lustrzanego drzewa w dst_dir.
+
+    Pliki o tym samym rozmiarze i czasie modyfikacji co w manifeście są pomijane bez czytania;
+    przy zmienionym czasie decyduje skrót zawartości. Zmiana szyfru, klucza lub kompresji
+    oznacza przetworzenie wszystkich plików. prune=True usuwa wyniki plików, których już nie ma
+    w src_dir ('removed'); bez prune pozostają w dst_dir i w manifeście ('orphaned'). Zwraca
+    podsumowanie z liczbą plików, bajtów oraz plikami i MB na sekundę.
+    """
+    if operation not in ('encrypt', 'decrypt'):
+        raise ValueError(f"Nieznana operacja: {operation}")
+    if compress and operation == 'encrypt':
+        # Błędny poziom zgłaszany od razu, a nie osobno dla każdego pliku w procesach roboczych
+        check_level(*compress)
+    src_dir, dst_dir = os.path.abspath(src_dir), os.path.abspath(dst_dir)
+    if not os.path.isdir(src_dir):
+        raise FileOperationError(f"Katalog nie istnieje: {src_dir}")
+    if os.path.commonpath([src_dir, dst_dir]) in (src_dir, dst_dir):
+        raise FileOperationError("Katalogi źródłowy i wynikowy nie mogą być zagnieżdżone w sobie")
+
+    manifest = load_manifest(dst_dir)
+    # Manifest leży obok szyfrogramów - skrót klucza jest solony tak jak w kontenerze
+    salt = manifest.get('params', {}).get('salt')
+    try:
+        salt = bytes.fromhex(salt)
+    except (TypeError, ValueError):
+        salt = new_salt()
+    params = {
+        'cipher': cipher_name,
+        'salt': salt.hex(),
+        'key_fingerprint': key_fingerprint(get_cipher(cipher_name, key), salt),
+        'operation': operation,
+        'compression': list(compress) if compress and operation == 'encrypt' else None,
+    }
+    # Wpisy z innymi parametrami nie pozwalają pominąć pliku, ale nadal wskazują wyniki do usunięcia (prune)
+    recorded = manifest.get('files', {})
+    previous = recorded if manifest.get('params') == params else {}
+
+    start = time.perf_counter()
+    files: Dict[str, dict] = {}
+    pending = []
+    for relative in _walk(src_dir):
+        src = os.path.join(src_dir, relative)
+        dst = os.path.join(dst_dir, relative)
+        stat = os.stat(src)
+        entry = previous.get(relative)
+        if (entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+                and os.path.exists(dst)):
+            files[relative] = entry
+            continue
+        task = (cipher_name, key, operation, src, dst, entry and entry['sha256'], chunk_size, compress)
+        pending.append((relative, task))
+
+    workers = workers or os.cpu_count() or 1
+    tasks = [task for _, task in pending]
+    if workers <= 1 or len(tasks) <= 1:
+        results = map(_process_entry, tasks)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(min(workers, len(tasks)))
+        # Małe pliki trafiają do procesów paczkami, żeby komunikacja nie dominowała
+        results = executor.map(_process_entry, tasks, chunksize=max(1, len(tasks) // (workers * 4)))
+    processed = processed_bytes = 0
+    errors: Dict[str, str] = {}
+    try:
+        for (relative, _), (entry, written, error) in zip(pending, results):
+            if error:
+                errors[relative] = error
+                continue
+            files[relative] = entry
+            if written:
+                processed += 1
+                processed_bytes += entry['size']
+    finally:
+        if executor:
+            executor.shutdown()
+
+    sources = len(files)
+    removed = orphaned = 0
+    for relative in recorded:
+        path = os.path.join(dst_dir, relative)
+        if relative in files or relative in errors or not os.path.exists(path):
+            continue
+        if prune:
+            os.remove(path)
+            removed += 1
+        else:
+            # Bez prune wynik zostaje w dst_dir - wpis także, żeby późniejsze --prune mogło go usunąć
+            files[relative] = recorded[relative]
+            orphaned += 1
+    os.makedirs(dst_dir, exist_ok=True)
+    save_manifest(dst_dir, {'version': MANIFEST_VERSION, 'params': params, 'files': files})
+
+    elapsed = time.perf_counter() - start
+    total = sources + len(errors)
+    return {
+        'files': total,
+        'processed': processed,
+        'skipped': sources - processed,
+        'removed': removed,
+        'orphaned': orphaned,
+        'errors': errors,
+        'bytes': processed_bytes,
+        'elapsed': elapsed,
+        'files_per_s': total / elapsed if elapsed else 0.0,
+        'mb_per_s': processed_bytes / elapsed / 1e6 if elapsed else 0.0,
+    }